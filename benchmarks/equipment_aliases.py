@@ -0,0 +1,70 @@
+"""
+Measure the time that it takes to resolve the <equipment> elements in a large
+configuration file. The time per <equipment> element should not depend on the
+number of <equipment> elements.
+
+The equipment do not have an alias, so the model number is used as the alias
+and most aliases need a unique number to be appended.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/equipment_aliases.py 1000 2000 4000 8000
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from msl.equipment import Config
+
+
+def create_files(directory, n):
+    register = os.path.join(directory, 'register.csv')
+    with open(register, 'w') as fp:
+        fp.write('Manufacturer,Model,Serial,Location\n')
+        for i in range(n):
+            fp.write('Manufacturer {},Model {},SN{:08d},Lab {}\n'.format(i % 50, i % 200, i, i % 30))
+
+    config = os.path.join(directory, 'config.xml')
+    with open(config, 'w') as fp:
+        fp.write('<msl>\n<registers><register><path>{}</path></register></registers>\n'.format(register))
+        for i in range(n):
+            fp.write('<equipment serial="SN{:08d}"/>\n'.format(i))
+        fp.write('</msl>\n')
+    return config
+
+
+def legacy_aliases(aliases):
+    # how a unique number was appended to an alias before a counter was used for each alias
+    using = {}
+    for alias in aliases:
+        if alias in using:
+            n = sum([1 for key in using if key.startswith(alias)])
+            alias += '({})'.format(n + 1)
+        using[alias] = None
+    return using
+
+
+def main(sizes):
+    print('{:>8} {:>10} {:>12} {:>14}'.format('tags', 'load [s]', 'per tag [us]', 'legacy [s]'))
+    for n in sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            config = create_files(directory, n)
+            t0 = time.time()
+            db = Config(config).database()
+            elapsed = time.time() - t0
+            assert len(db.equipment) == n
+
+            # only the alias loop of the legacy implementation
+            t0 = time.time()
+            legacy_aliases([record.model for record in db.records()])
+            legacy = time.time() - t0
+        finally:
+            shutil.rmtree(directory)
+        print('{:>8} {:>10.2f} {:>12.1f} {:>14.2f}'.format(n, elapsed, 1e6 * elapsed / n, legacy))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000])
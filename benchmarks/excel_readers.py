@@ -0,0 +1,101 @@
+"""
+Compare the time that it takes for each Excel reader backend to read a register.
+
+A temporary .xlsx workbook is created (requires openpyxl) and it is read with
+the legacy cell-by-cell xlrd reader and with each of the available backends
+(which can be selected using the "reader" attribute of a <register> element).
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/excel_readers.py 50000
+"""
+import os
+import sys
+import time
+import datetime
+import tempfile
+
+import xlrd
+
+from msl.equipment.database import _read_file, _cell_convert, _iter_excel_rows, _EXCEL_READERS
+
+
+def create_workbook(path, n):
+    import openpyxl  # an optional dependency
+
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet('Equipment')
+    sheet.append(['Manufacturer', 'Model', 'Serial', 'Category', 'Location',
+                  'Date Calibrated', 'Calibration Cycle', 'Description'])
+    for i in range(n):
+        sheet.append([
+            'Manufacturer {}'.format(i % 50),
+            'Model {}'.format(i % 500),
+            'SN{:08d}'.format(i),
+            'Category {}'.format(i % 20),
+            'Lab {}'.format(i % 30),
+            datetime.date(2000 + i % 20, 1 + i % 12, 1),
+            1 + i % 5,
+            'Description of item {}'.format(i),
+        ])
+    book.save(path)
+
+
+def convert_legacy(sheet, datemode):
+    # the conversion before the values were extracted and converted by column
+    return [[_cell_convert(cell.value, cell.ctype, datemode) for cell in sheet.row(r)]
+            for r in range(1, sheet.nrows)]
+
+
+def convert_bulk(sheet, datemode):
+    return list(_iter_excel_rows(sheet, datemode))
+
+
+def read_legacy(path):
+    book = xlrd.open_workbook(path, on_demand=True)
+    sheet = book.sheet_by_name('Equipment')
+    return sheet.row_values(0), convert_legacy(sheet, book.datemode)
+
+
+def read(path, reader):
+    header, rows = _read_file(path, 'Equipment', None, None, reader)
+    return header, list(rows)
+
+
+def timeit(function, *args, **kwargs):
+    # returns the fastest time of a few repeats
+    best, result = float('inf'), None
+    for _ in range(kwargs.get('repeat', 3)):
+        t0 = time.time()
+        result = function(*args)
+        best = min(best, time.time() - t0)
+    return best, result
+
+
+def main(n):
+    path = os.path.join(tempfile.gettempdir(), 'msl-equipment-benchmark-{}.xlsx'.format(n))
+    if not os.path.isfile(path):
+        print('Creating a workbook with {} rows'.format(n))
+        create_workbook(path, n)
+
+    legacy_time, expected = timeit(read_legacy, path)
+    print('Time to read {} rows from {}'.format(n, path))
+    print('  {:<16} {:>6.2f} s'.format('xlrd (per-cell)', legacy_time))
+    for reader in sorted(_EXCEL_READERS):
+        elapsed, result = timeit(read, path, reader)
+        assert result == expected, 'the {} reader returned different values'.format(reader)
+        print('  {:<16} {:>6.2f} s  ({:.1f}x)'.format(reader, elapsed, legacy_time / elapsed))
+
+    # most of the time that xlrd takes is spent parsing the file, so also
+    # compare the time that it takes to convert the cells of a parsed Sheet
+    book = xlrd.open_workbook(path, on_demand=True)
+    sheet = book.sheet_by_name('Equipment')
+    legacy_time, _ = timeit(convert_legacy, sheet, book.datemode, repeat=10)
+    bulk_time, _ = timeit(convert_bulk, sheet, book.datemode, repeat=10)
+    print('Time to convert the cells of a parsed Sheet')
+    print('  {:<16} {:>6.2f} s'.format('xlrd (per-cell)', legacy_time))
+    print('  {:<16} {:>6.2f} s  ({:.1f}x)'.format('xlrd', bulk_time, legacy_time / bulk_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
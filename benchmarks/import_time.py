@@ -0,0 +1,62 @@
+"""
+Measure the time that it takes to import msl.equipment.factory in a new process.
+
+The resource classes are registered from a manifest so a resource module is only
+imported when find_resource_class() finds it. For comparison, the time that it
+takes to also import every resource module (which is what happened before the
+manifest was used) is measured.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/import_time.py 10
+"""
+import sys
+import time
+import subprocess
+
+LAZY = 'import msl.equipment.factory'
+
+LAZY_FIND = LAZY + '''
+from msl.equipment import ConnectionRecord, Backend
+from msl.equipment.resources import find_resource_class
+find_resource_class(ConnectionRecord(manufacturer='Thorlabs', model='FW102C', backend=Backend.MSL))
+'''
+
+EAGER = LAZY + '''
+import importlib
+from msl.equipment.resources._manifest import MANIFEST
+for module, name, manufacturer, model, flags in MANIFEST:
+    importlib.import_module(module)
+'''
+
+MODULES = '''
+import sys
+import {}
+print(len([m for m in sys.modules if m.startswith('msl.equipment.resources.')]))
+'''
+
+
+def measure(code, repeat):
+    # the fastest time of a few repeats
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.time()
+        subprocess.check_call([sys.executable, '-c', code])
+        best = min(best, time.time() - t0)
+    return best
+
+
+def main(repeat):
+    baseline = measure('pass', repeat)
+    print('Time to import (the startup time of the interpreter, {:.0f} ms, is subtracted)'.format(1e3 * baseline))
+    for name, code in [('msl.equipment.factory', LAZY),
+                       ('+ find_resource_class() for 1 driver', LAZY_FIND),
+                       ('+ import every resource module', EAGER)]:
+        print('  {:<38} {:>6.0f} ms'.format(name, 1e3 * (measure(code, repeat) - baseline)))
+
+    out = subprocess.check_output([sys.executable, '-c', MODULES.format('msl.equipment.factory')])
+    print('Resource modules imported by msl.equipment.factory: {}'.format(int(out)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,91 @@
+"""
+Compare the time that it takes to query many values from equipment
+by calling ConnectionMessageBased.query() in a loop and by calling
+ConnectionMessageBased.query_many().
+
+The equipment is simulated by a TCP server that sends each reply a
+certain time (the latency of the network and the instrument) after
+the request was received.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/query_many.py 0.002
+"""
+import sys
+import time
+import threading
+try:
+    import queue
+    import socketserver
+except ImportError:
+    import Queue as queue
+    import SocketServer as socketserver
+
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend
+
+
+def main(latency, n=20, repeat=20):
+
+    class Handler(socketserver.StreamRequestHandler):
+        disable_nagle_algorithm = True
+
+        def handle(self):
+            # each reply is sent `latency` seconds after the request was received,
+            # the requests are not waiting for the previous replies to be sent
+            requests = queue.Queue()
+            writer = threading.Thread(target=self.reply, args=(requests,))
+            writer.start()
+            for line in self.rfile:
+                requests.put((time.time() + latency, line))
+            requests.put((0, None))
+            writer.join()
+
+        def reply(self, requests):
+            while True:
+                when, line = requests.get()
+                if line is None:
+                    break
+                time.sleep(max(0, when - time.time()))
+                self.wfile.write(line)
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    dev = EquipmentRecord(connection=ConnectionRecord(
+        address='TCP::127.0.0.1::{}'.format(server.server_address[1]),
+        backend=Backend.MSL,
+        properties={'termination': '\n', 'timeout': 10},
+    )).connect(demo=False)
+
+    messages = ['MEAS{}?'.format(i) for i in range(n)]
+
+    t0 = time.time()
+    for _ in range(repeat):
+        [dev.query(msg) for msg in messages]
+    loop = (time.time() - t0) / repeat
+
+    t0 = time.time()
+    for _ in range(repeat):
+        dev.query_many(messages)
+    many = (time.time() - t0) / repeat
+
+    t0 = time.time()
+    for _ in range(repeat):
+        dev.query_many(messages, separator=';')
+    compound = (time.time() - t0) / repeat
+
+    dev.disconnect()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+    print('latency={} seconds, {} messages'.format(latency, n))
+    print('  query() in a loop:         {:.2f} ms'.format(loop * 1e3))
+    print('  query_many():              {:.2f} ms'.format(many * 1e3))
+    print("  query_many(separator=';'): {:.2f} ms".format(compound * 1e3))
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.002)
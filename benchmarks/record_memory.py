@@ -0,0 +1,95 @@
+"""
+Compare the memory that is used by EquipmentRecord's and ConnectionRecord's
+with the memory that is used by an equivalent object that has a __dict__.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/record_memory.py 100000
+"""
+import sys
+import datetime
+
+from msl.equipment.record_types import EquipmentRecord, ConnectionRecord
+
+
+class DictRecord(object):
+    """The attributes that an EquipmentRecord had when the attributes were stored in a __dict__."""
+
+    def __init__(self, **kwargs):
+        self._alias = kwargs.get('alias', '')
+        self._connection = kwargs.get('connection')
+        self._team = kwargs.get('team', '')
+        self._user_defined = {}
+        self._calibration_cycle = float(kwargs.get('calibration_cycle', 0.0))
+        self._category = kwargs.get('category', '')
+        self._date_calibrated = kwargs.get('date_calibrated', datetime.date(datetime.MINYEAR, 1, 1))
+        self._description = kwargs.get('description', '')
+        self._latest_report_number = kwargs.get('latest_report_number', '')
+        self._location = kwargs.get('location', '')
+        self._manufacturer = kwargs.get('manufacturer', '')
+        self._model = kwargs.get('model', '')
+        self._serial = kwargs.get('serial', '')
+        self._str = 'EquipmentRecord<{}|{}|{}>'.format(self._manufacturer, self._model, self._serial)
+
+
+class DictConnection(object):
+    """The attributes that a ConnectionRecord had when the attributes were stored in a __dict__."""
+
+    def __init__(self, **kwargs):
+        self._interface = 0
+        self._address = kwargs.get('address', '')
+        self._backend = kwargs.get('backend', '')
+        self._manufacturer = kwargs.get('manufacturer', '')
+        self._model = kwargs.get('model', '')
+        self._properties = {}
+        self._serial = kwargs.get('serial', '')
+
+
+def rows(n):
+    # a register has few distinct manufacturers, models, categories, locations and teams
+    # and the text is read from a file, so the same text is a different str object for each row
+    for i in range(n):
+        yield {
+            'manufacturer': ''.join(['Manufacturer ', str(i % 50)]),
+            'model': ''.join(['Model ', str(i % 500)]),
+            'serial': 'SN{:08d}'.format(i),
+            'category': ''.join(['Category ', str(i % 20)]),
+            'location': ''.join(['Lab ', str(i % 30)]),
+            'team': ''.join(['Team ', str(i % 5)]),
+            'description': 'Description of item {}'.format(i),
+            'date_calibrated': datetime.date(2000 + i % 20, 1 + i % 12, 1),
+            'calibration_cycle': 1 + i % 5,
+        }
+
+
+def measure(cls, n, names=None, **extra):
+    import tracemalloc  # requires Python 3.4+
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    if names is None:
+        records = [cls(**dict(row, **extra)) for row in rows(n)]
+    else:
+        records = [cls(**dict(((k, row[k]) for k in names), **extra)) for row in rows(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del records
+    return size
+
+
+def main(n):
+    names = ('manufacturer', 'model', 'serial')
+    results = [
+        ('EquipmentRecord', measure(EquipmentRecord, n), measure(DictRecord, n)),
+        ('ConnectionRecord', measure(ConnectionRecord, n, names=names, address='COM1', backend='MSL'),
+         measure(DictConnection, n, names=names, address='COM1', backend='MSL')),
+    ]
+    print('Memory used by {} records'.format(n))
+    for name, slots, legacy in results:
+        print('  {:<17} {:>8.1f} MB  (with a __dict__: {:.1f} MB, saving {:.0%})'.format(
+            name, slots / 1e6, legacy / 1e6, 1.0 - slots / float(legacy)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
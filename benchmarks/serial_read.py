@@ -0,0 +1,55 @@
+"""
+Measure the time that it takes ConnectionSerial.read() to read many short lines
+from a pseudo-terminal (pty) loopback, which requires a POSIX system.
+
+A thread writes all lines to the master end of the pty, so the input buffer
+of the serial port contains many lines when read() is called.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/serial_read.py 100000
+"""
+import os
+import sys
+import time
+import threading
+
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend
+
+
+def writer(fd, lines):
+    chunk = b''.join(b'line %07d\n' % i for i in range(1000))
+    for _ in range(lines // 1000):
+        os.write(fd, chunk)
+
+
+def main(lines):
+    import pty  # not available on Windows
+
+    master, slave = pty.openpty()
+
+    record = EquipmentRecord(connection=ConnectionRecord(
+        address='ASRL::' + os.ttyname(slave),
+        backend=Backend.MSL,
+        properties={'termination': '\n', 'timeout': 60, 'baud_rate': 115200},
+    ))
+    dev = record.connect(demo=False)
+
+    lines = lines // 1000 * 1000
+    thread = threading.Thread(target=writer, args=(master, lines))
+    t0 = time.time()
+    thread.start()
+    for i in range(lines):
+        dev.read()
+    elapsed = time.time() - t0
+    thread.join()
+    dev.disconnect()
+    os.close(master)
+    os.close(slave)
+
+    print('read {} lines in {:.2f} seconds ({:.2f} us per line)'.format(
+        lines, elapsed, 1e6 * elapsed / lines))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,68 @@
+"""
+Measure the time that it takes ConnectionSocket.read() to read many short lines
+that an echo server streams in one burst.
+
+The server sends all lines as soon as it receives a request, so the receive
+buffer of the connection contains many lines when read() is called.
+
+Run this script to print the results, e.g.,
+
+    python benchmarks/socket_read.py 1000000
+
+The lines are read with a 'buffer_size' (the number of bytes to receive at
+a time) of 4096 and 65536 bytes.
+"""
+import sys
+import time
+import socket
+import threading
+
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend
+
+
+def server(sock):
+    conn, _ = sock.accept()
+    rfile = conn.makefile('rb')
+    for line in rfile:
+        if line.startswith(b'SHUTDOWN'):
+            break
+        n = int(line.split()[1])
+        chunk = b''.join(b'line %07d\n' % i for i in range(1000))
+        for _ in range(n // 1000):
+            conn.sendall(chunk)
+    rfile.close()
+    conn.close()
+    sock.close()
+
+
+def main(lines, buffer_size):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1)
+    thread = threading.Thread(target=server, args=(sock,))
+    thread.start()
+
+    record = EquipmentRecord(connection=ConnectionRecord(
+        address='TCP::127.0.0.1::{}'.format(sock.getsockname()[1]),
+        backend=Backend.MSL,
+        properties={'termination': '\n', 'timeout': 60, 'buffer_size': buffer_size, 'max_read_size': 2**20},
+    ))
+    dev = record.connect(demo=False)
+
+    lines = lines // 1000 * 1000
+    dev.write('STREAM {}'.format(lines))
+    t0 = time.time()
+    for i in range(lines):
+        dev.read()
+    elapsed = time.time() - t0
+    dev.write('SHUTDOWN')
+    dev.disconnect()
+    thread.join()
+
+    print('buffer_size={:<6} read {} lines in {:.2f} seconds ({:.2f} us per line)'.format(
+        buffer_size, lines, elapsed, 1e6 * elapsed / lines))
+
+
+if __name__ == '__main__':
+    for size in (4096, 65536):
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, size)
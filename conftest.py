@@ -0,0 +1,6 @@
+import sys
+
+collect_ignore = []
+if sys.version_info[:2] < (3, 5):
+    # uses the async/await syntax
+    collect_ignore.append('msl/equipment/_asyncio.py')
@@ -8,6 +8,7 @@ from msl.equipment.config import Config
 from msl.equipment.record_types import EquipmentRecord, ConnectionRecord
 from msl.equipment.constants import Backend
 from msl.equipment.exceptions import MSLConnectionError, MSLTimeoutError
+from msl.equipment.pool import ConnectionPool
 from msl.equipment import resources
 
 __author__ = 'Joseph Borbely'
@@ -0,0 +1,107 @@
+"""
+The :mod:`asyncio` implementation of the ``read_async``, ``write_async``
+and ``query_async`` methods of a :class:`~.connection_message_based.ConnectionMessageBased`.
+
+This module requires Python 3.5+. It is only imported when one of these methods is called.
+"""
+import asyncio
+import functools
+
+
+def _get_lock(connection):
+    # the lock that serializes the asynchronous requests of a connection (an
+    # asyncio.Lock must only be used by the event loop that it was created in)
+    loop = asyncio.get_event_loop()
+    if connection._async_lock is None or connection._async_lock[0] is not loop:
+        connection._async_lock = (loop, asyncio.Lock())
+    return connection._async_lock[1]
+
+
+async def executor_call(connection, method, *args):
+    """Call a blocking method of the `connection` in the default executor of the event loop."""
+    async with _get_lock(connection):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, functools.partial(method, *args))
+
+
+class _NonBlocking(object):
+
+    def __init__(self, sock, timeout):
+        """Put the socket in non-blocking mode and then restore the timeout."""
+        self.sock = sock
+        self.timeout = timeout
+
+    def __enter__(self):
+        self.sock.setblocking(False)
+
+    def __exit__(self, *ignore):
+        if self.sock.fileno() != -1:
+            self.sock.settimeout(self.timeout)
+
+
+async def _socket_write(connection, msg):
+    data = connection._encode(msg)
+    sock = connection._socket
+    with _NonBlocking(sock, connection._timeout):
+        if connection._is_stream:
+            await asyncio.get_event_loop().sock_sendall(sock, data)
+        else:
+            # sending a datagram does not block
+            sock.sendto(data, (connection._ip_address, connection._port))
+    return len(data)
+
+
+async def _socket_read(connection, size):
+    if size is not None and size > connection._max_read_size:
+        connection.raise_exception('max_read_size is {} bytes, requesting {} bytes'.format(
+            connection._max_read_size, size)
+        )
+
+    loop = asyncio.get_event_loop()
+    sock = connection._socket
+    with _NonBlocking(sock, connection._timeout):
+        while True:
+            out = connection._read_from_buffer(size)
+            if out is not None:
+                return connection._decode(size, out)
+
+            if hasattr(loop, 'sock_recv_into'):  # Python 3.7+
+                n = await loop.sock_recv_into(sock, connection._buffer_reserve(connection._buffer_size))
+                connection._buffer_end += n
+            else:
+                data = await loop.sock_recv(sock, connection._buffer_size)
+                connection._buffer_extend(data)
+                n = len(data)
+
+            if n == 0 and connection._is_stream:
+                connection.raise_exception('The socket was closed by the equipment')
+
+
+async def _timeout(connection, coro):
+    # the same timeout applies as for the blocking read() and write() methods
+    try:
+        return await asyncio.wait_for(coro, connection._timeout)
+    except asyncio.TimeoutError:
+        pass  # want to raise MSLTimeoutError not asyncio.TimeoutError
+    connection.raise_timeout()
+
+
+async def socket_write(connection, msg):
+    """See :meth:`.ConnectionSocket.write_async`."""
+    async with _get_lock(connection):
+        return await _timeout(connection, _socket_write(connection, msg))
+
+
+async def socket_read(connection, size):
+    """See :meth:`.ConnectionSocket.read_async`."""
+    async with _get_lock(connection):
+        return await _timeout(connection, _socket_read(connection, size))
+
+
+async def socket_query(connection, msg, delay, size):
+    """See :meth:`.ConnectionSocket.query_async`."""
+    async with _get_lock(connection):
+        await _timeout(connection, _socket_write(connection, msg))
+        if delay > 0.0:
+            await asyncio.sleep(delay)
+        return await _timeout(connection, _socket_read(connection, size))
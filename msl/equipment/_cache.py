@@ -0,0 +1,110 @@
+"""
+Read and write the files in the ``<database_cache>`` directory.
+
+The files are pickled, and unpickling a file can execute arbitrary code. Therefore,
+on a POSIX system a file is only loaded if it is owned by the current user and if
+other users cannot modify it. On Windows the permissions are not checked, so the
+``<database_cache>`` directory must only be writable by trusted users.
+"""
+import os
+import stat
+import pickle
+import hashlib
+import tempfile
+
+try:
+    _replace = os.replace
+except AttributeError:  # Python 2
+    _replace = os.rename
+
+
+class OutOfDateError(Exception):
+    """The key of a cache file does not match the expected key."""
+
+
+def cache_path(root, config_path, extension):
+    """Returns the path to a cache file for a configuration file.
+
+    Parameters
+    ----------
+    root : :class:`xml.etree.ElementTree.Element`
+        The root element of the configuration file.
+    config_path : :class:`str`
+        The path to the configuration file.
+    extension : :class:`str`
+        The file extension, e.g., ``'.snapshot'``.
+
+    Returns
+    -------
+    :class:`str` or :data:`None`
+        The path to the file or :data:`None` if there is no ``<database_cache>`` element.
+    """
+    directory = root.findtext('database_cache')
+    if not directory:
+        return None
+    directory = os.path.expanduser(directory.strip())
+    if not os.path.isabs(directory):
+        directory = os.path.join(os.path.dirname(os.path.abspath(config_path)), directory)
+    name = hashlib.sha1(os.path.abspath(config_path).encode('utf-8')).hexdigest()
+    return os.path.join(directory, name + extension)
+
+
+def load(path, key):
+    """Load the object that was saved with :func:`save`.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the cache file.
+    key
+        The key that the object must have been saved with.
+
+    Returns
+    -------
+    The object that was saved.
+
+    Raises
+    ------
+    IOError
+        If the file cannot be read or if the file is not trusted.
+    OutOfDateError
+        If the file was saved with a different key.
+    """
+    with open(path, 'rb') as fp:
+        if hasattr(os, 'getuid'):
+            info = os.fstat(fp.fileno())
+            if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                raise IOError('The file is not owned by the current user or other users can modify it')
+        if pickle.load(fp) != key:
+            raise OutOfDateError()
+        return pickle.load(fp)
+
+
+def save(path, key, obj):
+    """Save an object to a cache file.
+
+    The object is written to a temporary file (in the same directory as `path`)
+    which then replaces `path`, so that another process never reads a partially
+    written file.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the cache file. The directory is created if it does not exist.
+    key
+        The key that :func:`load` must be called with to load the object.
+    obj
+        The object to save.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(key, fp, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(obj, fp, pickle.HIGHEST_PROTOCOL)
+        _replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
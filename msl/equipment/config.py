@@ -2,13 +2,22 @@
 Load an XML :ref:`configuration_file`.
 """
 import os
+import stat
+import pickle
 import logging
 from xml.etree import cElementTree as ET
 
+from . import _cache
 from .database import Database
 
 logger = logging.getLogger(__name__)
 
+# increment if the contents of a compiled-configuration file changes, see Config._save_compiled()
+_COMPILED_VERSION = 1
+
+# the compiled configurations that have been loaded by this process, see Config._compile()
+_compiled = {}
+
 
 class Config(object):
 
@@ -25,7 +34,10 @@ class Config(object):
     """
 
     PATH = []
-    """:class:`list` of :class:`str`: Paths are also appended to :data:`os.environ['PATH'] <os.environ>`."""
+    """:class:`list` of :class:`str`: Paths are also appended to :data:`os.environ['PATH'] <os.environ>`.
+
+    A path is only appended once, even if multiple :class:`Config` objects specify the same path.
+    """
 
     def __init__(self, path):
         """Load an XML :ref:`configuration_file`.
@@ -79,28 +91,37 @@ class Config(object):
         self._path = path
         self._database = None
 
-        element = self._root.find('pyvisa_library')
-        if element is not None:
-            Config.PyVISA_LIBRARY = element.text
+        key = self._compiled_key()
+        compiled = _compiled.get(key)
+        if compiled is None:
+            compiled = self._load_compiled(key)
+            if compiled is None:
+                compiled = self._compile()
+                self._save_compiled(key, compiled)
+            _compiled[key] = compiled
+
+        pyvisa_library, demo_mode, paths = compiled
+        if pyvisa_library is not None:
+            Config.PyVISA_LIBRARY = pyvisa_library
             logger.debug('update Config.PyVISA_LIBRARY = {}'.format(Config.PyVISA_LIBRARY))
 
-        element = self._root.find('demo_mode')
-        if element is not None:
-            Config.DEMO_MODE = element.text.lower() == 'true'
+        if demo_mode is not None:
+            Config.DEMO_MODE = demo_mode
             logger.debug('update Config.DEMO_MODE = {}'.format(Config.DEMO_MODE))
 
-        for element in self._root.findall('path'):
-            if not os.path.isdir(element.text):
-                logger.warning('Not a valid PATH ' + element.text)
-                continue
-            if element.attrib.get('recursive', 'false').lower() == 'true':
-                for root, dirs, files in os.walk(element.text):
-                    Config.PATH.append(root)
-            else:
-                Config.PATH.append(element.text)
+        existing = set(Config.PATH)
+        for p in paths:
+            if p not in existing:
+                Config.PATH.append(p)
+                existing.add(p)
+
+        # only append the paths that are not already in os.environ['PATH']
+        environ = set(os.environ['PATH'].split(os.pathsep))
         for p in Config.PATH:
-            os.environ['PATH'] += os.pathsep + p
-            logger.debug('append Config.PATH %s', p)
+            if p not in environ:
+                os.environ['PATH'] += os.pathsep + p
+                environ.add(p)
+                logger.debug('append Config.PATH %s', p)
 
     @property
     def path(self):
@@ -147,3 +168,84 @@ class Config(object):
         if element is not None:
             return element.text
         return None
+
+    def _compile(self):
+        """Returns the (pyvisa_library, demo_mode, paths) that are specified in the configuration file.
+
+        Finding all sub-folders of a <path recursive="true"> element can take a long time,
+        therefore, the result is cached (see :meth:`_compiled_key`).
+        """
+        element = self._root.find('pyvisa_library')
+        pyvisa_library = None if element is None else element.text
+
+        element = self._root.find('demo_mode')
+        demo_mode = None if element is None else element.text.lower() == 'true'
+
+        paths = []
+        for element in self._root.findall('path'):
+            if not os.path.isdir(element.text):
+                logger.warning('Not a valid PATH ' + element.text)
+                continue
+            if element.attrib.get('recursive', 'false').lower() == 'true':
+                for root, dirs, files in os.walk(element.text):
+                    paths.append(root)
+            else:
+                paths.append(element.text)
+
+        return pyvisa_library, demo_mode, paths
+
+    def _compiled_key(self):
+        """Returns the key that a compiled configuration is valid for.
+
+        The key is the path, modification time and size of the configuration file,
+        the current working directory (a <path> can be a relative path), whether the
+        directory of each <path> element exists and the modification time of the
+        directory of each <path recursive="true"> element. A sub-folder that is created
+        (or removed) in a nested sub-folder does not change the key, the configuration
+        file must be modified for it to be found.
+        """
+        directories = []
+        for element in self._root.findall('path'):
+            recursive = element.attrib.get('recursive', 'false').lower() == 'true'
+            try:
+                info = os.stat(element.text)
+            except (OSError, TypeError):
+                state = None
+            else:
+                state = info.st_mtime if recursive else stat.S_ISDIR(info.st_mode)
+            directories.append((element.text, recursive, state))
+        info = os.stat(self._path)
+        return (_COMPILED_VERSION, os.path.abspath(self._path), info.st_mtime, info.st_size,
+                os.getcwd(), tuple(directories))
+
+    def _load_compiled(self, key):
+        """Load a compiled configuration from a file (returns None if it cannot be loaded or is out of date)"""
+        path = _cache.cache_path(self._root, self._path, '.config')
+        if path is None or not os.path.isfile(path):
+            return None
+
+        try:
+            compiled = _cache.load(path, key)
+        except _cache.OutOfDateError:
+            logger.debug('The compiled configuration {!r} is out of date'.format(path))
+            return None
+        except Exception as e:
+            # the file is corrupt, is not trusted or was created by an incompatible version
+            logger.debug('Cannot load the compiled configuration {!r} -- {}: {}'.format(path, e.__class__.__name__, e))
+            return None
+
+        logger.debug('Loaded the compiled configuration {!r}'.format(path))
+        return compiled
+
+    def _save_compiled(self, key, compiled):
+        """Save a compiled configuration to a file"""
+        path = _cache.cache_path(self._root, self._path, '.config')
+        if path is None:
+            return
+
+        try:
+            _cache.save(path, key, compiled)
+        except (IOError, OSError, pickle.PicklingError) as e:
+            logger.warning('Cannot save the compiled configuration {!r} -- {}'.format(path, e))
+        else:
+            logger.debug('Saved the compiled configuration {!r}'.format(path))
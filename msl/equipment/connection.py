@@ -67,6 +67,20 @@ class Connection(object):
         """
         pass
 
+    def is_alive(self):
+        """Check whether the connection to the equipment is still open.
+
+        This method should be overridden in the subclass if the subclass can
+        determine whether the connection is open. It is the default health check
+        of a :class:`~msl.equipment.pool.ConnectionPool`.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether the connection is open. The base class always returns :data:`True`.
+        """
+        return True
+
     def __repr__(self):
         return self._repr
 
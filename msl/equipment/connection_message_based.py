@@ -1,13 +1,25 @@
 """
 Base class for equipment that use message-based communication.
 """
+import sys
 import time
+import warnings
+
+import numpy as np
 
 from .connection import Connection
 from .exceptions import MSLTimeoutError
 from .constants import LF, CR
 
 
+def _import_asyncio():
+    # the _asyncio module uses the async/await syntax, which requires Python 3.5+
+    if sys.version_info[:2] < (3, 5):
+        raise NotImplementedError('The asynchronous methods require Python 3.5+')
+    from . import _asyncio
+    return _asyncio
+
+
 class ConnectionMessageBased(Connection):
 
     CR = CR
@@ -41,6 +53,14 @@ class ConnectionMessageBased(Connection):
         self._write_termination = ConnectionMessageBased.CR + ConnectionMessageBased.LF
         self._max_read_size = 2 ** 16
         self._timeout = None
+        self._async_lock = None  # (event loop, asyncio.Lock), see the _asyncio module
+
+        # the received bytes that have not been read are self._byte_buffer[self._buffer_start:self._buffer_end]
+        # and the read termination has not been found in self._byte_buffer[:self._buffer_search]
+        self._byte_buffer = bytearray()
+        self._buffer_start = 0
+        self._buffer_end = 0
+        self._buffer_search = 0
 
     @property
     def encoding(self):
@@ -186,6 +206,249 @@ class ConnectionMessageBased(Connection):
             time.sleep(delay)
         return self.read(size)
 
+    def query_many(self, messages, delay=0.0, separator=None):
+        """Write many messages to the equipment and then read all responses.
+
+        Instead of waiting for the response of a message before the next message
+        is written (which is what calling :meth:`query` in a loop does), all
+        messages are written in one write operation and then the responses are read
+        in the same order. The equipment must be able to queue the messages that it
+        receives.
+
+        Parameters
+        ----------
+        messages : :class:`list` of :class:`str`
+            The messages to write to the equipment.
+        delay : :class:`float`, optional
+            The time delay, in seconds, to wait between writing the
+            messages and reading the responses.
+        separator : :class:`str`, optional
+            If the equipment supports compound commands, for example, SCPI
+            allows for ``'MEAS:VOLT?;:MEAS:CURR?'``, then the messages are joined
+            with `separator` and written as one message. The equipment must
+            reply with one response that has the values separated by `separator`.
+            If :data:`None` then each message is terminated by the
+            :attr:`.write_termination` and a response is read for each message.
+
+        Returns
+        -------
+        :class:`list` of :class:`str`
+            The response for each message.
+
+        Raises
+        ------
+        :exc:`~msl.equipment.exceptions.MSLConnectionError`
+            If the number of responses is not equal to the number of messages.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+
+        if separator is not None:
+            self.write(separator.join(messages))
+        else:
+            # write all messages at once, since many small writes to a TCP socket
+            # can be delayed by Nagle's algorithm until the previous write is acknowledged.
+            # Each message is terminated here and write() logs the joined message once
+            self.write(b''.join(self._encode(msg, log=False) for msg in messages))
+
+        if delay > 0.0:
+            time.sleep(delay)
+
+        if separator is not None:
+            replies = self.read().split(separator)
+        else:
+            replies = [self.read() for _ in messages]
+
+        if len(replies) != len(messages):
+            self.raise_exception('received {} responses for {} messages'.format(len(replies), len(messages)))
+        return replies
+
+    def query_ascii_values(self, msg, dtype=float, separator=',', delay=0.0, size=None):
+        """Perform a :meth:`query` and convert the response to an array of numbers.
+
+        The response is converted by :func:`numpy.fromstring`, so a response that
+        contains thousands of values is not parsed value by value in Python.
+        Whitespace (e.g., ``'\\r'``) around each value is ignored.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write to the equipment.
+        dtype : :class:`type` or :class:`numpy.dtype`, optional
+            The data type of each value.
+        separator : :class:`str`, optional
+            The character(s) that separate the values in the response.
+        delay : :class:`float`, optional
+            The time delay, in seconds, to wait between :meth:`write` and
+            :meth:`read` operations.
+        size : :class:`int`, optional
+            The number of bytes to read.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The values in the response.
+
+        Raises
+        ------
+        :exc:`~msl.equipment.exceptions.MSLConnectionError`
+            If the response cannot be converted to numbers.
+        """
+        return self._ascii_values(self.query(msg, delay=delay, size=size), dtype, separator)
+
+    def read_binary_block(self, dtype='B', expect_termination=True):
+        """Read an IEEE 488.2 binary block from the equipment.
+
+        A definite-length block has the format ``#<n><length><data>``, where ``<n>``
+        is the number of digits in ``<length>`` and ``<length>`` is the number of
+        bytes in ``<data>``. The data is read directly into the returned array, it is
+        not decoded to a :class:`str`. The :attr:`.max_read_size` does not apply to
+        the data of a definite-length block. Any bytes that are received before the
+        ``#`` character are ignored.
+
+        An indefinite-length block, ``#0<data>``, is not supported. The end of the data
+        is signalled by the END message (e.g., the EOI line of GPIB) which a socket or a
+        serial port cannot detect, and a :attr:`.read_termination` character could be
+        part of the data.
+
+        Parameters
+        ----------
+        dtype : :class:`str` or :class:`numpy.dtype`, optional
+            The data type of each value in the block, including the byte order,
+            e.g., ``'>f4'`` for big-endian, single-precision floating-point numbers.
+        expect_termination : :class:`bool`, optional
+            Whether the :attr:`.read_termination` characters are sent after the
+            data of a definite-length block. If :data:`True` then they are read
+            (and removed from the receive buffer) after the data.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The values in the block.
+        """
+        dtype = np.dtype(dtype)
+
+        skipped = 0
+        while self._read_raw(1) != b'#':
+            skipped += 1
+            if skipped > self._max_read_size:
+                self.raise_exception('Cannot find the # character of a binary block '
+                                     'in {} bytes'.format(skipped))
+
+        digits = self._read_raw(1)
+        if not digits.isdigit():
+            self.raise_exception('Invalid binary block header #{!r}'.format(bytes(digits)))
+
+        n = int(digits)
+        if n == 0:
+            self.raise_exception('An indefinite-length binary block, #0, is not supported '
+                                 '(the data could contain the read termination characters)')
+
+        length = self._read_raw(n)
+        if not length.isdigit():
+            self.raise_exception('Invalid binary block header #{}{!r}'.format(n, bytes(length)))
+        data = np.empty(int(length), dtype=np.uint8)
+        self._read_into(memoryview(data))
+        if expect_termination and self._read_termination:
+            trailing = self._read_raw(None)
+            if trailing.strip():
+                self.raise_exception('Received {!r} after the binary block'.format(bytes(trailing)))
+
+        self.log_debug('{}.read_binary_block() -> {} bytes'.format(self, data.size))
+        if data.size % dtype.itemsize:
+            self.raise_exception('The binary block has {} bytes which is not a multiple of '
+                                 'the item size of {!r}'.format(data.size, dtype))
+        return data.view(dtype)
+
+    def query_binary_values(self, msg, dtype='B', delay=0.0, expect_termination=True):
+        """Perform a :meth:`write` followed by a :meth:`read_binary_block`.
+
+        For example, ``query_binary_values('CURV?', dtype='>i2')`` returns a waveform
+        from an oscilloscope without converting the values to and from text.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write to the equipment.
+        dtype : :class:`str` or :class:`numpy.dtype`, optional
+            The data type of each value in the block. See :meth:`read_binary_block`.
+        delay : :class:`float`, optional
+            The time delay, in seconds, to wait between :meth:`write` and
+            :meth:`read_binary_block` operations.
+        expect_termination : :class:`bool`, optional
+            See :meth:`read_binary_block`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The values in the block.
+        """
+        self.write(msg)
+        if delay > 0.0:
+            time.sleep(delay)
+        return self.read_binary_block(dtype=dtype, expect_termination=expect_termination)
+
+    def read_async(self, size=None):
+        """Read the response from the equipment using :mod:`asyncio`.
+
+        The blocking :meth:`read` is called in the default executor of the
+        event loop. A subclass may override this method if the communication
+        system supports non-blocking I/O. Requires Python 3.5+.
+
+        Parameters
+        ----------
+        size : :class:`int`, optional
+            The number of bytes to read.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the response (as a :class:`str`) from the equipment.
+        """
+        return _import_asyncio().executor_call(self, self.read, size)
+
+    def write_async(self, msg):
+        """Write a message to the equipment using :mod:`asyncio`.
+
+        The blocking :meth:`write` is called in the default executor of the
+        event loop. A subclass may override this method if the communication
+        system supports non-blocking I/O. Requires Python 3.5+.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write to the equipment.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the number of bytes written.
+        """
+        return _import_asyncio().executor_call(self, self.write, msg)
+
+    def query_async(self, msg, delay=0.0, size=None):
+        """Perform :meth:`write_async` followed by :meth:`read_async`.
+
+        No other asynchronous request can use this connection until
+        the reply has been read. Requires Python 3.5+.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write to the equipment.
+        delay : :class:`float`, optional
+            The time delay, in seconds, to wait between the write and read operations.
+        size : :class:`int`, optional
+            The number of bytes to read.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the response (as a :class:`str`) from the equipment.
+        """
+        return _import_asyncio().executor_call(self, self.query, msg, delay, size)
+
     def _set_timeout_value(self, value):
         # convenience method for setting the timeout value
         if value is not None:
@@ -204,7 +467,7 @@ class ConnectionMessageBased(Connection):
         except AttributeError:
             return termination  # `termination` is already encoded
 
-    def _encode(self, message):
+    def _encode(self, message, log=True):
         # convenience method for preparing the message for a write operation
         if isinstance(message, bytes):
             data = message
@@ -212,7 +475,8 @@ class ConnectionMessageBased(Connection):
             data = message.encode(encoding=self._encoding, errors=self._encoding_errors)
         if self._write_termination is not None and not data.endswith(self._write_termination):
             data += self._write_termination
-        self.log_debug('{}.write({!r})'.format(self, data))
+        if log:
+            self.log_debug('{}.write({!r})'.format(self, data))
         return data
 
     def _decode(self, size, message):
@@ -222,3 +486,85 @@ class ConnectionMessageBased(Connection):
         else:
             self.log_debug('{}.read({}) -> {!r}'.format(self, size, message))
         return message.decode(encoding=self._encoding, errors=self._encoding_errors)
+
+    def _ascii_values(self, message, dtype, separator):
+        # convenience method for converting a message to an array of numbers
+        error = False
+        with warnings.catch_warnings():
+            # older versions of numpy emit a DeprecationWarning (instead of
+            # raising ValueError) and return the values that were converted
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                values = np.fromstring(message, dtype=dtype, sep=separator)
+            except (ValueError, DeprecationWarning):
+                error = True  # want to raise MSLConnectionError
+
+        if error:
+            self.raise_exception('Cannot convert {!r} to an array of {} values separated by {!r}'.format(
+                message, np.dtype(dtype), separator)
+            )
+        return values
+
+    def _read_raw(self, size):
+        # read a message without decoding it, the subclass must override this method
+        raise NotImplementedError
+
+    def _read_into(self, view):
+        # read exactly len(view) bytes into the memoryview, the subclass must override this method
+        raise NotImplementedError
+
+    def _buffer_take(self, view):
+        # copy the bytes from the byte buffer into the memoryview, returns the number of bytes copied
+        start = self._buffer_start
+        n = min(len(view), self._buffer_end - start)
+        if n > 0:
+            view[:n] = memoryview(self._byte_buffer)[start:start + n]
+            self._buffer_start = start + n
+            if self._buffer_start == self._buffer_end:
+                self._buffer_start = self._buffer_end = self._buffer_search = 0
+        return n
+
+    def _read_from_buffer(self, size):
+        # returns the message from the byte buffer (or None if the message is not complete yet)
+        buffer, start, end = self._byte_buffer, self._buffer_start, self._buffer_end
+        out = None
+        if size is not None:
+            if end - start >= size:
+                out = buffer[start:start + size]
+                self._buffer_start = start + size
+        elif self._read_termination:
+            term = self._read_termination
+            index = buffer.find(term, max(start, self._buffer_search), end)
+            if index == -1:
+                # resume the search where it stopped (the termination may be split between two receives)
+                self._buffer_search = max(start, end - len(term) + 1)
+            else:
+                out = buffer[start:index]
+                self._buffer_start = index + len(term)
+
+        if self._buffer_start == end:
+            self._buffer_start = self._buffer_end = self._buffer_search = 0
+        elif out is None and end - start > self._max_read_size:
+            self.raise_exception('len(byte_buffer) [{}] > max_read_size [{}]'.format(
+                end - start, self._max_read_size)
+            )
+        return out
+
+    def _buffer_reserve(self, size):
+        # returns a memoryview of `size` bytes of free space at the end of the byte buffer
+        buffer, start, end = self._byte_buffer, self._buffer_start, self._buffer_end
+        if len(buffer) - end < size:
+            if start > 0:
+                # move the bytes that have not been read to the beginning of the buffer
+                buffer[:end - start] = buffer[start:end]
+                self._buffer_search = max(0, self._buffer_search - start)
+                self._buffer_start, self._buffer_end = 0, end - start
+            if len(buffer) - self._buffer_end < size:
+                buffer.extend(bytearray(self._buffer_end + size - len(buffer)))
+        return memoryview(buffer)[self._buffer_end:self._buffer_end + size]
+
+    def _buffer_extend(self, data):
+        # append the received data to the byte buffer
+        n = len(data)
+        self._buffer_reserve(n)[:] = data
+        self._buffer_end += n
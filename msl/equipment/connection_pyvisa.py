@@ -108,6 +108,16 @@ class ConnectionPyVISA(Connection):
             self.log_debug('Disconnected from {}'.format(self.equipment_record.connection))
             self._resource = None
 
+    def is_alive(self):
+        """Check whether the PyVISA resource is still open.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether :meth:`disconnect` has not been called.
+        """
+        return self._resource is not None
+
     @staticmethod
     def resource_manager(visa_library=None):
         """Return the PyVISA_ :class:`~pyvisa.highlevel.ResourceManager`.
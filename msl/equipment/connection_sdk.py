@@ -1,10 +1,41 @@
 """
 Base class for equipment that use the SDK provided by the manufacturer for the connection.
 """
+import os
+import sys
+import ctypes
+import threading
+
 from msl.loadlib import LoadLibrary
 
 from .connection import Connection
 
+# the libraries that have been loaded by this process, the key is (path, libtype, where to search)
+_libraries = {}
+
+# the function prototypes for each (library path, libtype, key) of ConnectionSDK.set_function_prototypes()
+_prototypes = {}
+
+_cache_lock = threading.Lock()
+
+
+def _load_library(path, libtype):
+    """Load a library (or get the library from the cache if it has already been loaded).
+
+    The same :class:`~msl.loadlib.load_library.LoadLibrary` object is returned for
+    the same `path` and `libtype`, provided that the current working directory,
+    :data:`sys.path` and the ``PATH`` environment variable (which are used to find
+    the library) have not changed.
+    """
+    key = (path, libtype, os.getcwd(), tuple(sys.path), os.environ.get('PATH', ''))
+    with _cache_lock:
+        lib = _libraries.get(key)
+    if lib is None:
+        lib = LoadLibrary(path, libtype)
+        with _cache_lock:
+            lib = _libraries.setdefault(key, lib)
+    return lib
+
 
 class ConnectionSDK(Connection):
 
@@ -44,9 +75,14 @@ class ConnectionSDK(Connection):
         if path is None:
             path = record.connection.address[5:]  # the address starts with 'SDK::'
 
-        self._lib = LoadLibrary(path, libtype)
+        # the library is loaded once per process and shared by all connections
+        self._lib = _load_library(path, libtype)
         self._path = self._lib.path
         self._sdk = self._lib.lib
+        if isinstance(self._sdk, ctypes.CDLL):
+            # each connection uses its own ctypes object (without loading the library again)
+            # so that the errcheck of a function refers to this connection
+            self._sdk = self._sdk.__class__(self._sdk._name, handle=self._sdk._handle)
         self._assembly = self._lib.assembly
         self._gateway = self._lib.gateway
 
@@ -72,6 +108,69 @@ class ConnectionSDK(Connection):
         """:attr:`~msl.loadlib.load_library.LoadLibrary.lib`: The reference to the SDK object."""
         return self._sdk
 
+    def set_function_prototypes(self, functions, key=None, strict=True):
+        """Set the :attr:`~ctypes._FuncPtr.restype`, :attr:`~ctypes._FuncPtr.argtypes` and
+        :attr:`~ctypes._FuncPtr.errcheck` of the functions in a ctypes SDK.
+
+        The prototypes of the functions are created for the first connection that
+        uses the SDK and then the prototypes are reused by subsequent connections.
+
+        Parameters
+        ----------
+        functions : iterable
+            Each item is a (name, restype, errcheck, argtypes) :class:`tuple`, where
+            `errcheck` is the name of a method of this class (or :data:`None`) and
+            `argtypes` is a :class:`list` of ctypes data types. The `functions` are
+            only iterated over for the first connection (so a generator expression
+            can be used).
+        key
+            A hashable object that identifies the `functions`.
+            Default is the class of this connection.
+        strict : :class:`bool`, optional
+            Whether to raise an :exc:`AttributeError` if the SDK does
+            not contain a function. If :data:`False` then the function
+            is skipped and a debug message is logged.
+
+        Returns
+        -------
+        :class:`dict`
+            The SDK functions, with the function names as the keys.
+        """
+        if not isinstance(self._sdk, ctypes.CDLL):
+            raise TypeError('Function prototypes can only be set for a ctypes library')
+
+        if key is None:
+            key = self.__class__
+        key = (self._path, self._sdk.__class__, key)
+
+        with _cache_lock:
+            prototypes = _prototypes.get(key)
+        if prototypes is None:
+            if sys.platform == 'win32' and isinstance(self._sdk, (ctypes.WinDLL, ctypes.OleDLL)):
+                factory = ctypes.WINFUNCTYPE
+            else:
+                factory = ctypes.CFUNCTYPE
+            prototypes = [(name, factory(restype, *argtypes), errcheck)
+                          for name, restype, errcheck, argtypes in functions]
+            with _cache_lock:
+                prototypes = _prototypes.setdefault(key, prototypes)
+
+        funcs = {}
+        for name, prototype, errcheck in prototypes:
+            try:
+                func = prototype((name, self._sdk))
+            except AttributeError as e:
+                if strict:
+                    raise
+                self.log_debug('{0} {1}'.format(self, e))
+                continue
+            func.__name__ = name
+            if errcheck is not None:
+                func.errcheck = getattr(self, errcheck)
+            setattr(self._sdk, name, func)
+            funcs[name] = func
+        return funcs
+
     def log_errcheck(self, result, func, arguments):
         """Convenience method for logging an :attr:`~ctypes._FuncPtr.errcheck`"""
         self.log_debug('{}.{}{} -> {}'.format(self.__class__.__name__, func.__name__, arguments, result))
@@ -177,6 +177,19 @@ class ConnectionSerial(ConnectionMessageBased):
         else:
             self.log_debug('Disconnected from {}'.format(self.equipment_record.connection))
 
+    def is_alive(self):
+        """Check whether the serial port is still open.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether the serial port is open.
+        """
+        try:
+            return self._serial.is_open
+        except AttributeError:
+            return False
+
     def write(self, msg):
         """Write a message over the serial port.
 
@@ -199,7 +212,7 @@ class ConnectionSerial(ConnectionMessageBased):
         Parameters
         ----------
         size : :class:`int`, optional
-            The number of bytes to read. If `size` is :data:`None` then read until:
+            The number of bytes to read. If `size` is :data:`None` (or 0) then read until:
 
             1. :attr:`.read_termination` characters are read
                (only if :attr:`.read_termination` is not :data:`None`)
@@ -215,32 +228,52 @@ class ConnectionSerial(ConnectionMessageBased):
         :class:`str`
             The message from the serial port.
         """
-        if size:
-            if size > self._max_read_size:
-                self.raise_exception('max_read_size is {} bytes, requesting {} bytes'.format(
-                    self._max_read_size, size)
-                )
-
-            out = self._serial.read(size)
-            if len(out) != size:
-                self.raise_exception('received {} bytes, requested {} bytes'.format(len(out), size))
-
-        else:
-            t0 = time.time()
-            out = bytearray()
-            while True:
-                out.extend(self._serial.read(1))
-
-                if self._read_termination and out.endswith(self._read_termination):
-                    out = out[:-len(self._read_termination)]
-                    break
-
-                if len(out) > self._max_read_size:
-                    self.raise_exception('len(bytes_read) [{}] > max_read_size [{}]'.format(
-                        len(out), self._max_read_size)
+        return self._decode(size, self._read_raw(size))
+
+    def _read_raw(self, size):
+        # read a message without decoding it, see read()
+        if not size:
+            size = None  # size=0 has always meant read until the termination character(s)
+        if size is not None and size > self._max_read_size:
+            self.raise_exception('max_read_size is {} bytes, requesting {} bytes'.format(
+                self._max_read_size, size)
+            )
+
+        t0 = time.time()
+        while True:
+
+            out = self._read_from_buffer(size)
+            if out is not None:
+                break
+
+            if size is not None:
+                # the serial port waits (up to the timeout) for the remaining bytes
+                remaining = size - (self._buffer_end - self._buffer_start)
+                data = self._serial.read(remaining)
+                if len(data) != remaining:
+                    # discard the bytes that were received
+                    self._buffer_start = self._buffer_end = self._buffer_search = 0
+                    self.raise_exception('received {} bytes, requested {} bytes'.format(
+                        size - remaining + len(data), size)
                     )
-
-                if self._timeout and time.time() - t0 >= self._timeout:
-                    self.raise_timeout()
-
-        return self._decode(size, out)
+                self._buffer_extend(data)
+                continue
+
+            # read all bytes that are waiting in the input buffer of the serial port
+            # (or wait, up to the timeout, for the next byte to arrive)
+            data = self._serial.read(max(1, self._serial.in_waiting))
+            self._buffer_extend(data)
+
+            if not data or (self._timeout and time.time() - t0 >= self._timeout):
+                self.raise_timeout()
+
+        return out
+
+    def _read_into(self, view):
+        # fill the memoryview with the buffered bytes and then with the bytes from the serial port
+        n = self._buffer_take(view)
+        if n < len(view):
+            data = self._serial.read(len(view) - n)
+            if n + len(data) != len(view):
+                self.raise_exception('received {} bytes, requested {} bytes'.format(n + len(data), len(view)))
+            view[n:] = data
@@ -5,6 +5,7 @@ import time
 import socket
 
 from .connection_message_based import ConnectionMessageBased
+from .connection_message_based import _import_asyncio
 
 
 class ConnectionSocket(ConnectionMessageBased):
@@ -50,9 +51,6 @@ class ConnectionSocket(ConnectionMessageBased):
         super(ConnectionSocket, self).__init__(record)
 
         self._socket = None
-        self._byte_buffer = bytearray()
-
-        # TODO consider using the `select` module for asynchronous I/O behaviour
 
         props = record.connection.properties
 
@@ -136,8 +134,16 @@ class ConnectionSocket(ConnectionMessageBased):
 
     @property
     def byte_buffer(self):
-        """:class:`bytearray`: Returns the reference to the byte buffer."""
-        return self._byte_buffer
+        """:class:`bytearray`: Returns a copy of the bytes that have been received but not read.
+
+        Modifying the returned :class:`bytearray` does not modify the bytes that
+        are buffered. Use :meth:`clear_byte_buffer` to discard the buffered bytes.
+        """
+        return self._byte_buffer[self._buffer_start:self._buffer_end]
+
+    def clear_byte_buffer(self):
+        """Discard the bytes that have been received but not read."""
+        self._buffer_start = self._buffer_end = self._buffer_search = 0
 
     @property
     def port(self):
@@ -161,6 +167,16 @@ class ConnectionSocket(ConnectionMessageBased):
             self.log_debug('Disconnected from {}'.format(self.equipment_record.connection))
             self._socket = None
 
+    def is_alive(self):
+        """Check whether the socket is still open.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether :meth:`disconnect` has not been called.
+        """
+        return self._socket is not None
+
     def write(self, msg):
         """Write the given message over the socket.
 
@@ -190,6 +206,63 @@ class ConnectionSocket(ConnectionMessageBased):
 
         return len(data)
 
+    def write_async(self, msg):
+        """Write the given message over the socket using :mod:`asyncio`.
+
+        The socket is not blocked while the event loop waits to send the data, so one
+        event loop can communicate with many equipment concurrently. Requires Python 3.5+.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the number of bytes sent over the socket.
+        """
+        return _import_asyncio().socket_write(self, msg)
+
+    def read_async(self, size=None):
+        """Read a message from the socket using :mod:`asyncio`.
+
+        See :meth:`.read` for more details.
+
+        Parameters
+        ----------
+        size : :class:`int`, optional
+            The number of bytes to read.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the message (as a :class:`str`) from the socket.
+        """
+        return _import_asyncio().socket_read(self, size)
+
+    def query_async(self, msg, delay=0.0, size=None):
+        """Perform :meth:`write_async` followed by :meth:`read_async`.
+
+        No other asynchronous :meth:`read_async` or :meth:`write_async` request can
+        use this socket until the reply has been read.
+
+        Parameters
+        ----------
+        msg : :class:`str`
+            The message to write.
+        delay : :class:`float`, optional
+            The time delay, in seconds, to wait between the write and read operations.
+        size : :class:`int`, optional
+            The number of bytes to read.
+
+        Returns
+        -------
+        :ref:`coroutine <coroutine>`
+            Await the coroutine to get the reply (as a :class:`str`) from the equipment.
+        """
+        return _import_asyncio().socket_query(self, msg, delay, size)
+
     def read(self, size=None):
         """Read a message from the socket.
 
@@ -212,6 +285,10 @@ class ConnectionSocket(ConnectionMessageBased):
         :class:`str`
             The message from the socket.
         """
+        return self._decode(size, self._read_raw(size))
+
+    def _read_raw(self, size):
+        # read a message without decoding it, see read()
         if size is not None and size > self._max_read_size:
             self.raise_exception('max_read_size is {} bytes, requesting {} bytes'.format(
                 self._max_read_size, size)
@@ -221,36 +298,47 @@ class ConnectionSocket(ConnectionMessageBased):
         timeout_error = False
         while True:
 
-            if size is not None:
-                if len(self._byte_buffer) >= size:
-                    out = self._byte_buffer[:size]
-                    self._byte_buffer = self._byte_buffer[size:]
-                    break
-
-            elif self._read_termination:
-                index = self._byte_buffer.find(self._read_termination)
-                if not index == -1:
-                    out = self._byte_buffer[:index]
-                    index += len(self._read_termination)
-                    self._byte_buffer = self._byte_buffer[index:]
-                    break
+            out = self._read_from_buffer(size)
+            if out is not None:
+                break
 
             try:
                 if self._is_stream:
-                    data = self._socket.recv(self._buffer_size)
+                    n = self._socket.recv_into(self._buffer_reserve(self._buffer_size))
                 else:
-                    data, _ = self._socket.recvfrom(self._buffer_size)
+                    n, _ = self._socket.recvfrom_into(self._buffer_reserve(self._buffer_size))
             except socket.timeout:
                 timeout_error = True  # want to raise MSLTimeoutError not socket.timeout
             else:
-                self._byte_buffer.extend(data)
-
-            if len(self._byte_buffer) > self._max_read_size:
-                self.raise_exception('len(byte_buffer) [{}] > max_read_size [{}]'.format(
-                    len(self._byte_buffer), self._max_read_size)
-                )
+                self._buffer_end += n
 
             if timeout_error or (self._timeout and (time.time() - t0 > self._timeout)):
                 self.raise_timeout()
 
-        return self._decode(size, out)
+        return out
+
+    def _read_into(self, view):
+        # fill the memoryview with the buffered bytes and then directly from the socket
+        n = self._buffer_take(view)
+        if n == len(view):
+            return
+
+        if not self._is_stream:
+            # a datagram is truncated if it is larger than the memoryview, so use the byte buffer
+            view[n:] = self._read_raw(len(view) - n)
+            return
+
+        t0 = time.time()
+        timeout_error = False
+        while n < len(view):
+            try:
+                received = self._socket.recv_into(view[n:])
+            except socket.timeout:
+                timeout_error = True  # want to raise MSLTimeoutError not socket.timeout
+            else:
+                if received == 0:
+                    self.raise_exception('The socket was closed by the equipment')
+                n += received
+
+            if timeout_error or (self._timeout and (time.time() - t0 > self._timeout)):
+                self.raise_timeout()
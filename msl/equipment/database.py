@@ -2,16 +2,28 @@
 Load equipment and connection records from :ref:`Databases <database>`.
 """
 from __future__ import unicode_literals
+import io
 import os
 import re
-import codecs
+import sys
+import csv
+import bisect
+import pickle
+import sqlite3
+import hashlib
 import logging
 import datetime
+import threading
+from collections import OrderedDict
 from xml.etree import cElementTree as ET
 
 import xlrd
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from . import constants
+from . import _cache
 from .record_types import (
     EquipmentRecord,
     ConnectionRecord,
@@ -23,9 +35,740 @@ from .utils import (
 
 logger = logging.getLogger(__name__)
 
+# the regex patterns that have been compiled by Database.records() and Database.connections()
+_regex_cache = {}
+_REGEX_CACHE_MAXSIZE = 1024
+
+# increment if the contents of a snapshot file changes, see Database._save_snapshot()
+_SNAPSHOT_VERSION = 4
+
+# matches a regex pattern of the form ^text$ where "text" does not contain special characters
+_exact_regex = re.compile(r'\^([^.^$*+?{}\[\]\\|()]*)\$\Z')
+
+# matches a regex pattern of the form ^text where "text" does not contain special characters
+_prefix_regex = re.compile(r'\^([^.^$*+?{}\[\]\\|()]+)\Z')
+
+# matches a regex pattern that does not contain special characters (a substring search)
+_literal_regex = re.compile(r'[^.^$*+?{}\[\]\\|()\n]+\Z')
+
+
+def _file_signature(path):
+    """Returns the (path, modification time, size, SHA-1 hash) of a file."""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(2 ** 20), b''):
+            sha1.update(chunk)
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime, stat.st_size, sha1.hexdigest()
+
+
+def _update_record(record, other):
+    """Update the attributes of `record` (in place) to be the attributes of `other`."""
+    for name in record.__slots__:
+        setattr(record, name, getattr(other, name))
+
+
+def _equipment_state(record):
+    """Returns the values of an EquipmentRecord that are read from a database."""
+    state = record.to_dict()
+    del state['alias']
+    return state
+
+
+def _add_months(dates, months):
+    """Add a number of months to each date.
+
+    The same as adding a :class:`~dateutil.relativedelta.relativedelta` to a date, i.e.,
+    the day is clipped to be the last day of the month if the month is too short.
+
+    Parameters
+    ----------
+    dates : :class:`numpy.ndarray`
+        A datetime64[D] array.
+    months : :class:`numpy.ndarray`
+        An integer array of the number of months to add to each date.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A datetime64[D] array.
+    """
+    start = dates.astype('datetime64[M]')
+    day = (dates - start.astype('datetime64[D]')).astype(np.int64)
+    month = start + months.astype('timedelta64[M]')
+    first = month.astype('datetime64[D]')
+    days_in_month = ((month + 1).astype('datetime64[D]') - first).astype(np.int64)
+    return first + np.minimum(day, days_in_month - 1).astype('timedelta64[D]')
+
+
+def _compile(pattern, flags):
+    """Returns the compiled regex `pattern` (from a cache if it was already compiled)."""
+    key = (pattern, flags)
+    try:
+        return _regex_cache[key]
+    except KeyError:
+        pass
+    if len(_regex_cache) >= _REGEX_CACHE_MAXSIZE:
+        _regex_cache.clear()
+    regex = re.compile(pattern, flags)
+    _regex_cache[key] = regex
+    return regex
+
+
+def _read_file(path, sheet_name, encoding, config_path, reader=None):
+    """Read any allowed database file type.
+
+    This is a module-level function so that it can be called in another process.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xls', '.xlsx'):
+        try:
+            read_excel = _EXCEL_READERS[(reader or 'xlrd').lower()]
+        except KeyError:
+            raise IOError('Invalid Excel reader {!r} for {}\nThe reader must be one of: {}'
+                          .format(reader, path, ', '.join(sorted(_EXCEL_READERS))))
+        return read_excel(path, sheet_name, encoding, config_path)
+    elif ext in ('.csv', '.txt'):
+        delimiter = ',' if ext == '.csv' else '\t'
+        return _read_text_based(path, delimiter, encoding or 'utf-8')
+    elif ext in _SQLITE_EXTENSIONS:
+        return _read_sqlite(path, sheet_name, config_path)
+    raise IOError('Unsupported equipment-registry database format ' + path)
+
+
+def _get_sheet_name(names, sheet_name, path, config_path):
+    """Returns the name of the Sheet to read in an Excel database"""
+    if sheet_name is None:
+        if len(names) > 1:
+            msg = 'Cannot read the equipment register.\n' \
+                  'More than one Sheet is available in {dbase}\n' \
+                  'You must create a <sheet></sheet> element in {config}\n' \
+                  'The text between the "sheet" tag must be one of: {sheets}\n' \
+                  'For example,\n\t<path>{dbase}</path>\n\t<sheet>{first}</sheet>' \
+                .format(dbase=path, config=config_path, sheets=', '.join(names), first=names[0])
+            raise IOError(msg)
+        return names[0]
+    if sheet_name not in names:
+        raise IOError('There is no Sheet named {!r} in {}'.format(sheet_name, path))
+    return sheet_name
+
+
+def _read_excel(path, sheet_name, encoding, config_path):
+    """Read an Excel database file using xlrd"""
+    book = xlrd.open_workbook(path, on_demand=True, encoding_override=encoding)
+    sheet_name = _get_sheet_name(book.sheet_names(), sheet_name, path, config_path)
+    sheet = book.sheet_by_name(sheet_name)
+    header = [val for val in sheet.row_values(0)]
+    logger.debug('Loading Sheet <{}> in {!r}'.format(sheet_name, path))
+    return header, _iter_excel_rows(sheet, book.datemode)
+
+
+def _iter_excel_rows(sheet, datemode):
+    """Yields the converted cell values of each row in an Excel Sheet (excluding the header).
+
+    The values and types of :data:`_EXCEL_CHUNK_SIZE` rows of a column are extracted and
+    converted at once, which avoids creating a :class:`xlrd.sheet.Cell` for every cell in
+    the Sheet and only converts the rows that are requested.
+    """
+    converted = [{} for _ in range(sheet.ncols)]
+    for start in range(1, sheet.nrows, _EXCEL_CHUNK_SIZE):
+        end = min(start + _EXCEL_CHUNK_SIZE, sheet.nrows)
+        columns = [_convert_column(sheet.col_values(c, start, end), sheet.col_types(c, start, end),
+                                   datemode, converted[c]) for c in range(sheet.ncols)]
+        for row in zip(*columns):
+            yield list(row)
+
+
+def _convert_column(values, types, datemode, converted):
+    """Convert the values in a column of an Excel Sheet to the appropriate value and data type.
+
+    The `converted` :class:`dict` contains the values that have already been converted
+    since the same number or date is typically repeated many times in a column.
+    """
+    if _TEXT_CELL_TYPES.issuperset(types):
+        return [value.strip() for value in values]
+
+    column = []
+    for key in zip(types, values):
+        try:
+            column.append(converted[key])
+        except KeyError:
+            value = converted[key] = _cell_convert(key[1], key[0], datemode)
+            column.append(value)
+    return column
+
+
+def _cell_convert(value, ctype, datemode):
+    """Convert the value of an Excel cell to the appropriate value and data type"""
+    if ctype == xlrd.XL_CELL_NUMBER or ctype == xlrd.XL_CELL_BOOLEAN:
+        if int(value) == value:
+            return '{}'.format(int(value))
+        else:
+            return '{}'.format(value)
+    elif ctype == xlrd.XL_CELL_DATE:
+        date = xlrd.xldate_as_tuple(value, datemode)
+        return datetime.date(date[0], date[1], date[2])
+    elif ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code[value]
+    else:
+        return value.strip()
+
+
+def _read_excel_openpyxl(path, sheet_name, encoding, config_path):
+    """Read an .xlsx database file using openpyxl in read-only (streaming) mode"""
+    try:
+        import openpyxl  # imported here since it takes a long time to import openpyxl
+    except ImportError:
+        raise ImportError('openpyxl is not installed. Run: pip install openpyxl')
+    if os.path.splitext(path)[1].lower() != '.xlsx':
+        raise IOError('The openpyxl reader only supports .xlsx files, ' + path)
+
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet_name = _get_sheet_name(book.sheetnames, sheet_name, path, config_path)
+        rows = book[sheet_name].iter_rows(values_only=True)
+        header = [_openpyxl_convert(val) for val in next(rows, ())]
+        while header and not header[-1]:
+            # openpyxl includes the formatted (but empty) cells in the dimensions of a Sheet
+            header.pop()
+    except Exception:
+        book.close()
+        raise
+    logger.debug('Loading Sheet <{}> in {!r}'.format(sheet_name, path))
+    return header, _iter_openpyxl_rows(book, rows, len(header))
+
+
+def _iter_openpyxl_rows(book, rows, ncols):
+    """Yields the converted cell values of each row from openpyxl (excluding the header)"""
+    try:
+        for row in rows:
+            values = [_openpyxl_convert(val) for val in row[:ncols]]
+            if len(values) < ncols:
+                values.extend([''] * (ncols - len(values)))
+            yield values
+    finally:
+        book.close()
+
+
+def _openpyxl_convert(value):
+    """Convert the value of an openpyxl cell to be the same as :func:`_cell_convert`"""
+    if value is None:
+        return ''
+    elif isinstance(value, datetime.datetime):
+        return value.date()
+    elif isinstance(value, datetime.date):
+        return value
+    elif isinstance(value, (bool, int, float)):
+        if int(value) == value:
+            return '{}'.format(int(value))
+        else:
+            return '{}'.format(value)
+    else:
+        return '{}'.format(value).strip()
+
+
+# the file extensions of a SQLite database
+_SQLITE_EXTENSIONS = ('.sqlite3', '.sqlite', '.db')
+
+_TEXT_CELL_TYPES = frozenset((xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_TEXT, xlrd.XL_CELL_BLANK))
+
+# the number of rows in an Excel Sheet that are converted at once, see _iter_excel_rows()
+_EXCEL_CHUNK_SIZE = 1024
+
+# the backends that can read an Excel database (the "reader" attribute of an XML element)
+_EXCEL_READERS = {
+    'xlrd': _read_excel,
+    'openpyxl': _read_excel_openpyxl,
+}
+
+
+def _read_text_based(path, delimiter, encoding):
+    """Read a text-based database file"""
+    with io.open(path, 'rt', encoding=encoding, newline='') as fp:
+        header = next(_csv_reader(fp, delimiter), [])
+    logger.debug('Loading database ' + path)
+    return header, _iter_text_rows(path, delimiter, encoding)
+
+
+def _iter_text_rows(path, delimiter, encoding):
+    """Yields the values of each row in a text-based database file (excluding the header)"""
+    with io.open(path, 'rt', encoding=encoding, newline='') as fp:
+        reader = _csv_reader(fp, delimiter)
+        next(reader, None)
+        for row in reader:
+            if len(row) > 1 or (row and row[0].strip()):
+                yield [val.strip() for val in row]
+
+
+if sys.version_info.major == 2:
+    def _csv_reader(fp, delimiter):
+        """The csv module in Python 2 does not support unicode so the rows are encoded/decoded as UTF-8"""
+        reader = csv.reader((line.encode('utf-8') for line in fp), delimiter=str(delimiter))
+        return ([val.decode('utf-8') for val in row] for row in reader)
+else:
+    def _csv_reader(fp, delimiter):
+        """Returns a :func:`csv.reader` that splits the lines of a text-based database (supports quoted fields)"""
+        return csv.reader(fp, delimiter=delimiter)
+
+
+def _read_sqlite(path, table, config_path):
+    """Read a table in a SQLite database file.
+
+    The `<sheet>` element of a `<register>` or `<connection>` specifies the table name.
+    """
+    if not os.path.isfile(path):
+        # sqlite3.connect() would create a new (empty) database file
+        raise IOError('Cannot find the SQLite database ' + path)
+
+    connection = sqlite3.connect(path)
+    try:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid")]
+        if not tables:
+            raise IOError('There are no tables in the SQLite database ' + path)
+        table = _get_sheet_name(tables, table, path, config_path)
+        info = connection.execute('PRAGMA table_info({})'.format(_quote(table))).fetchall()
+        header = [row[1] for row in info]
+        is_date = [row[2].upper() == 'DATE' for row in info]
+        cursor = connection.execute('SELECT * FROM {} ORDER BY rowid'.format(_quote(table)))
+    except sqlite3.DatabaseError as e:
+        connection.close()
+        raise IOError('Cannot read the SQLite database {} -- {}'.format(path, e))
+    except Exception:
+        connection.close()
+        raise
+
+    logger.debug('Loading table <{}> in {!r}'.format(table, path))
+    return header, _iter_sqlite_rows(connection, cursor, is_date)
+
+
+def _iter_sqlite_rows(connection, cursor, is_date):
+    """Yields the converted values of each row in a SQLite table"""
+    try:
+        for row in cursor:
+            yield [_sqlite_value(value, date) for value, date in zip(row, is_date)]
+    finally:
+        connection.close()
+
+
+def _sqlite_value(value, is_date):
+    """Convert a value in a SQLite table to the value of a cell in a database"""
+    if value is None:
+        return ''
+    if is_date:
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return '{}'.format(value).strip()
+    if isinstance(value, float) and int(value) == value:
+        return '{}'.format(int(value))
+    return '{}'.format(value).strip()
+
+
+def _quote(identifier):
+    """Quote a SQLite identifier (e.g., a table or a column name)"""
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def _make_index_map(header, field_names):
+    """Determine the column index in the header that the field_names are located in"""
+    index_map = {}
+    h = [val.strip().lower().replace(' ', '_') for val in header]
+    for index, label in enumerate(h):
+        for name in field_names:
+            if name not in index_map and name in label:
+                index_map[name] = index
+                break
+    return index_map
+
+
+def convert_to_sqlite(path, sqlite_path, sheet=None, table=None, encoding=None):
+    """Import an Excel or a text-based database into a SQLite database.
+
+    The header of the database becomes the column names of the table. A column that only
+    contains dates (i.e., the date cells in an Excel database) is stored as ISO 8601
+    text with a DATE type so that the dates are read back as :class:`datetime.date`
+    objects. All other values are stored as text, therefore the `date_format` of a
+    `<register>` element for a text-based database still applies.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the Excel or text-based (CSV, TXT) database to import.
+    sqlite_path : :class:`str`
+        The path to the SQLite database. The file is created if it does not exist.
+    sheet : :class:`str`, optional
+        The name of the Sheet to import from an Excel database. Must be specified
+        if the Excel database contains more than one Sheet.
+    table : :class:`str`, optional
+        The name of the table to create (an existing table is replaced). If not
+        specified then the name of the `sheet` is used, or the name of the file
+        if `sheet` is :data:`None`. The table name is the text to use in the
+        `<sheet>` element of the configuration file.
+    encoding : :class:`str`, optional
+        The encoding of the database to import.
+
+    Returns
+    -------
+    :class:`str`
+        The name of the table that was created.
+
+    Examples
+    --------
+    >>> from msl.equipment.database import convert_to_sqlite
+    >>> convert_to_sqlite('Equipment Register.xls', 'registers.sqlite3', sheet='Equipment')  # doctest: +SKIP
+    'Equipment'
+    >>> convert_to_sqlite('Equipment Register.xls', 'registers.sqlite3', sheet='Connections')  # doctest: +SKIP
+    'Connections'
+    """
+    if table is None:
+        table = sheet or os.path.splitext(os.path.basename(path))[0]
+
+    header, rows = _read_file(path, sheet, encoding, None)
+    columns = []
+    for i, name in enumerate(header):
+        name = '{}'.format(name).strip() or 'Column {}'.format(i + 1)
+        while name.lower() in [c.lower() for c in columns]:
+            name += ' {}'.format(i + 1)
+        columns.append(name)
+
+    values = []
+    for row in rows:
+        if len(row) != len(columns):
+            logger.error('len(row) [{}] != len(header) [{}] -> row={}'.format(len(row), len(columns), row))
+            continue
+        values.append(row)
+
+    is_date = []
+    for i in range(len(columns)):
+        items = [row[i] for row in values if row[i] != '']
+        is_date.append(bool(items) and all(isinstance(item, datetime.date) for item in items))
+
+    for row in values:
+        for i, date in enumerate(is_date):
+            if date:
+                row[i] = row[i].isoformat() if row[i] else None
+
+    connection = sqlite3.connect(sqlite_path)
+    try:
+        with connection:
+            connection.execute('DROP TABLE IF EXISTS {}'.format(_quote(table)))
+            connection.execute('CREATE TABLE {} ({})'.format(_quote(table), ', '.join(
+                '{} {}'.format(_quote(c), 'DATE' if d else 'TEXT') for c, d in zip(columns, is_date))))
+            connection.executemany('INSERT INTO {} VALUES ({})'.format(
+                _quote(table), ', '.join('?' * len(columns))), values)
+    finally:
+        connection.close()
+
+    logger.debug('Imported {} rows from {!r} to the table <{}> in {!r}'.format(len(values), path, table, sqlite_path))
+    return table
+
+
+def _to_date(value, date_format):
+    """Convert the `value` to a :class:`datetime.date` (returns :data:`None` if it cannot be converted)"""
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.datetime.strptime(value, date_format).date()
+    except ValueError:
+        return None
+
+
+def _to_float(value):
+    """Convert the `value` to a :class:`float` (returns :data:`None` if it cannot be converted)"""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _read_file_rows(path, sheet_name, encoding, config_path, reader=None):
+    """Read a database file and returns the header and a list of all rows.
+
+    Used by Database._prefetch() since a generator cannot be returned from another process.
+    """
+    header, rows = _read_file(path, sheet_name, encoding, config_path, reader)
+    return header, list(rows)
+
+
+class _Watcher(threading.Thread):
+
+    def __init__(self, database, interval, callback):
+        """A daemon thread that periodically calls :meth:`Database.reload`."""
+        super(_Watcher, self).__init__(name='DatabaseWatcher')
+        self.daemon = True
+        self._database = database
+        self._interval = interval
+        self._callback = callback
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                diff = self._database.reload()
+            except Exception as e:
+                logger.error('Cannot reload the databases -- {}: {}'.format(e.__class__.__name__, e))
+                continue
+            if self._callback is not None and any(diff.values()):
+                self._callback(diff)
+
+    def stop(self):
+        self._stop_event.set()
+        if self is not threading.current_thread():
+            self.join()
+
+
+class _RecordIndex(object):
+
+    CACHE_MAXSIZE = 1024
+
+    def __init__(self, records, names):
+        """Hash indexes of the distinct values of some attributes of a sequence of records.
+
+        Parameters
+        ----------
+        records : :class:`list`
+            A list of :class:`.EquipmentRecord`\'s or :class:`.ConnectionRecord`\'s.
+        names : :class:`tuple` of :class:`str`
+            The attribute names to index.
+        """
+        self.records = records
+        self.fields = {}
+        for name in names:
+            index = {}
+            for position, record in enumerate(records):
+                value = getattr(record, name)
+                try:
+                    index[value].append(position)
+                except KeyError:
+                    index[value] = [position]
+            self.fields[name] = index
+        self._sorted_keys = {}
+        self._texts = {}
+        self._trigrams = {}
+        self._cache = {}
+
+    def sorted_keys(self, name):
+        """Returns the sorted, distinct values of the `name` attribute."""
+        try:
+            return self._sorted_keys[name]
+        except KeyError:
+            keys = sorted(self.fields[name])
+            self._sorted_keys[name] = keys
+            return keys
+
+    def text(self, name):
+        """Returns the sorted, distinct values of the `name` attribute joined by a new-line character.
+
+        Also returns the position in the text where each value starts. A substring search of
+        the joined text is much faster than searching each distinct value. Returns :data:`None`
+        if a value is not a :class:`str` or if a value contains a new-line character.
+        """
+        try:
+            return self._texts[name]
+        except KeyError:
+            pass
+
+        keys = self.sorted_keys(name)
+        if all(isinstance(k, str) and '\n' not in k for k in keys):
+            starts = []
+            position = 0
+            for k in keys:
+                starts.append(position)
+                position += len(k) + 1
+            text = '\n'.join(keys), starts
+        else:
+            text = None
+        self._texts[name] = text
+        return text
+
+    def trigrams(self, name):
+        """Returns a :class:`dict` that maps every 3-character substring of the distinct
+        values of the `name` attribute to the :class:`set` of distinct values that contain it.
+
+        Must only be called if :meth:`text` is not :data:`None`.
+        """
+        try:
+            return self._trigrams[name]
+        except KeyError:
+            pass
+
+        trigrams = {}
+        for k in self.sorted_keys(name):
+            for i in range(len(k) - 2):
+                try:
+                    trigrams[k[i:i+3]].add(k)
+                except KeyError:
+                    trigrams[k[i:i+3]] = set([k])
+        self._trigrams[name] = trigrams
+        return trigrams
+
+    def find(self, name, value, flags, is_match):
+        """Find the positions of the records whose `name` attribute matches `value`.
+
+        Parameters
+        ----------
+        name : :class:`str`
+            The name of an indexed attribute.
+        value
+            The search criterion (e.g., a regex pattern).
+        flags : :class:`int`
+            The regex flags.
+        is_match : callable
+            A function that takes 1 argument (a distinct value of the `name`
+            attribute) and returns whether `value` matches it. Only called if
+            the positions cannot be determined from an exact or a prefix lookup.
+
+        Returns
+        -------
+        :class:`frozenset` of :class:`int`
+            The positions (in :attr:`records`) of the matching records.
+        """
+        # the result for a callable cannot be cached since the callable may have state
+        key = None if callable(value) else (name, value, flags)
+        if key is not None:
+            try:
+                return self._cache[key]
+            except (KeyError, TypeError):
+                pass
+
+        index = self.fields[name]
+        positions = set()
+        if name == 'date_calibrated' and isinstance(value, (tuple, list)):
+            # a (start, end) date range -> use the sorted index
+            dates = self.sorted_keys(name)
+            start, end = value
+            i = 0 if start is None else bisect.bisect_left(dates, start)
+            j = len(dates) if end is None else bisect.bisect_right(dates, end)
+            for date in dates[i:j]:
+                positions.update(index[date])
+        elif flags == 0 and isinstance(value, str) and _exact_regex.match(value):
+            positions.update(index.get(value[1:-1], ()))
+        elif flags == 0 and isinstance(value, str) and _prefix_regex.match(value) \
+                and all(isinstance(k, str) for k in index):
+            prefix = value[1:]
+            keys = self.sorted_keys(name)
+            for k in keys[bisect.bisect_left(keys, prefix):]:
+                if not k.startswith(prefix):
+                    break
+                positions.update(index[k])
+        elif flags == 0 and isinstance(value, str) and len(value) > 2 \
+                and _literal_regex.match(value) and self.text(name) is not None:
+            # a substring search -> the distinct values that contain every
+            # 3-character substring of `value` are the only candidates
+            trigrams = self.trigrams(name)
+            candidates = sorted((trigrams.get(value[i:i+3], ()) for i in range(len(value) - 2)), key=len)
+            for k in set(candidates[0]).intersection(*candidates[1:]):
+                if value in k:
+                    positions.update(index[k])
+        elif flags == 0 and isinstance(value, str) and _literal_regex.match(value) and self.text(name) is not None:
+            # a short substring search -> find the occurrences in the joined text of the distinct values
+            text, starts = self.text(name)
+            keys = self.sorted_keys(name)
+            i = text.find(value)
+            while i >= 0:
+                k = bisect.bisect_right(starts, i) - 1
+                positions.update(index[keys[k]])
+                if k + 1 == len(starts):
+                    break
+                i = text.find(value, starts[k + 1])
+        else:
+            for distinct, indices in index.items():
+                if is_match(distinct):
+                    positions.update(indices)
+
+        positions = frozenset(positions)
+        if key is not None:
+            if len(self._cache) >= _RecordIndex.CACHE_MAXSIZE:
+                self._cache.clear()
+            try:
+                self._cache[key] = positions
+            except TypeError:  # unhashable `value`
+                pass
+        return positions
+
+
+class Query(object):
+
+    # the record attributes that can be modified after a Database was loaded
+    _MUTABLE = ('alias', 'connection', 'properties')
+
+    def __init__(self, database, record_type, kwargs):
+        """A search of a :class:`Database` that has been compiled so that it can be
+        performed repeatedly, see :meth:`Database.compile_query`.
+
+        Do not instantiate this class directly.
+
+        Parameters
+        ----------
+        database : :class:`Database`
+            The database to search.
+        record_type : :class:`type`
+            Either :class:`.EquipmentRecord` or :class:`.ConnectionRecord`.
+        kwargs : :class:`dict`
+            The search criteria (including an optional ``flags`` item).
+        """
+        flags = int(kwargs.pop('flags', 0))  # used by re.search
+        for name in kwargs:
+            if name not in record_type._NAMES:
+                article = 'an' if record_type is EquipmentRecord else 'a'
+                raise NameError('Invalid argument name {!r} for {} {}'.format(name, article, record_type.__name__))
+
+        self._database = database
+        self._record_type = record_type
+        self._flags = flags
+        self._criteria = dict((name, (value, Database._compile_criterion(name, value, flags)))
+                              for name, value in kwargs.items())
+
+        # the results of a query that contains a callable are not cached since the callable may have
+        # state, and the results of a query of an attribute that can be modified are not cached
+        self._key = None
+        if not any(callable(value) for value in kwargs.values()) \
+                and not any(name in Query._MUTABLE for name in kwargs):
+            try:
+                self._key = (record_type.__name__, flags, frozenset(kwargs.items()))
+                hash(self._key)
+            except TypeError:  # an unhashable value, e.g., properties={...}
+                self._key = None
+
+    def __repr__(self):
+        criteria = ', '.join('{}={!r}'.format(name, self._criteria[name][0]) for name in sorted(self._criteria))
+        if self._flags:
+            criteria += '{}flags={}'.format(', ' if criteria else '', self._flags)
+        return 'Query<{}|{}>'.format(self._record_type.__name__, criteria)
+
+    def _matches(self, record):
+        """Returns whether a record matches all search criteria"""
+        return all(is_match(getattr(record, name)) for name, (_, is_match) in self._criteria.items())
+
+    def __call__(self):
+        """Perform the search.
+
+        Returns
+        -------
+        :class:`list` of :class:`.EquipmentRecord` or :class:`list` of :class:`.ConnectionRecord`
+            The records that match the search criteria.
+        """
+        return self._database._run_query(self)
+
 
 class Database(object):
 
+    # the maximum number of results of a Query to cache
+    _RESULTS_MAXSIZE = 128
+
+    # the attributes of an EquipmentRecord that are indexed
+    _EQUIPMENT_INDEX = ('manufacturer', 'model', 'serial', 'category', 'location', 'team', 'date_calibrated')
+
+    # the columns of Database.to_columns() that contain text
+    _TEXT_COLUMNS = ('alias', 'description', 'latest_report_number', 'serial')
+
+    # the columns of Database.to_columns() that are dictionary encoded
+    _CATEGORICAL_COLUMNS = ('category', 'location', 'manufacturer', 'model', 'team')
+
+    # the attributes of a ConnectionRecord that are indexed
+    _CONNECTION_INDEX = ('address', 'backend', 'interface', 'manufacturer', 'model', 'serial')
+
     def __init__(self, path):
         """Create :class:`.EquipmentRecord`'s and :class:`.ConnectionRecord`'s 
         from :ref:`Databases <database>` that are specified in a :ref:`configuration_file`.
@@ -63,119 +806,34 @@ class Database(object):
             raise IOError(parse_err)
 
         self._config_path = path
+        self._equipment_index = None
+        self._connection_index = None
+        self._prefetched = {}
+        self._connection_aliases = {}
+        self._signatures = {}
+        self._register_keys = []
+        self._reload_lock = threading.Lock()
+        self._records_lock = threading.RLock()  # a reload is applied while this lock is held
+        self._watcher = None
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._generation = 0
 
-        # create a dictionary of all ConnectionRecord's
+        # create a dictionary of all ConnectionRecord's and of all EquipmentRecord's
         self._connection_records = {}
-        easy_names = ('address', 'backend', 'manufacturer', 'model', 'serial')
-        for connections in root.findall('connections'):
-            for element in connections.findall('connection'):
-                header, rows = self._read(element)
-                index_map = self._make_index_map(header, ConnectionRecord._NAMES)
-                for row in rows:
-                    if not self._is_row_length_okay(row, header):
-                        continue
-                    key = self._make_key(row, index_map)
-                    if not self._is_key_unique(key, self._connection_records, element):
-                        continue
-                    kwargs = {}
-                    for name in easy_names:
-                        kwargs[name] = row[index_map[name]]
-                    kwargs['properties'] = {}
-                    for item in row[index_map['properties']].split(';'):
-                        s = item.split('=')
-                        if len(s) != 2:
-                            continue
-                        kwargs['properties'][s[0].strip()] = string_to_none_bool_int_float_complex(s[1].strip())
-                    self._connection_records[key] = ConnectionRecord(**kwargs)
-
-        # create a dictionary of EquipmentRecord's
         self._equipment_records = {}
-        for registers in root.findall('registers'):
-            for register in registers.findall('register'):
-                register_path = register.findtext('path')
-                team = register.attrib.get('team', '')
-                date_format = register.attrib.get('date_format', '%d/%m/%Y')
-
-                header, rows = self._read(register)
-                index_map = self._make_index_map(header, EquipmentRecord._NAMES)
-
-                # prepare the user_defined list
-                temp = register.attrib.get('user_defined', [])
-                user_defined = []
-                index_map_user_defined = {}
-                if temp:
-                    temp = [t.strip().lower().replace(' ', '_') for t in temp.split(',') if t.strip()]
-                    for name in temp:
-                        if name in EquipmentRecord._NAMES:
-                            msg = 'The "user_defined" parameter {!r} is already an EquipmentRecord attribute'
-                            logger.warning(msg.format(name))
-                        else:
-                            user_defined.append(name)
-                    if user_defined:
-                        index_map_user_defined = self._make_index_map(header, user_defined)
-
-                for row in rows:
-                    if not self._is_row_length_okay(row, header):
-                        continue
-                    key = self._make_key(row, index_map)
-                    if not self._is_key_unique(key, self._equipment_records, register):
-                        continue
-
-                    kwargs = {'team': team}
-
-                    # find the corresponding ConnectionRecord (if it exists)
-                    try:
-                        kwargs['connection'] = self._connection_records[key]
-                    except KeyError:
-                        pass
-                    else:
-                        try:
-                            # check if an alias was defined in ConnectionRecord.properties
-                            alias = kwargs['connection'].properties['alias']
-                        except KeyError:
-                            pass
-                        else:
-                            kwargs['alias'] = alias
-                            del kwargs['connection'].properties['alias']
-
-                    for name in EquipmentRecord._NAMES:
-                        try:
-                            value = row[index_map[name]]
-                        except KeyError:
-                            continue
-
-                        if name == 'date_calibrated' and not isinstance(value, datetime.date):
-                            try:
-                                value = datetime.datetime.strptime(value, date_format).date()
-                            except ValueError:
-                                if value:
-                                    msg = '{} -> The date {!r} cannot be converted to a datetime.date object in {!r}'
-                                    logger.error(msg.format(key, value, register_path))
-                                continue
-                        elif name == 'calibration_cycle':
-                            if not value or value.upper() == 'N/A':
-                                continue
-                            try:
-                                value = float(value)
-                            except ValueError:
-                                msg = '{} -> The calibration cycle value, {!r}, must be a number in {!r}'
-                                logger.error(msg.format(key, value, register_path))
-                                continue
-
-                        kwargs[name] = value
-
-                    for name in user_defined:
-                        try:
-                            s = row[index_map_user_defined[name]]
-                        except KeyError:
-                            pass
-                        else:
-                            kwargs[name] = string_to_none_bool_int_float_complex(s)
-
-                    self._equipment_records[key] = EquipmentRecord(**kwargs)
+        if not self._load_snapshot(root):
+            # the signature of each file is captured before the file is read
+            signatures = {}
+            self._prefetch(root)
+            self._load_connection_records(root, self._connection_records, signatures)
+            self._load_equipment_records(root, signatures)
+            self._signatures = signatures
+            self._save_snapshot(root, signatures)
 
         # create a dictionary of all the <equipment> tags
         self._equipment_using = {}
+        prefixes = {}  # the number of aliases that start with a particular prefix
         for element in root.findall('equipment'):
 
             # check if an alias attribute was defined in the configuration file
@@ -213,11 +871,17 @@ class Database(object):
                     alias = 'equipment'
             # if this alias already exists as a dictionary key then append a unique number to the alias
             if alias in self._equipment_using:
-                n = sum([1 for key in self._equipment_using if key.startswith(alias)])
-                alias += '({})'.format(n + 1)
+                n = prefixes.get(alias, 0) + 1
+                unique = '{}({})'.format(alias, n)
+                while unique in self._equipment_using:
+                    n += 1
+                    unique = '{}({})'.format(alias, n)
+                alias = unique
             equip.alias = alias
 
             self._equipment_using[alias] = equip
+            for i in range(1, len(alias) + 1):
+                prefixes[alias[:i]] = prefixes.get(alias[:i], 0) + 1
 
     @property
     def equipment(self):
@@ -279,11 +943,7 @@ class Database(object):
             If the name of an input argument is not a :class:`.ConnectionRecord`
             property name or ``flags``.
         """
-        flags = int(kwargs.pop('flags', 0))  # used by re.search
-        for name in kwargs:
-            if name not in ConnectionRecord._NAMES:
-                raise NameError('Invalid argument name {!r} for a {}'.format(name, ConnectionRecord.__name__))
-        return [r for r in self._connection_records.values() if self._search(r, kwargs, flags)]
+        return Query(self, ConnectionRecord, kwargs)()
 
     def records(self, **kwargs):
         """Search the :ref:`equipment_database` to find all :class:`.EquipmentRecord`\'s that
@@ -302,7 +962,14 @@ class Database(object):
 
             If a `kwarg` is ``date_calibrated`` then the value must be a callable function that
             takes 1 input argument (a :class:`datetime.date` object) and the function must return
-            a :class:`bool`. See the examples below.
+            a :class:`bool`, or a (start, end) :class:`tuple` of :class:`datetime.date` objects
+            (inclusive, either can be :data:`None`). See the examples below.
+
+            The ``manufacturer``, ``model``, ``serial``, ``category``, ``location``, ``team``
+            and ``date_calibrated`` values are indexed, so a search only tests the distinct
+            values of these fields and a pattern of the form ``'^text$'`` or ``'^text'`` is a
+            direct lookup. A pattern that does not contain special characters is a substring
+            search of the distinct values.
 
         Examples
         --------
@@ -328,6 +995,8 @@ class Database(object):
         a list of all EquipmentRecords that were calibrated between the years 1995 and 2005
         >>> records(date_calibrated=lambda date: date > datetime.date(2008, 3, 15))  # doctest: +SKIP
         a list of all EquipmentRecords that were calibrated after 15 March 2008
+        >>> records(date_calibrated=(datetime.date(2010, 1, 1), None))  # doctest: +SKIP
+        a list of all EquipmentRecords that were calibrated on or after 1 January 2010
 
         Returns
         -------
@@ -340,14 +1009,473 @@ class Database(object):
             If the name of an input argument is not an :class:`.EquipmentRecord`
             property name or ``flags``.
         """
-        flags = int(kwargs.pop('flags', 0))  # used by re.search
-        for name in kwargs:
-            if name not in EquipmentRecord._NAMES:
-                raise NameError('Invalid argument name {!r} for an {}'.format(name, EquipmentRecord.__name__))
-        return [r for r in self._equipment_records.values() if self._search(r, kwargs, flags)]
+        return Query(self, EquipmentRecord, kwargs)()
+
+    def compile_query(self, **kwargs):
+        """Compile a search for :class:`.EquipmentRecord`\'s that is performed repeatedly.
+
+        The names of the search criteria are validated, the regex patterns are compiled
+        and the search functions are created once. Calling the returned :class:`Query`
+        returns the same records as calling :meth:`records` with the same `kwargs`.
 
-    def _read(self, element):
-        """Read any allowed database file type"""
+        The results are kept in a least-recently-used cache (shared by all :class:`Query`
+        objects of the :class:`Database`) which is cleared when the :ref:`Databases <database>`
+        are reloaded, see :meth:`reload`. The results of a query that contains a callable
+        (e.g., for ``date_calibrated``) or that searches the ``alias``, ``connection`` or
+        ``properties`` attributes (which can be modified) are not cached.
+
+        Parameters
+        ----------
+        **kwargs
+            The search criteria, see :meth:`records`.
+
+        Returns
+        -------
+        :class:`Query`
+            The compiled search. Calling it returns a :class:`list` of :class:`.EquipmentRecord`\'s.
+
+        Raises
+        ------
+        NameError
+            If the name of an input argument is not an :class:`.EquipmentRecord`
+            property name or ``flags``.
+
+        Examples
+        --------
+        >>> dmm = db.compile_query(manufacturer='Keysight', model='34465A')  # doctest: +SKIP
+        >>> dmm()  # doctest: +SKIP
+        [EquipmentRecord<Keysight|34465A|MY54506462>]
+        """
+        return Query(self, EquipmentRecord, kwargs)
+
+    def compile_connection_query(self, **kwargs):
+        """Compile a search for :class:`.ConnectionRecord`\'s that is performed repeatedly.
+
+        The same as :meth:`compile_query` except that calling the returned :class:`Query`
+        returns the same records as calling :meth:`connections` with the same `kwargs`.
+        The members of the ``backend`` and ``interface`` enums are resolved once.
+
+        Parameters
+        ----------
+        **kwargs
+            The search criteria, see :meth:`connections`.
+
+        Returns
+        -------
+        :class:`Query`
+            The compiled search. Calling it returns a :class:`list` of :class:`.ConnectionRecord`\'s.
+
+        Raises
+        ------
+        NameError
+            If the name of an input argument is not a :class:`.ConnectionRecord`
+            property name or ``flags``.
+        """
+        return Query(self, ConnectionRecord, kwargs)
+
+    def iter_records(self, **kwargs):
+        """Iterate over the :class:`.EquipmentRecord`\'s in the :ref:`equipment_database`\'s
+        that match the specified criteria.
+
+        Unlike :meth:`records`, the records are matched lazily (one at a time, in the
+        same order that :meth:`records` returns them) so the iteration can be stopped
+        early without searching all records. The :class:`.EquipmentRecord`\'s that are
+        yielded are the same objects that :meth:`records` returns. The records of every
+        :ref:`equipment_database`, including a SQLite database, are loaded into memory
+        when the :class:`Database` is created and the databases are not read again.
+
+        Parameters
+        ----------
+        **kwargs
+            The search criteria, see :meth:`records`.
+
+        Yields
+        ------
+        :class:`.EquipmentRecord`
+            An equipment record that matches the search criteria.
+
+        Raises
+        ------
+        NameError
+            If the name of an input argument is not an :class:`.EquipmentRecord`
+            property name or ``flags``.
+        """
+        return self._iter_records(Query(self, EquipmentRecord, kwargs))
+
+    def to_columns(self, **kwargs):
+        """Convert the :class:`.EquipmentRecord`\'s to columns of :class:`numpy.ndarray`\'s.
+
+        The columns are created in one pass over the records so that vectorised
+        operations can be performed on all records, for example::
+
+            >>> cols = db.to_columns()  # doctest: +SKIP
+            >>> codes, categories = cols['manufacturer']  # doctest: +SKIP
+            >>> keysight = codes == list(categories).index('Keysight')  # doctest: +SKIP
+            >>> cols['serial'][keysight & (cols['date_calibrated'] < np.datetime64('2015-01-01'))]  # doctest: +SKIP
+
+        Parameters
+        ----------
+        **kwargs
+            Only include the records that match the search criteria, see :meth:`records`.
+
+        Returns
+        -------
+        :class:`dict`
+            The keys are the :class:`.EquipmentRecord` attribute names:
+
+            * ``alias``, ``description``, ``latest_report_number``, ``serial`` -- an
+              :class:`object` array of :class:`str`
+            * ``category``, ``location``, ``manufacturer``, ``model``, ``team`` -- the values
+              are dictionary encoded as a (codes, categories) :class:`tuple`, where `codes`
+              is an :class:`~numpy.int32` array and ``categories[codes]`` are the values
+            * ``calibration_cycle`` -- a :class:`~numpy.float64` array
+            * ``date_calibrated`` -- a :class:`~numpy.datetime64` array (``NaT`` if the
+              equipment has never been calibrated)
+            * ``connection`` -- a :class:`bool` array of whether a :class:`.ConnectionRecord` exists
+        """
+        records = self.records(**kwargs)
+        columns = {}
+        for name in Database._TEXT_COLUMNS:
+            columns[name] = np.array([getattr(r, name) for r in records], dtype=object)
+        for name in Database._CATEGORICAL_COLUMNS:
+            categories = {}
+            codes = np.array([categories.setdefault(getattr(r, name), len(categories)) for r in records],
+                             dtype=np.int32)
+            values = np.empty(len(categories), dtype=object)
+            for value, code in categories.items():
+                values[code] = value
+            columns[name] = (codes, values)
+        columns['calibration_cycle'] = np.array([r.calibration_cycle for r in records], dtype=np.float64)
+        columns['date_calibrated'] = np.array(
+            [None if r.date_calibrated.year == datetime.MINYEAR else r.date_calibrated for r in records],
+            dtype='datetime64[D]')
+        columns['connection'] = np.array([r.connection is not None for r in records], dtype=bool)
+        return columns
+
+    def to_structured_array(self, **kwargs):
+        """Convert the :class:`.EquipmentRecord`\'s to a structured :class:`numpy.ndarray`.
+
+        Parameters
+        ----------
+        **kwargs
+            Only include the records that match the search criteria, see :meth:`records`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            A structured array with a field for each column in :meth:`to_columns`.
+            The text fields have a unicode dtype (the dictionary encoding is not used).
+        """
+        columns = self.to_columns(**kwargs)
+        arrays, dtype = [], []
+        for name in sorted(columns):
+            column = columns[name]
+            if isinstance(column, tuple):
+                codes, categories = column
+                column = categories[codes] if len(codes) else np.array([], dtype=object)
+            if column.dtype == object:
+                column = column.astype('U{}'.format(max([len(v) for v in column] + [1])))
+            arrays.append(column)
+            dtype.append((str(name), column.dtype))
+        array = np.empty(len(arrays[0]), dtype=dtype)
+        for (name, _), column in zip(dtype, arrays):
+            array[name] = column
+        return array
+
+    def calibration_due(self, months=0, group_by='team', **kwargs):
+        """Find the equipment that needs to be re-calibrated.
+
+        This is the vectorised equivalent of calling :meth:`~.EquipmentRecord.is_calibration_due`
+        for every record and for every value in `months`. The next calibration date of every
+        record is calculated once (see :meth:`~.EquipmentRecord.next_calibration_date`).
+
+        Parameters
+        ----------
+        months : :class:`int` or :class:`list` of :class:`int`, optional
+            The number of months to add to today's date to determine if the equipment
+            needs to be re-calibrated within a certain amount of time, see
+            :meth:`~.EquipmentRecord.is_calibration_due`.
+        group_by : :class:`str`, optional
+            The :class:`.EquipmentRecord` attribute name to group the records by
+            (e.g., ``'team'`` or ``'location'``). If :data:`None` then the records
+            are not grouped.
+        **kwargs
+            Only check the records that match the search criteria, see :meth:`records`.
+
+        Returns
+        -------
+        :class:`dict`
+            The keys are the `months` values. If `group_by` is :data:`None` the value of each
+            key is a :class:`list` of the :class:`.EquipmentRecord`\'s that are due, otherwise
+            the value is a :class:`dict` of the :class:`list`\'s with the value of the
+            `group_by` attribute as the key (groups that have no records due are not included).
+
+        Raises
+        ------
+        NameError
+            If `group_by` or the name of a keyword argument is not an :class:`.EquipmentRecord`
+            property name or ``flags``.
+
+        Examples
+        --------
+        >>> db.calibration_due(months=[0, 1, 3, 6], group_by='location')  # doctest: +SKIP
+        {0: {'RF Lab': [...]}, 1: {'RF Lab': [...]}, 3: {'RF Lab': [...], 'General': [...]}, 6: {...}}
+        """
+        if group_by is not None and group_by not in EquipmentRecord._NAMES:
+            raise NameError('Invalid group_by name {!r} for an {}'.format(group_by, EquipmentRecord.__name__))
+
+        try:
+            horizons = [int(m) for m in months]
+        except TypeError:
+            horizons = [int(months)]
+
+        records = self.records(**kwargs)
+        dates = np.array([r.date_calibrated for r in records], dtype='datetime64[D]')
+        cycles = np.array([r.calibration_cycle for r in records], dtype=np.float64)
+
+        # same as EquipmentRecord.next_calibration_date()
+        years = cycles.astype(np.int64)
+        next_dates = _add_months(dates, 12 * years + np.round(12 * (cycles - years)).astype(np.int64))
+        valid = (dates.astype('datetime64[Y]') != np.datetime64(datetime.MINYEAR - 1970, 'Y')) & (cycles != 0.0)
+
+        if group_by is not None:
+            groups = np.array([getattr(r, group_by) for r in records], dtype=object)
+
+        today = datetime.date.today()
+        result = {}
+        for m in horizons:
+            horizon = np.datetime64(today + relativedelta(months=max(0, m)), 'D')
+            due = np.flatnonzero(valid & (horizon > next_dates))
+            if group_by is None:
+                result[m] = [records[i] for i in due]
+            else:
+                grouped = {}
+                for i in due:
+                    grouped.setdefault(groups[i], []).append(records[i])
+                result[m] = grouped
+        return result
+
+    def reload(self):
+        """Reload the :ref:`Databases <database>` that have changed.
+
+        Only the :ref:`equipment_database`\'s and :ref:`connections_database`\'s whose
+        file has changed (the modification time, size and hash of the file are compared)
+        since the databases were loaded are read again. The changes are applied in place:
+
+        * an :class:`.EquipmentRecord` (or :class:`.ConnectionRecord`) that has been
+          modified keeps its identity, the values of its attributes are updated
+          (the :attr:`~.EquipmentRecord.alias` is not changed)
+        * the new records are added
+        * the records that were deleted from a database are removed
+
+        The ``<equipment>`` elements in the :ref:`configuration_file` are not re-evaluated.
+
+        Returns
+        -------
+        :class:`dict`
+            The ``'added'``, ``'removed'`` and ``'modified'`` :class:`list`\'s of
+            :class:`.EquipmentRecord`\'s. A record whose :attr:`~.EquipmentRecord.connection`
+            changed is considered to be modified.
+        """
+        with self._reload_lock:
+            return self._reload()
+
+    def watch(self, interval=1.0, callback=None):
+        """Start watching the :ref:`Databases <database>` for changes in a background thread.
+
+        Calls :meth:`reload` every `interval` seconds. Errors that occur while
+        reloading (e.g., a database is being saved while it is read) are logged
+        and the databases are checked again after the next `interval`.
+
+        Parameters
+        ----------
+        interval : :class:`float`, optional
+            The number of seconds to wait between checking if a database has changed.
+        callback : callable, optional
+            A function that is called with the :class:`dict` that :meth:`reload`
+            returns whenever a record was added, removed or modified.
+        """
+        self.stop_watching()
+        self._watcher = _Watcher(self, float(interval), callback)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop watching the :ref:`Databases <database>` for changes, see :meth:`watch`."""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _iter_records(self, query):
+        """The generator for :meth:`iter_records`"""
+        with self._records_lock:
+            records = list(self._equipment_records.values())
+        for record in records:
+            if query._matches(record):
+                yield record
+
+    def _load_connection_records(self, root, records, signatures):
+        """Create the ConnectionRecord's from all <connection> elements and add them to `records`"""
+        easy_names = ('address', 'backend', 'manufacturer', 'model', 'serial')
+        for connections in root.findall('connections'):
+            for element in connections.findall('connection'):
+                header, rows = self._read(element, signatures=signatures)
+                index_map = self._make_index_map(header, ConnectionRecord._NAMES)
+                values = {}  # the converted values of the properties
+                for row in rows:
+                    if not self._is_row_length_okay(row, header):
+                        continue
+                    key = self._make_key(row, index_map)
+                    if not self._is_key_unique(key, records, element):
+                        continue
+                    kwargs = {}
+                    for name in easy_names:
+                        kwargs[name] = row[index_map[name]]
+                    kwargs['properties'] = {}
+                    for item in row[index_map['properties']].split(';'):
+                        s = item.split('=')
+                        if len(s) != 2:
+                            continue
+                        text = s[1].strip()
+                        try:
+                            value = values[text]
+                        except KeyError:
+                            value = values[text] = string_to_none_bool_int_float_complex(text)
+                        kwargs['properties'][s[0].strip()] = value
+                    records[key] = ConnectionRecord(**kwargs)
+
+    def _load_equipment_records(self, root, signatures):
+        """Create the EquipmentRecord's from all <register> elements"""
+        for registers in root.findall('registers'):
+            for register in registers.findall('register'):
+                def is_unique(key):
+                    return self._is_key_unique(key, self._equipment_records, register)
+
+                keys = []
+                for key, record in self._iter_register(register, is_unique, signatures=signatures):
+                    self._equipment_records[key] = record
+                    keys.append(key)
+                self._register_keys.append((self._register_id(register), keys))
+
+    def _register_id(self, register):
+        """Returns the (path, sheet) of the database that a <register> element refers to"""
+        return self._find_file(register), register.findtext('sheet')
+
+    def _iter_register(self, register, is_unique, signatures=None, connections=None, aliases=None):
+        """Yields a (key, EquipmentRecord) tuple for each row in a <register> database.
+
+        The rows are read and the records are created lazily. The `is_unique` callable
+        takes the Manufacturer|Model|Serial key as the argument and returns whether
+        an EquipmentRecord should be created for the row. The `signatures` are passed
+        to :meth:`_read`. The ConnectionRecord's and the aliases
+        that are defined in the connection databases are taken from `connections` and
+        `aliases` (the attributes of the Database are used if not specified).
+        """
+        if connections is None:
+            connections = self._connection_records
+        if aliases is None:
+            aliases = self._connection_aliases
+
+        register_path = register.findtext('path')
+        team = register.attrib.get('team', '')
+        date_format = register.attrib.get('date_format', '%d/%m/%Y')
+
+        header, rows = self._read(register, signatures)
+        index_map = self._make_index_map(header, EquipmentRecord._NAMES)
+
+        # prepare the user_defined list
+        temp = register.attrib.get('user_defined', [])
+        user_defined = []
+        index_map_user_defined = {}
+        if temp:
+            temp = [t.strip().lower().replace(' ', '_') for t in temp.split(',') if t.strip()]
+            for name in temp:
+                if name in EquipmentRecord._NAMES:
+                    msg = 'The "user_defined" parameter {!r} is already an EquipmentRecord attribute'
+                    logger.warning(msg.format(name))
+                else:
+                    user_defined.append(name)
+            if user_defined:
+                index_map_user_defined = self._make_index_map(header, user_defined)
+
+        # the values in a column are only converted once, since a register typically
+        # contains many records that have the same calibration date, cycle, ...
+        dates, cycles = {}, {}
+        user_defined_values = dict((name, {}) for name in user_defined)
+
+        for row in rows:
+            if not self._is_row_length_okay(row, header):
+                continue
+            key = self._make_key(row, index_map)
+            if not is_unique(key):
+                continue
+
+            kwargs = {'team': team}
+
+            # find the corresponding ConnectionRecord (if it exists)
+            try:
+                kwargs['connection'] = connections[key]
+            except KeyError:
+                pass
+            else:
+                try:
+                    # check if an alias was defined in ConnectionRecord.properties
+                    alias = kwargs['connection'].properties['alias']
+                except KeyError:
+                    alias = aliases.get(key)
+                else:
+                    del kwargs['connection'].properties['alias']
+                    aliases[key] = alias
+                if alias is not None:
+                    kwargs['alias'] = alias
+
+            for name in EquipmentRecord._NAMES:
+                try:
+                    value = row[index_map[name]]
+                except KeyError:
+                    continue
+
+                if name == 'date_calibrated':
+                    try:
+                        date = dates[value]
+                    except KeyError:
+                        date = dates[value] = _to_date(value, date_format)
+                    if date is None:
+                        if value:
+                            msg = '{} -> The date {!r} cannot be converted to a datetime.date object in {!r}'
+                            logger.error(msg.format(key, value, register_path))
+                        continue
+                    value = date
+                elif name == 'calibration_cycle':
+                    if not value or value.upper() == 'N/A':
+                        continue
+                    try:
+                        cycle = cycles[value]
+                    except KeyError:
+                        cycle = cycles[value] = _to_float(value)
+                    if cycle is None:
+                        msg = '{} -> The calibration cycle value, {!r}, must be a number in {!r}'
+                        logger.error(msg.format(key, value, register_path))
+                        continue
+                    value = cycle
+
+                kwargs[name] = value
+
+            for name in user_defined:
+                try:
+                    s = row[index_map_user_defined[name]]
+                except KeyError:
+                    pass
+                else:
+                    try:
+                        kwargs[name] = user_defined_values[name][s]
+                    except KeyError:
+                        value = user_defined_values[name][s] = string_to_none_bool_int_float_complex(s)
+                        kwargs[name] = value
+
+            yield key, EquipmentRecord(**kwargs)
+
+    def _find_file(self, element):
+        """Returns the path to the database file that is specified in the <path> sub-element"""
         path = element.findtext('path')
         if path is None:
             raise IOError('You must create a <path> </path> element in {} '
@@ -359,81 +1487,285 @@ class Database(object):
             if not os.path.isfile(path):
                 raise IOError('Cannot find the database ' + path)
 
-        ext = os.path.splitext(path)[1].lower()
-        if ext in ('.xls', '.xlsx'):
-            header, rows = self._read_excel(path, element.findtext('sheet'), element.attrib.get('encoding', None))
-        elif ext in ('.csv', '.txt'):
-            delimiter = ',' if ext == '.csv' else '\t'
-            header, rows = self._read_text_based(path, delimiter, element.attrib.get('encoding', 'utf-8'))
-        else:
-            raise IOError('Unsupported equipment-registry database format ' + path)
-
-        return header, rows
-
-    def _read_excel(self, path, sheet_name, encoding):
-        """Read an Excel database file"""
-        self._book = xlrd.open_workbook(path, on_demand=True, encoding_override=encoding)
-
-        if sheet_name is None:
-            names = self._book.sheet_names()
-            if len(names) > 1:
-                msg = 'Cannot read the equipment register.\n' \
-                      'More than one Sheet is available in {dbase}\n' \
-                      'You must create a <sheet></sheet> element in {config}\n' \
-                      'The text between the "sheet" tag must be one of: {sheets}\n' \
-                      'For example,\n\t<path>{dbase}</path>\n\t<sheet>{first}</sheet>' \
-                    .format(dbase=path, config=self._config_path, sheets=', '.join(names), first=names[0])
-                raise IOError(msg)
+        return path
+
+    def _reload(self):
+        """Apply the changes in the databases to the records, see :meth:`reload`.
+
+        All databases that changed are read before any record is modified, so if reading
+        a database raises an exception then nothing is changed and the database is read
+        again the next time that this method is called.
+        """
+        root = ET.parse(self._config_path).getroot()
+        diff = {'added': [], 'removed': [], 'modified': []}
+
+        connections = [e for c in root.findall('connections') for e in c.findall('connection')]
+        registers = [r for rs in root.findall('registers') for r in rs.findall('register')]
+        signatures = dict(self._signatures)
+        changed = set()
+        for element in connections + registers:
+            path = self._find_file(element)
+            if path in changed:
+                continue
+            is_changed, signature = self._has_changed(path)
+            if is_changed:
+                changed.add(path)
+                signatures.pop(path, None)  # the new signature gets stored when the file is read
+            elif signature is not None:
+                signatures[path] = signature
+        if not changed:
+            with self._records_lock:
+                self._signatures = signatures
+            return diff
+
+        logger.debug('Reloading the databases {}'.format(sorted(changed)))
+
+        # create the ConnectionRecord's, the ConnectionRecord's that were modified keep their
+        # identity but the new values are only applied after all databases have been read
+        connection_records = self._connection_records
+        aliases = dict(self._connection_aliases)
+        replaced = {}  # key -> the existing ConnectionRecord that a new ConnectionRecord replaces
+        relink = any(self._find_file(element) in changed for element in connections)
+        if relink:
+            connection_records = {}
+            self._load_connection_records(root, connection_records, signatures)
+            for key, record in connection_records.items():
+                if key in self._equipment_records and 'alias' in record.properties:
+                    aliases[key] = record.properties.pop('alias')
+                if key in self._connection_records:
+                    replaced[key] = self._connection_records[key]
+
+        # create the EquipmentRecord's, in order, for the registers that changed and
+        # reuse the EquipmentRecord's from the registers that did not change
+        old_register_keys = dict(self._register_keys)
+        records = {}
+        register_keys = []
+        for register in registers:
+            register_id = self._register_id(register)
+            keys = []
+            if register_id[0] not in changed and register_id in old_register_keys:
+                for key in old_register_keys[register_id]:
+                    if key not in records:
+                        records[key] = self._equipment_records[key]
+                        keys.append(key)
             else:
-                sheet_name = names[0]
+                def is_unique(key):
+                    return self._is_key_unique(key, records, register)
+
+                for key, record in self._iter_register(register, is_unique, signatures=signatures,
+                                                       connections=connection_records, aliases=aliases):
+                    if key in replaced:
+                        record.connection = replaced[key]
+                    records[key] = record
+                    keys.append(key)
+            register_keys.append((register_id, keys))
+
+        # determine the changes, nothing is modified yet
+        connection_updates = []
+        for key, old in replaced.items():
+            record = connection_records[key]
+            if repr(old) != repr(record):
+                connection_updates.append((old, record))
+            connection_records[key] = old
+
+        equipment_updates, relinks = [], []
+        for key, record in records.items():
+            try:
+                old = self._equipment_records[key]
+            except KeyError:
+                diff['added'].append(record)
+                continue
+
+            if old is not record:
+                if _equipment_state(old) != _equipment_state(record):
+                    equipment_updates.append((old, record))
+                    diff['modified'].append(old)
+                records[key] = old
+            elif relink and old.connection is not connection_records.get(key):
+                relinks.append((old, connection_records.get(key)))
+                diff['modified'].append(old)
+
+        for key, old in self._equipment_records.items():
+            if key not in records:
+                diff['removed'].append(old)
 
+        # apply all changes at once
+        with self._records_lock:
+            for old, record in connection_updates:
+                _update_record(old, record)
+            for old, record in equipment_updates:
+                alias = old.alias or record.alias
+                _update_record(old, record)
+                old.alias = alias
+            for old, connection in relinks:
+                old.connection = connection
+            if relink:
+                self._connection_records = connection_records
+                self._connection_index = None
+            self._connection_aliases = aliases
+            self._equipment_records = records
+            self._register_keys = register_keys
+            self._signatures = signatures
+            self._equipment_index = None
+            with self._results_lock:
+                self._generation += 1
+                self._results.clear()
+        return diff
+
+    def _has_changed(self, path):
+        """Check if a database file has changed since the records were created from it.
+
+        Returns a (changed, signature) :class:`tuple`. The `signature` is not :data:`None`
+        if the file was touched but the contents did not change, in which case the
+        signature of the file must be updated.
+        """
         try:
-            sheet = self._book.sheet_by_name(sheet_name)
-        except xlrd.XLRDError:
-            sheet = None
-
-        if sheet is None:
-            raise IOError('There is no Sheet named {!r} in {}'.format(sheet_name, path))
-
-        header = [val for val in sheet.row_values(0)]
-        rows = [[self._cell_convert(sheet.cell(r, c)) for c in range(sheet.ncols)] for r in range(1, sheet.nrows)]
-        logger.debug('Loading Sheet <{}> in {!r}'.format(sheet_name, path))
-        return header, rows
-
-    def _cell_convert(self, cell):
-        """Convert an Excel cell to the appropriate value and data type"""
-        t = cell.ctype
-        if t == xlrd.XL_CELL_NUMBER or t == xlrd.XL_CELL_BOOLEAN:
-            if int(cell.value) == cell.value:
-                return '{}'.format(int(cell.value))
-            else:
-                return '{}'.format(cell.value)
-        elif t == xlrd.XL_CELL_DATE:
-            date = xlrd.xldate_as_tuple(cell.value, self._book.datemode)
-            return datetime.date(date[0], date[1], date[2])
-        elif t == xlrd.XL_CELL_ERROR:
-            return xlrd.error_text_from_code[cell.value]
+            _, mtime, size, sha1 = self._signatures[path]
+        except KeyError:
+            return True, None
+        stat = os.stat(path)
+        if stat.st_mtime == mtime and stat.st_size == size:
+            return False, None
+        signature = _file_signature(path)
+        if signature[3] == sha1:
+            return False, signature
+        return True, None
+
+    def _snapshot_key(self, root, signatures):
+        """Returns the key that a snapshot must have to be valid for the databases that have the `signatures`"""
+        key = [_SNAPSHOT_VERSION]
+        for tag in ('connections', 'registers'):
+            for parent in root.findall(tag):
+                # the attributes of the XML elements affect how the records are created
+                key.append(ET.tostring(parent))
+                for element in parent:
+                    if element.tag in ('connection', 'register'):
+                        key.append(signatures[self._find_file(element)])
+        return key
+
+    def _load_snapshot(self, root):
+        """Load the ConnectionRecord's and EquipmentRecord's from a snapshot file.
+
+        Returns whether the records were loaded. A snapshot is only loaded if the
+        registers, the connection databases and the XML elements that specify
+        them have not changed since the snapshot was saved.
+        """
+        path = _cache.cache_path(root, self._config_path, '.snapshot')
+        if path is None or not os.path.isfile(path):
+            return False
+
+        try:
+            signatures = {}
+            for tag in ('connections/connection', 'registers/register'):
+                for element in root.findall(tag):
+                    path_db = self._find_file(element)
+                    if path_db not in signatures:
+                        signatures[path_db] = _file_signature(path_db)
+            connections, equipment, aliases, register_keys = _cache.load(path, self._snapshot_key(root, signatures))
+        except _cache.OutOfDateError:
+            logger.debug('The snapshot {!r} is out of date'.format(path))
+            return False
+        except Exception as e:
+            # the file is corrupt, is not trusted or was created by an incompatible version
+            logger.debug('Cannot load the snapshot {!r} -- {}: {}'.format(path, e.__class__.__name__, e))
+            return False
+
+        self._connection_records = connections
+        self._equipment_records = equipment
+        self._connection_aliases = aliases
+        self._register_keys = register_keys
+        self._signatures = signatures
+        logger.debug('Loaded the records from the snapshot {!r}'.format(path))
+        return True
+
+    def _save_snapshot(self, root, signatures):
+        """Save the ConnectionRecord's and EquipmentRecord's to a snapshot file.
+
+        The `signatures` of the files must have been captured before the files were
+        read, so that a file that changed while it was read makes the snapshot out of date.
+        """
+        path = _cache.cache_path(root, self._config_path, '.snapshot')
+        if path is None:
+            return
+
+        records = (self._connection_records, self._equipment_records,
+                   self._connection_aliases, self._register_keys)
+        try:
+            _cache.save(path, self._snapshot_key(root, signatures), records)
+        except (IOError, OSError, pickle.PicklingError) as e:
+            logger.warning('Cannot save the snapshot {!r} -- {}'.format(path, e))
         else:
-            return cell.value.strip()
+            logger.debug('Saved the records to the snapshot {!r}'.format(path))
 
-    def _read_text_based(self, path, delimiter, encoding):
-        """Read a text-based database file"""
-        with codecs.open(path, 'r', encoding) as fp:
-            header = [val for val in fp.readline().split(delimiter)]
-            rows = [[val.strip() for val in line.split(delimiter)] for line in fp.readlines() if line.strip()]
-        logger.debug('Loading database ' + path)
-        return header, rows
+    def _read(self, element, signatures=None):
+        """Read any allowed database file type.
+
+        If `signatures` is a :class:`dict` then the signature of the file, that is
+        captured before the file is read, is added to it (see :meth:`_has_changed`).
+        """
+        path = self._find_file(element)
+        try:
+            signature, data = self._prefetched.pop((path, element.findtext('sheet')))
+        except KeyError:
+            signature = None if signatures is None else _file_signature(path)
+            data = _read_file(path, element.findtext('sheet'), element.attrib.get('encoding'),
+                              self._config_path, element.attrib.get('reader'))
+        if signatures is not None and path not in signatures:
+            signatures[path] = signature
+        return data
+
+    def _prefetch(self, root):
+        """Read all databases concurrently if a <parallel_load> element is specified.
+
+        The header and rows of each database are stored in :attr:`_prefetched` so that
+        :meth:`_read` returns them. The records are still created serially (in the
+        order that the XML elements are defined) after all databases have been read.
+        """
+        self._prefetched = {}
+
+        element = root.find('parallel_load')
+        if element is None or not element.text:
+            return
+
+        mode = element.text.strip().lower()
+        if mode == 'thread':
+            executor_class = ThreadPoolExecutor
+        elif mode == 'process':
+            executor_class = ProcessPoolExecutor
+        elif mode in ('false', 'none', 'serial'):
+            return
+        else:
+            raise IOError('The <parallel_load> value must be "thread" or "process", got {!r}'.format(element.text))
+
+        workers = element.attrib.get('max_workers')
+        workers = int(workers) if workers else None
+
+        args, signatures = [], {}
+        for tag in ('connections/connection', 'registers/register'):
+            for item in root.findall(tag):
+                path = self._find_file(item)
+                key = (path, item.findtext('sheet'))
+                if key not in self._prefetched:
+                    self._prefetched[key] = None
+                    signatures[path] = _file_signature(path)
+                    args.append((path, item.findtext('sheet'), item.attrib.get('encoding'),
+                                 self._config_path, item.attrib.get('reader')))
+
+        if len(args) < 2:
+            self._prefetched.clear()
+            return
+
+        logger.debug('Reading {} databases using a {} pool'.format(len(args), mode))
+        with executor_class(max_workers=workers) as executor:
+            futures = [executor.submit(_read_file_rows, *a) for a in args]
+            for a, future in zip(args, futures):
+                # if an error occurred then raise it in the same order that
+                # it would have been raised if the databases were read serially
+                self._prefetched[a[:2]] = signatures[a[0]], future.result()
 
     def _make_index_map(self, header, field_names):
         """Determine the column index in the header that the field_names are located in"""
-        index_map = {}
-        h = [val.strip().lower().replace(' ', '_') for val in header]
-        for index, label in enumerate(h):
-            for name in field_names:
-                if name not in index_map and name in label:
-                    index_map[name] = index
-                    break
-        return index_map
+        return _make_index_map(header, field_names)
 
     def _make_key(self, row, index_map):
         """Make a new Manufacturer|Model|Serial key for a dictionary"""
@@ -456,49 +1788,100 @@ class Database(object):
             return False
         return True
 
-    def _search(self, record, kwargs, flags):
-        """Check if the kwargs match a database record"""
-        for key, value in kwargs.items():
-            if key == 'backend' or key == 'interface':
-                enum = constants.Backend if key == 'backend' else constants.MSLInterface
-                val = getattr(record, key)
-                if isinstance(value, int):
-                    if convert_to_enum(value, enum) != val:
-                        return False
+    def _run_query(self, query):
+        """Perform a :class:`Query` (the results are cached)"""
+        key = query._key
+        with self._results_lock:
+            generation = self._generation
+            if key is not None:
+                try:
+                    result = self._results.pop(key)
+                except KeyError:
+                    pass
                 else:
-                    x = []
-                    for s in value.split('|'):
-                        try:
-                            x.append(convert_to_enum(s.strip(), enum) == val)
-                        except ValueError:
-                            pass
-                    if not any(x):
-                        return False
-            elif key == 'connection':
-                if bool(value):
-                    # then want equipment records with a connection
-                    if record.connection is None:
-                        return False
-                else:
-                    if record.connection is not None:
-                        return False
-            elif key == 'date_calibrated':
-                if not callable(value):
-                    raise TypeError('The "date_calibrated" value must be a callable function')
-                if not value(record.date_calibrated):
-                    return False
-            elif key == 'calibration_cycle':
-                if value != record.calibration_cycle:
-                    return False
-            elif key == 'properties':
-                if not isinstance(value, dict):
-                    raise TypeError('The "properties" value must be a dict, got {}'.format(type(value)))
-                for k, v in value.items():
-                    if k not in record.properties:
-                        return False
-                    if v != record.properties[k]:
-                        return False
+                    self._results[key] = result  # the most-recently used result is at the end
+                    return list(result)
+
+        with self._records_lock:
+            if query._record_type is EquipmentRecord:
+                if self._equipment_index is None:
+                    self._equipment_index = _RecordIndex(list(self._equipment_records.values()),
+                                                         Database._EQUIPMENT_INDEX)
+                index = self._equipment_index
             else:
-                if not bool(re.search(value, getattr(record, key), flags)):
-                    return False
-        return True
+                if self._connection_index is None:
+                    self._connection_index = _RecordIndex(list(self._connection_records.values()),
+                                                          Database._CONNECTION_INDEX)
+                index = self._connection_index
+
+            positions = None
+            remaining = []
+            for name, (value, is_match) in query._criteria.items():
+                if name not in index.fields:
+                    remaining.append((name, is_match))
+                    continue
+                found = index.find(name, value, query._flags, is_match)
+                positions = found if positions is None else positions & found
+                if not positions:
+                    break
+
+            if positions is None:
+                candidates = index.records
+            else:
+                candidates = [index.records[i] for i in sorted(positions)]
+
+            result = [r for r in candidates
+                      if all(is_match(getattr(r, name)) for name, is_match in remaining)]
+
+        with self._results_lock:
+            # do not cache the result if the databases were reloaded while searching
+            if key is not None and generation == self._generation:
+                self._results[key] = tuple(result)
+                while len(self._results) > Database._RESULTS_MAXSIZE:
+                    self._results.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _compile_criterion(key, value, flags):
+        """Returns a function that checks if a search criterion matches the value of a record attribute.
+
+        This is the only place where a search criterion is evaluated. A pattern of the form
+        ``'^text$'`` (without flags) is an equality test so that the result is the same as
+        the lookup in a :class:`_RecordIndex`.
+        """
+        if key == 'connection':
+            if value:
+                return lambda attribute: attribute is not None
+            return lambda attribute: attribute is None
+        elif key == 'properties':
+            if not isinstance(value, dict):
+                raise TypeError('The "properties" value must be a dict, got {}'.format(type(value)))
+            items = list(value.items())
+            return lambda attribute: all(k in attribute and v == attribute[k] for k, v in items)
+        elif key == 'backend' or key == 'interface':
+            enum = constants.Backend if key == 'backend' else constants.MSLInterface
+            if isinstance(value, int):
+                members = frozenset((convert_to_enum(value, enum),))
+            else:
+                members = set()
+                for s in value.split('|'):
+                    try:
+                        members.add(convert_to_enum(s.strip(), enum))
+                    except ValueError:
+                        pass
+                members = frozenset(members)
+            return lambda attribute: attribute in members
+        elif key == 'date_calibrated':
+            if isinstance(value, (tuple, list)):
+                start, end = value
+                return lambda attribute: (start is None or attribute >= start) and (end is None or attribute <= end)
+            if not callable(value):
+                raise TypeError('The "date_calibrated" value must be a callable function')
+            return lambda attribute: bool(value(attribute))
+        elif key == 'calibration_cycle':
+            return lambda attribute: value == attribute
+        elif not flags and isinstance(value, str) and _exact_regex.match(value):
+            text = value[1:-1]
+            return lambda attribute: attribute == text
+        search = _compile(value, flags).search
+        return lambda attribute: search(attribute) is not None
@@ -22,6 +22,20 @@ class ResourceClassNotFound(MSLConnectionError):
         super(ResourceClassNotFound, self).__init__(msg)
 
 
+class ConnectAllError(MSLConnectionError):
+    """Exception if a connection to one or more equipment cannot be established by
+    :func:`~msl.equipment.factory.connect_all`."""
+
+    def __init__(self, errors, elapsed):
+        msg = 'Cannot connect to {} of the equipment\n'.format(len(errors))
+        msg += '\n'.join('  {}: {}: {}'.format(alias, e.__class__.__name__, e) for alias, e in errors.items())
+        super(ConnectAllError, self).__init__(msg)
+        self.errors = errors
+        """:class:`dict`: The exception that was raised for each alias that failed to connect."""
+        self.elapsed = elapsed
+        """:class:`dict`: The number of seconds that each connection attempt took."""
+
+
 class AvantesError(MSLConnectionError):
     """Exception for equipment from Avantes."""
 
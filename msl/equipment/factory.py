@@ -1,11 +1,13 @@
 """
 Establish a connection to the equipment.
 """
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from .config import Config
 from .constants import Backend, MSLInterface
-from .exceptions import ResourceClassNotFound
+from .exceptions import ResourceClassNotFound, ConnectAllError
 from .record_types import EquipmentRecord
 from .resources import find_resource_class
 from .resources.dmm import dmm_factory
@@ -18,7 +20,7 @@ from .connection_nidaq import ConnectionNIDAQ
 logger = logging.getLogger(__name__)
 
 
-def connect(record, demo=None):
+def connect(record, demo=None, pool=None):
     """Factory function to establish a connection to the equipment.
 
     Parameters
@@ -34,6 +36,11 @@ def connect(record, demo=None):
         If :data:`None` then the `demo` value is determined from the
         :attr:`~.config.Config.DEMO_MODE` attribute.
 
+    pool : :class:`~msl.equipment.pool.ConnectionPool`, optional
+        If specified then an existing connection to the equipment
+        is reused from the `pool` (a new connection is established
+        and added to the `pool` if one does not exist).
+
     Returns
     -------
     A :class:`~.connection.Connection` subclass.
@@ -97,7 +104,124 @@ def connect(record, demo=None):
 
     if isinstance(record, dict) and len(record) == 1:
         key = list(record.keys())[0]
-        return _connect(record[key])
+        record = record[key]
     elif isinstance(record, (list, tuple)) and len(record) == 1:
-        return _connect(record[0])
+        record = record[0]
+
+    if pool is not None:
+        return pool.connect(record, demo=demo)
     return _connect(record)
+
+
+class Connections(dict):
+
+    def __init__(self, connections, elapsed, errors):
+        """The connections that were established by :func:`connect_all`.
+
+        A :class:`dict` of the connections with the aliases as the keys.
+        """
+        super(Connections, self).__init__(connections)
+        self.elapsed = elapsed
+        """:class:`dict`: The number of seconds that it took to connect to each equipment."""
+        self.errors = errors
+        """:class:`dict`: The exception that was raised for each equipment that
+        failed to connect (only if `strict` was :data:`False`)."""
+
+
+def connect_all(records, demo=None, max_workers=None, pool=None, strict=True):
+    """Establish a connection to many equipment concurrently.
+
+    Each connection is established in a separate thread, so the time that
+    it takes to connect to all equipment is approximately the time that it
+    takes to connect to the slowest equipment.
+
+    Parameters
+    ----------
+    records : :class:`dict` or :class:`list` of :class:`~.record_types.EquipmentRecord`
+        The records to connect to. If a :class:`dict` then the keys are the aliases
+        (e.g., :attr:`.Database.equipment`), otherwise the
+        :attr:`~.record_types.EquipmentRecord.alias` of each record is used (or the
+        string representation of the record if it does not have an alias).
+    demo : :class:`bool`, optional
+        See :func:`connect`.
+    max_workers : :class:`int`, optional
+        The maximum number of threads to use. Default is to use the
+        default value of :class:`~concurrent.futures.ThreadPoolExecutor`
+        (but never more threads than there are `records`).
+    pool : :class:`~msl.equipment.pool.ConnectionPool`, optional
+        See :func:`connect`.
+    strict : :class:`bool`, optional
+        Whether to raise an exception if a connection cannot be established
+        to any of the equipment. If :data:`True` then the connections that
+        were successfully established are disconnected (or released back to
+        the `pool`) before the exception is raised. If :data:`False` then the
+        errors are available from the :attr:`Connections.errors` attribute.
+
+    Returns
+    -------
+    :class:`Connections`
+        The connections (a :class:`dict` with the aliases as the keys).
+
+    Raises
+    ------
+    ~msl.equipment.exceptions.ConnectAllError
+        If `strict` is :data:`True` and a connection cannot be established
+        to one or more of the equipment.
+    ValueError
+        If two records have the same alias.
+    """
+    if isinstance(records, dict):
+        items = list(records.items())
+    else:
+        items = []
+        aliases = set()
+        for record in records:
+            alias = getattr(record, 'alias', None) or str(record)
+            if alias in aliases:
+                raise ValueError('The alias {!r} is used by more than one record'.format(alias))
+            aliases.add(alias)
+            items.append((alias, record))
+
+    if demo is None:
+        demo = Config.DEMO_MODE
+
+    connections, elapsed, errors = {}, {}, {}
+    if not items:
+        return Connections(connections, elapsed, errors)
+
+    def _connect(record):
+        # returns (connection, elapsed, error)
+        t0 = time.time()
+        try:
+            return connect(record, demo=demo, pool=pool), time.time() - t0, None
+        except Exception as e:
+            return None, time.time() - t0, e
+
+    if max_workers is None:
+        max_workers = min(len(items), 32)
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(alias, executor.submit(_connect, record)) for alias, record in items]
+        for alias, future in futures:
+            if strict and errors and future.cancel():
+                continue  # do not start to connect to more equipment after an error
+            connection, elapsed[alias], error = future.result()
+            if error is None:
+                connections[alias] = connection
+                logger.debug('Connected to {!r} in {:.3f} seconds'.format(alias, elapsed[alias]))
+            else:
+                errors[alias] = error
+                logger.debug('Cannot connect to {!r} -- {}'.format(alias, error))
+    logger.debug('Connected to {} of {} equipment in {:.3f} seconds'.format(
+        len(connections), len(items), time.time() - t0))
+
+    if strict and errors:
+        for alias, connection in connections.items():
+            try:
+                connection.disconnect()  # a connection from a pool is released back to the pool
+            except Exception as e:
+                logger.warning('Cannot disconnect from {!r} -- {}'.format(alias, e))
+        raise ConnectAllError(errors, elapsed)
+
+    return Connections(connections, elapsed, errors)
@@ -0,0 +1,313 @@
+"""
+A pool of connections to the equipment that can be reused.
+"""
+import time
+import logging
+import threading
+
+from .record_types import EquipmentRecord
+
+logger = logging.getLogger(__name__)
+
+
+def is_alive(connection):
+    """The default health check of a :class:`ConnectionPool`.
+
+    Parameters
+    ----------
+    connection : :class:`~.connection.Connection`
+        A connection to the equipment.
+
+    Returns
+    -------
+    :class:`bool`
+        The value of :meth:`~.connection.Connection.is_alive`.
+    """
+    return connection.is_alive()
+
+
+class _Entry(object):
+
+    def __init__(self, connection):
+        """A connection in the pool."""
+        self.connection = connection
+        self.count = 0
+        self.idle_since = time.time()
+
+
+class _PooledConnection(object):
+
+    def __init__(self, pool, connection):
+        """A connection that was returned by :meth:`ConnectionPool.connect`.
+
+        All attributes are those of the `connection`, except that :meth:`disconnect`
+        (and exiting a ``with`` statement) releases the connection back to the `pool`
+        instead of disconnecting from the equipment, so that one user of a shared
+        connection cannot disconnect it for the other users.
+        """
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_connection', connection)
+        object.__setattr__(self, '_released', False)
+
+    @property
+    def __class__(self):
+        # so that isinstance() is the same as for the connection
+        return self._connection.__class__
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def __repr__(self):
+        return repr(self._connection)
+
+    def __str__(self):
+        return str(self._connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore):
+        self.disconnect()
+
+    def disconnect(self):
+        """Release the connection back to the pool (if it has not already been released)."""
+        if not self._released:
+            self._pool.release(self)
+
+
+class ConnectionPool(object):
+
+    def __init__(self, max_idle=60.0, health_check=is_alive):
+        """A pool of connections to the equipment.
+
+        A connection is shared by everything that requests a connection to
+        the same equipment record (the connection is reference counted). A
+        connection that is no longer in use stays open for `max_idle` seconds
+        so that it can be reused. There is no background thread, a connection
+        that has been idle for longer than `max_idle` seconds is disconnected the
+        next time that :meth:`connect`, :meth:`release` or :meth:`evict` is called.
+
+        Pass the pool to the :meth:`~.EquipmentRecord.connect` method, or to the
+        :func:`~msl.equipment.factory.connect` function, to use it, for example::
+
+            pool = ConnectionPool()
+            dmm = record.connect(pool=pool)
+            ...
+            dmm.disconnect()  # releases the connection back to the pool
+
+        Each call to :meth:`connect` returns a new object that behaves like the
+        connection, but calling its ``disconnect`` method (or using it in a ``with``
+        statement) is the same as calling :meth:`release`.
+
+        Parameters
+        ----------
+        max_idle : :class:`float`, optional
+            The number of seconds that a connection that is not in use can stay
+            open before it is disconnected. If :data:`None` then an idle
+            connection is only disconnected by :meth:`evict` or :meth:`close`.
+        health_check : :obj:`callable`, optional
+            A function that is called with an existing connection as the argument
+            before the connection is reused (by default, :meth:`~.connection.Connection.is_alive`
+            of the connection is called). If it returns :data:`False` then the
+            connection is disconnected and a new connection is established. If
+            :data:`None` then the connection is not checked.
+        """
+        self._max_idle = max_idle
+        self._health_check = health_check
+        self._entries = {}
+        self._keys = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return '{}<{} connections>'.format(self.__class__.__name__, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore):
+        self.close()
+
+    @staticmethod
+    def key(record, demo):
+        """The key of the `record` in the pool.
+
+        Parameters
+        ----------
+        record : :class:`~.record_types.EquipmentRecord`
+            An equipment record.
+        demo : :class:`bool`
+            Whether the connection is in demo mode.
+
+        Returns
+        -------
+        :class:`tuple`
+            The key.
+        """
+        if not isinstance(record, EquipmentRecord):
+            raise TypeError('The "record" argument must be a {}.{} object. Got {}'.format(
+                EquipmentRecord.__module__, EquipmentRecord.__name__, type(record)))
+        conn = record.connection
+        if conn is None:
+            return record.manufacturer, record.model, record.serial, None, bool(demo)
+        properties = tuple(sorted((key, repr(value)) for key, value in conn.properties.items()))
+        return (record.manufacturer, record.model, record.serial,
+                (conn.address, conn.backend, conn.interface, properties), bool(demo))
+
+    def connect(self, record, demo=None):
+        """Get a connection to the equipment from the pool.
+
+        A new connection is established if the pool does not contain
+        a connection to the equipment (or if the connection failed
+        the health check). Call :meth:`release` when you are done
+        with the connection.
+
+        Parameters
+        ----------
+        record : :class:`~.record_types.EquipmentRecord`
+            A record from an :ref:`equipment_database`.
+        demo : :class:`bool`, optional
+            See :func:`~msl.equipment.factory.connect`.
+
+        Returns
+        -------
+        A :class:`~.connection.Connection` subclass.
+            The connection. Calling its ``disconnect`` method releases it back to the pool.
+        """
+        from .config import Config
+        from .factory import connect  # import here to avoid circular imports
+
+        if demo is None:
+            demo = Config.DEMO_MODE
+
+        key = self.key(record, demo)
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._health_check is None or self._health_check(entry.connection):
+                    entry.count += 1
+                    logger.debug('reusing {!r} from the pool'.format(entry.connection))
+                    return _PooledConnection(self, entry.connection)
+                logger.debug('{!r} failed the health check'.format(entry.connection))
+                self._remove(key)
+
+        # the lock is not held while the connection is being established
+        connection = connect(record, demo=demo)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(connection)
+                self._entries[key] = entry
+                self._keys[id(connection)] = key
+            else:
+                # another thread established a connection at the same time
+                connection.disconnect()
+            entry.count += 1
+            return _PooledConnection(self, entry.connection)
+
+    def release(self, connection):
+        """Return a connection to the pool.
+
+        The connection is not disconnected until it has been idle for `max_idle` seconds.
+        Calling the ``disconnect`` method of the connection does the same.
+
+        Parameters
+        ----------
+        connection : :class:`~.connection.Connection`
+            A connection that was returned by :meth:`connect`.
+
+        Raises
+        ------
+        ValueError
+            If the `connection` is not in the pool or if it has already been released.
+        """
+        with self._lock:
+            pooled, connection = self._unwrap(connection)
+            key = self._keys.get(id(connection))
+            entry = None if key is None else self._entries[key]
+            if entry is None or entry.connection is not connection or \
+                    (pooled is not None and pooled._pool is not self):
+                raise ValueError('{!r} is not in the pool'.format(connection))
+            if entry.count == 0 or (pooled is not None and pooled._released):
+                raise ValueError('{!r} has already been released'.format(connection))
+            if pooled is not None:
+                object.__setattr__(pooled, '_released', True)
+            entry.count -= 1
+            if entry.count == 0:
+                entry.idle_since = time.time()
+            self._evict_expired()
+
+    def count(self, connection):
+        """Returns the number of times that a connection is in use.
+
+        Parameters
+        ----------
+        connection : :class:`~.connection.Connection`
+            A connection that was returned by :meth:`connect`.
+
+        Returns
+        -------
+        :class:`int`
+            The reference count (0 if the `connection` is idle or is not in the pool).
+        """
+        with self._lock:
+            connection = self._unwrap(connection)[1]
+            key = self._keys.get(id(connection))
+            if key is None or self._entries[key].connection is not connection:
+                return 0
+            return self._entries[key].count
+
+    def evict(self, idle=0):
+        """Disconnect the connections that are not in use.
+
+        Parameters
+        ----------
+        idle : :class:`float`, optional
+            Only disconnect the connections that have been idle for at least this number of seconds.
+
+        Returns
+        -------
+        :class:`int`
+            The number of connections that were disconnected.
+        """
+        with self._lock:
+            now = time.time()
+            keys = [key for key, entry in self._entries.items()
+                    if entry.count == 0 and now - entry.idle_since >= idle]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def close(self):
+        """Disconnect all connections (including the connections that are in use)."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    @staticmethod
+    def _unwrap(connection):
+        # returns the (_PooledConnection or None, Connection) tuple
+        if type(connection) is _PooledConnection:
+            return connection, connection._connection
+        return None, connection
+
+    def _evict_expired(self):
+        if self._max_idle is not None:
+            self.evict(self._max_idle)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        del self._keys[id(entry.connection)]
+        try:
+            entry.connection.disconnect()
+        except Exception as e:
+            logger.warning('error disconnecting {!r} -- {}'.format(entry.connection, e))
+        else:
+            logger.debug('removed {!r} from the pool'.format(entry.connection))
@@ -3,6 +3,7 @@ Records from :ref:`equipment_database`\'s or :ref:`connections_database`\'s.
 """
 from __future__ import unicode_literals
 import re
+import sys
 import logging
 import datetime
 from enum import Enum
@@ -24,11 +25,27 @@ from .constants import (
 
 logger = logging.getLogger(__name__)
 
+_MIN_DATE = datetime.date(datetime.MINYEAR, 1, 1)
+
 _interface_regex = re.compile(r'[+_A-Z]+')
 
 
+def _intern(value):
+    """Intern a :class:`str` so that many records can share the same object in memory."""
+    try:
+        return sys.intern(value)
+    except (AttributeError, TypeError):  # not a str or Python 2
+        return value
+
+
 class EquipmentRecord(object):
 
+    # Without a __dict__ each instance uses less memory, which is important
+    # since a Database can contain many EquipmentRecord's
+    __slots__ = ('_alias', '_calibration_cycle', '_category', '_connection', '_date_calibrated',
+                 '_description', '_latest_report_number', '_location', '_manufacturer', '_model',
+                 '_serial', '_team', '_user_defined')
+
     # Valid property names for an EquipmentRecord
     _NAMES = ['alias', 'calibration_cycle', 'category', 'connection',
               'date_calibrated', 'description', 'latest_report_number',
@@ -48,20 +65,20 @@ class EquipmentRecord(object):
         # The following attributes are NOT defined as fields in the equipment-register database
         self._alias = kwargs.get('alias', '')
         self._connection = None
-        self._team = kwargs.get('team', '')
-        self._user_defined = {}
+        self._team = _intern(kwargs.get('team', ''))
+        self._user_defined = None  # created when it is needed
 
         # The following attributes can be defined as fields in the equipment-register database
         # IMPORTANT: When a new attribute is added below remember to include it in
         #            "Field Names" section in docs/database.rst
         self._calibration_cycle = 0.0
-        self._category = kwargs.get('category', '')
-        self._date_calibrated = datetime.date(datetime.MINYEAR, 1, 1)
+        self._category = _intern(kwargs.get('category', ''))
+        self._date_calibrated = _MIN_DATE
         self._description = kwargs.get('description', '')
         self._latest_report_number = kwargs.get('latest_report_number', '')
-        self._location = kwargs.get('location', '')
-        self._manufacturer = kwargs.get('manufacturer', '')
-        self._model = kwargs.get('model', '')
+        self._location = _intern(kwargs.get('location', ''))
+        self._manufacturer = _intern(kwargs.get('manufacturer', ''))
+        self._model = _intern(kwargs.get('model', ''))
         self._serial = kwargs.get('serial', '')
 
         # date_calibrated
@@ -85,14 +102,11 @@ class EquipmentRecord(object):
 
         for name in kwargs:
             if name not in EquipmentRecord._NAMES:
-                self._user_defined[name] = kwargs[name]
+                self.user_defined[name] = kwargs[name]
 
         if 'connection' in kwargs:
             self.connection = kwargs['connection']
 
-        # the manufacturer, model and serial cannot change once an EquipmentRecord is created
-        self._str = 'EquipmentRecord<{}|{}|{}>'.format(self._manufacturer, self._model, self._serial)
-
     def __repr__(self):
         # the alias and the connection can be updated so we cannot cache the __repr__
         out = []
@@ -116,7 +130,7 @@ class EquipmentRecord(object):
         return '\n'.join(out)
 
     def __str__(self):
-        return self._str
+        return 'EquipmentRecord<{}|{}|{}>'.format(self._manufacturer, self._model, self._serial)
 
     @property
     def alias(self):
@@ -157,17 +171,22 @@ class EquipmentRecord(object):
 
         Parameters
         ----------
-        record : :class:`ConnectionRecord`
-            A connection record.
+        record : :class:`ConnectionRecord` or :data:`None`
+            A connection record. If :data:`None` then the equipment no longer
+            has a connection record.
 
         Raises
         ------
         TypeError
-            If `connection_record` is not of type :class:`ConnectionRecord`.
+            If `record` is not of type :class:`ConnectionRecord` or :data:`None`.
         ValueError
             If any of the `manufacturer`, `model`, `serial` values in `record`
             are defined and they do not match those values in this :class:`EquipmentRecord`.
         """
+        if record is None:
+            self._connection = None
+            return
+
         if not isinstance(record, ConnectionRecord):
             raise TypeError('Must pass in a ConnectionRecord object')
 
@@ -249,9 +268,11 @@ class EquipmentRecord(object):
             {'chocolate': 'sugar', 'one': 1}
 
         """
+        if self._user_defined is None:
+            self._user_defined = {}
         return self._user_defined
 
-    def connect(self, demo=None):
+    def connect(self, demo=None, pool=None):
         """Establish a connection to the equipment.
 
         Calls the :func:`~msl.equipment.factory.connect` function.
@@ -265,13 +286,16 @@ class EquipmentRecord(object):
 
             If :data:`None` then the `demo` value is determined from the
             :attr:`~.config.Config.DEMO_MODE` attribute.
+        pool : :class:`~msl.equipment.pool.ConnectionPool`, optional
+            If specified then an existing connection to the equipment
+            is reused from the `pool`.
 
         Returns
         -------
         A :class:`~msl.equipment.connection.Connection` subclass.
         """
         from msl.equipment import factory  # import here to avoid circular imports
-        return factory.connect(self, demo)
+        return factory.connect(self, demo, pool)
 
     def is_calibration_due(self, months=0):
         """Whether the equipment needs to be re-calibrated.
@@ -329,7 +353,7 @@ class EquipmentRecord(object):
             'model': self._model,
             'serial': self._serial,
             'team': self._team,
-            'user_defined': self._user_defined,
+            'user_defined': self.user_defined,
         }
 
     def to_xml(self):
@@ -379,6 +403,8 @@ class EquipmentRecord(object):
 
 class ConnectionRecord(object):
 
+    __slots__ = ('_address', '_backend', '_interface', '_manufacturer', '_model', '_properties', '_serial')
+
     # Valid property names for a ConnectionRecord
     _NAMES = ['address', 'backend', 'interface', 'manufacturer', 'model', 'properties', 'serial']
 
@@ -405,9 +431,9 @@ class ConnectionRecord(object):
         #            "Field Names" section in docs/database.rst
         self._address = kwargs.get('address', '')
         self._backend = Backend.UNKNOWN
-        self._manufacturer = kwargs.get('manufacturer', '')
-        self._model = kwargs.get('model', '')
-        self._properties = {}
+        self._manufacturer = _intern(kwargs.get('manufacturer', ''))
+        self._model = _intern(kwargs.get('model', ''))
+        self._properties = None  # created when it is needed
         self._serial = kwargs.get('serial', '')
 
         # update the backend
@@ -446,11 +472,11 @@ class ConnectionRecord(object):
             pass
 
         if self._address.startswith('UDP'):
-            self._properties['socket_type'] = 'SOCK_DGRAM'
+            self.properties['socket_type'] = 'SOCK_DGRAM'
 
         for name in kwargs:
             if name not in ConnectionRecord._NAMES:
-                self._properties[name] = kwargs[name]
+                self.properties[name] = kwargs[name]
 
     def __repr__(self):
         out = []
@@ -508,13 +534,15 @@ class ConnectionRecord(object):
 
         See the :ref:`connections_database` for examples on how to set the `properties`.
         """
+        if self._properties is None:
+            self._properties = {}
         return self._properties
 
     @properties.setter
     def properties(self, props):
         if not isinstance(props, dict):
             raise TypeError('The "properties" must be a dictionary')
-        self._properties = props.copy()
+        self._properties = props.copy() if props else None
 
         # update the Enums for a SERIAL connection
         is_serial = self._interface == MSLInterface.SERIAL
@@ -560,7 +588,7 @@ class ConnectionRecord(object):
             'interface': self._interface,
             'manufacturer': self._manufacturer,
             'model': self._model,
-            'properties': self._properties,
+            'properties': self.properties,
             'serial': self._serial,
         }
 
@@ -1,34 +1,52 @@
 """
 MSL resources for connecting to equipment.
 """
-import os
 import re
-import fnmatch
+import sys
 import logging
 import importlib
+import threading
+from collections import namedtuple
 
 from ..record_types import EquipmentRecord, ConnectionRecord
+from ._manifest import MANIFEST
 
 _logger = logging.getLogger(__name__)
 
 _registry = []
 
+# the resource that was found for a (manufacturer, model, resource_class_name) key
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0}
+_CACHE_MAXSIZE = 1024
+
+# built from the registry when a lookup is not in the cache, see _build_dispatch()
+_dispatch = None
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses currsize maxsize')
+
 
 class _Resource(object):
 
-    def __init__(self, manufacturer, model, flags, cls):
+    def __init__(self, manufacturer, model, flags, cls=None, module=None, name=None):
+        """A resource class in the registry.
+
+        A resource class from the manifest is only imported when it is
+        requested (i.e., the `cls` is :data:`None` until :meth:`load` is called).
+        """
         self.manufacturer = re.compile(manufacturer, flags)
         self.model = re.compile(model, flags)
         self.cls = cls
+        self.module = cls.__module__ if module is None else module
+        self.name = cls.__name__ if name is None else name
 
-    def is_match(self, record, name):
-        if name is not None:
-            return self.cls.__name__ == name
-        if not self.manufacturer or not self.model:
-            return False
-        if not self.manufacturer.search(record.manufacturer):
-            return False
-        return self.model.search(record.model)
+    def load(self):
+        """Import the module of the resource class (if necessary) and return the class."""
+        if self.cls is None:
+            module = importlib.import_module(self.module)
+            self.cls = getattr(module, self.name)
+        return self.cls
 
 
 def register(manufacturer, model, flags=0):
@@ -44,15 +62,73 @@ def register(manufacturer, model, flags=0):
         The flags to use for the regex pattern.
     """
     def cls(obj):
-        _registry.append(_Resource(manufacturer, model, flags, obj))
-        _logger.debug('added {} to the registry'.format(obj))
+        for resource in _registry:
+            if resource.cls is None and resource.module == obj.__module__ and resource.name == obj.__name__:
+                # a resource class from the manifest was imported
+                if resource.manufacturer.pattern != manufacturer or resource.model.pattern != model \
+                        or resource.manufacturer.flags != re.compile(manufacturer, flags).flags:
+                    _logger.warning('the manifest is out of date for {}, run: python setup.py manifest'.format(obj))
+                    resource.manufacturer = re.compile(manufacturer, flags)
+                    resource.model = re.compile(model, flags)
+                    _cache_clear()
+                resource.cls = obj
+                break
+        else:
+            _registry.append(_Resource(manufacturer, model, flags, cls=obj))
+            _logger.debug('added {} to the registry'.format(obj))
+            _cache_clear()
         return obj
     return cls
 
 
+def _build_dispatch():
+    """Build the structures that :func:`find_resource_class` uses to search the registry.
+
+    Returns a (names, manufacturers, index) tuple. The `names` is a :class:`dict` of the
+    resource class names, `manufacturers` are the distinct manufacturer patterns and
+    `index` is a :class:`list` of (resource, position) tuples, in the order of the registry,
+    where `position` is the item in `manufacturers` of the manufacturer pattern of the resource.
+    """
+    names, manufacturers, index, positions = {}, [], [], {}
+    for resource in _registry:
+        names.setdefault(resource.name, resource)
+        key = (resource.manufacturer.pattern, resource.manufacturer.flags)
+        if key not in positions:
+            positions[key] = len(manufacturers)
+            manufacturers.append(resource.manufacturer)
+        index.append((resource, positions[key]))
+    return names, manufacturers, index
+
+
+def _lookup(manufacturer, model, name):
+    global _dispatch
+    dispatch = _dispatch
+    if dispatch is None:
+        with _cache_lock:
+            if _dispatch is None:
+                _dispatch = _build_dispatch()
+            dispatch = _dispatch
+
+    names, manufacturers, index = dispatch
+    if name is not None:
+        return names.get(name)
+
+    # each distinct manufacturer pattern is only searched once and
+    # a model pattern is only searched if the manufacturer matches
+    matches = [regex.search(manufacturer) is not None for regex in manufacturers]
+    for resource, i in index:
+        if matches[i] and resource.model.search(model):
+            return resource
+    return None
+
+
 def find_resource_class(record):
     """Find the resource class for this `record`.
 
+    Only the module that contains the resource class is imported. The result
+    is cached for the manufacturer, model and ``resource_class_name`` of the
+    `record`, see :func:`cache_info`.
+
     Parameters
     ----------
     record : :class:`~.record_types.EquipmentRecord` or :class:`~.record_types.ConnectionRecord`
@@ -69,20 +145,81 @@ def find_resource_class(record):
         raise TypeError('Must pass in an EquipmentRecord or a ConnectionRecord')
     if isinstance(record, EquipmentRecord):
         record = record.connection
-    for resource in _registry:
-        if resource.is_match(record, record.properties.get('resource_class_name')):
-            return resource.cls
-    return None
 
+    key = (record.manufacturer, record.model, record.properties.get('resource_class_name'))
+    try:
+        resource = _cache[key]
+    except KeyError:
+        resource = _lookup(*key)
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+            if len(_cache) >= _CACHE_MAXSIZE:
+                _cache.clear()
+            _cache[key] = resource
+    else:
+        with _cache_lock:
+            _cache_stats['hits'] += 1
 
-# import all submodules to register all resources in the subpackages
-for root, dirs, files in os.walk(os.path.dirname(__file__)):
-    root_pkg = __name__ + root.replace(os.path.sep, '.').split(__name__)[1]
-    for filename in fnmatch.filter(files, '*.py'):  # ignore .pyc files
-        if not filename == '__init__.py':  # these files get imported automatically
-            importlib.import_module(root_pkg + '.' + filename[:-3])
+    if resource is None:
+        return None
+    return resource.load()
 
 
-from .avantes import Avantes
-from .nkt import NKT
-from .princeton_instruments import PrincetonInstruments
+def cache_info():
+    """Returns the statistics of the cache that :func:`find_resource_class` uses.
+
+    Returns
+    -------
+    :class:`CacheInfo`
+        A named tuple with the `hits`, `misses`, `currsize` and `maxsize` of the cache.
+    """
+    with _cache_lock:
+        return CacheInfo(_cache_stats['hits'], _cache_stats['misses'], len(_cache), _CACHE_MAXSIZE)
+
+
+def _cache_clear():
+    # the registry changed
+    global _dispatch
+    with _cache_lock:
+        _cache.clear()
+        _dispatch = None
+
+
+def cache_clear():
+    """Clear the cache (and the statistics) that :func:`find_resource_class` uses."""
+    _cache_clear()
+    with _cache_lock:
+        _cache_stats['hits'] = 0
+        _cache_stats['misses'] = 0
+
+
+# the resource classes in the subpackages are registered from the manifest (which is
+# generated by "python setup.py manifest") so that a module is only imported when needed
+for _module, _name, _manufacturer, _model, _flags in MANIFEST:
+    _registry.append(_Resource(_manufacturer, _model, _flags, module=_module, name=_name))
+
+# the classes that are available as attributes of this package
+_ATTRIBUTES = {
+    'Avantes': 'avantes',
+    'NKT': 'nkt',
+    'PrincetonInstruments': 'princeton_instruments',
+}
+
+
+def __getattr__(name):
+    """Import a subpackage (or a class in :data:`_ATTRIBUTES`) when it is first accessed (Python 3.7+)."""
+    if name in _ATTRIBUTES:
+        return getattr(importlib.import_module(__name__ + '.' + _ATTRIBUTES[name]), name)
+    try:
+        return importlib.import_module(__name__ + '.' + name)
+    except ImportError as e:
+        if e.name != __name__ + '.' + name:
+            raise  # the subpackage exists but it imports a module that is not installed
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+if sys.version_info[:2] < (3, 7):
+    # a module-level __getattr__ is not supported
+    from .avantes import Avantes
+    from .nkt import NKT
+    from .princeton_instruments import PrincetonInstruments
@@ -0,0 +1,34 @@
+"""
+The resource classes that are registered in the **msl.equipment.resources** package.
+
+This file is generated by running ``python setup.py manifest``. Do not edit it.
+"""
+
+# (module, class name, manufacturer regex, model regex, regex flags)
+MANIFEST = [
+    ('msl.equipment.resources.avantes.avaspec', 'Avantes', 'Avantes', '.', 0),
+    ('msl.equipment.resources.bentham.benhw64', 'Bentham', 'Bentham', '[D]*TMc300', 0),
+    ('msl.equipment.resources.cmi.sia3', 'SIA3', 'C.*M.*I', 'SIA3', 0),
+    ('msl.equipment.resources.electron_dynamics.tc_series', 'TCSeries', 'Electron Dynamics', 'TC\\s*[M|L]', 2),
+    ('msl.equipment.resources.nkt.nktpdll', 'NKT', '^NKT', '.', 0),
+    ('msl.equipment.resources.omega.ithx', 'iTHX', 'OMEGA', 'iTHX-[2DMSW][3D]*', 2),
+    ('msl.equipment.resources.optosigma.shot702', 'SHOT702', 'Opto\\s*Sigma|Sigma\\s*Koki', 'SHOT-702', 0),
+    ('msl.equipment.resources.picotech.pt104', 'PT104', 'Pico\\s*Tech', 'PT[-]?104', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps2000', 'PicoScope2000', 'Pico\\s*Tech', '2[12]0[2345]A*(?<!MSO)$', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps2000a', 'PicoScope2000A', 'Pico\\s*Tech', '240[5678][AB]|220(5A MSO|5 MSO|6|7|8)', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps3000', 'PicoScope3000', 'Pico\\s*Tech', '3[24][02][456](?<! MSO)$', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps3000a', 'PicoScope3000A', 'Pico\\s*Tech', '3\\d{3}[ABD\\s]', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps4000', 'PicoScope4000', 'Pico\\s*Tech', '4[24][26][24]', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps4000a', 'PicoScope4000A', 'Pico\\s*Tech', '4(44|82)4', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps5000', 'PicoScope5000', 'Pico\\s*Tech', '5\\d{3}(?<!A|B)$', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps5000a', 'PicoScope5000A', 'Pico\\s*Tech', '5\\d{3}[AB]', 0),
+    ('msl.equipment.resources.picotech.picoscope.ps6000', 'PicoScope6000', 'Pico\\s*Tech', '6\\d{3}', 0),
+    ('msl.equipment.resources.princeton_instruments.arc_instrument', 'PrincetonInstruments', 'Princeton Instruments', '.', 0),
+    ('msl.equipment.resources.thorlabs.fwxx2c', 'FilterWheelXX2C', 'Thorlabs', 'FW(10|21)2C', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.benchtop_stepper_motor', 'BenchtopStepperMotor', 'Thorlabs', 'BSC(101|102|103|201|202|203)', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.filter_flipper', 'FilterFlipper', 'Thorlabs', 'MFF10[1|2]', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.integrated_stepper_motors', 'IntegratedStepperMotors', 'Thorlabs', '(LTS(150|300)|MLJ(050|150)|K10CR1)', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.kcube_dc_servo', 'KCubeDCServo', 'Thorlabs', 'KDC101', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.kcube_solenoid', 'KCubeSolenoid', 'Thorlabs', 'KSC101', 0),
+    ('msl.equipment.resources.thorlabs.kinesis.kcube_stepper_motor', 'KCubeStepperMotor', 'Thorlabs', 'KST101', 0),
+]
@@ -292,6 +292,13 @@ class iTHX(ConnectionSocket):
         db.close()
         return data
 
+    def _ascii_values(self, message, dtype, separator):
+        # the values in a reply are separated by either ',' or ';'
+        for character in (',', ';'):
+            if character != separator:
+                message = message.replace(character, separator)
+        return super(iTHX, self)._ascii_values(message, dtype, separator)
+
     def _get(self, message, probe, size=None):
         if not 1 <= probe <= 3:
             self.raise_exception('Invalid probe number, {}. Must be either 1, 2, or 3'.format(probe))
@@ -301,7 +308,7 @@ class iTHX(ConnectionSocket):
             command += str(probe)
 
         try:
-            ret = self.query(command, size=size)
+            values = self.query_ascii_values(command, separator=',', size=size)
         except ConnectionResetError:
             # for some reason the socket closes if a certain amount of time passes and no
             # messages have been sent. For example, querying the temperature, humidity and
@@ -310,8 +317,7 @@ class iTHX(ConnectionSocket):
             self._connect()  # reconnect
             return self._get(message, probe, size=size)  # retry
         else:
-            values = tuple(float(v) for v in re.split(r'[,;]', ret))
             if len(values) == 1:
-                return values[0]
+                return values.item()
             else:
-                return values
+                return tuple(values.tolist())
@@ -120,13 +120,10 @@ class PicoScope(ConnectionSDK):
 
         # set the PicoScope SDK function signatures
         self._func_ptrs = func_ptrs
-        for item in func_ptrs:
-            name, alias, res, err, args = item
-            func = getattr(self.sdk, name)
-            func.restype = res
-            if err is not None:
-                func.errcheck = getattr(self, err)
-            func.argtypes = [value[0] for value in args]
+        funcs = self.set_function_prototypes(
+            ((name, res, err, [value[0] for value in args]) for name, alias, res, err, args in func_ptrs))
+        for name, alias, res, err, args in func_ptrs:
+            func = funcs[name]
             # The following allows for code re-usability by solving the "problem" that
             # the SDK functions have a different name but do the same task. A
             # solution is to use the 'alias' that was created to call each SDK function.
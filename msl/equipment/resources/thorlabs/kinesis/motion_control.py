@@ -104,15 +104,8 @@ class MotionControl(ConnectionSDK):
         super(MotionControl, self).__init__(record, 'cdll')
         self.set_exception_class(ThorlabsError)
 
-        for item in api_function:
-            try:
-                func = getattr(self.sdk, item[0])
-            except AttributeError as e:
-                self.log_debug('{0} {1}'.format(self, e))
-            else:
-                func.restype = item[1]
-                func.errcheck = getattr(self, item[2])
-                func.argtypes = [v[0] for v in item[3]]
+        self.set_function_prototypes(
+            ((item[0], item[1], item[2], [v[0] for v in item[3]]) for item in api_function), strict=False)
 
         self._serial = record.serial.encode('utf-8')
 
@@ -75,6 +75,69 @@ class BuildDocs(Command):
         sys.exit(0)
 
 
+class ResourcesManifest(Command):
+    """
+    A custom command that generates the manifest of the resource classes that are
+    registered in the msl.equipment.resources package. The source files are parsed
+    (the resource modules are not imported) to find the classes that use the
+    @register decorator.
+    """
+    description = 'generates msl/equipment/resources/_manifest.py'
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        import os
+        import ast
+
+        entries = []
+        for root, dirs, files in os.walk(os.path.join('msl', 'equipment', 'resources')):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.endswith('.py') or filename.startswith('_'):
+                    continue
+                path = os.path.join(root, filename)
+                module = path[:-3].replace(os.sep, '.')
+                with open(path, 'rb') as fp:
+                    tree = ast.parse(fp.read(), path)
+                for node in tree.body:
+                    if not isinstance(node, ast.ClassDef):
+                        continue
+                    for decorator in node.decorator_list:
+                        if not isinstance(decorator, ast.Call) or getattr(decorator.func, 'id', None) != 'register':
+                            continue
+                        kwargs = dict(zip(('manufacturer', 'model', 'flags'), decorator.args))
+                        kwargs.update((keyword.arg, keyword.value) for keyword in decorator.keywords)
+                        values = dict((key, eval(compile(ast.Expression(value), path, 'eval'), {'re': re}))
+                                      for key, value in kwargs.items())
+                        entries.append((module, node.name, values['manufacturer'],
+                                        values['model'], int(values.get('flags', 0))))
+
+        lines = [
+            '"""',
+            'The resource classes that are registered in the **msl.equipment.resources** package.',
+            '',
+            'This file is generated by running ``python setup.py manifest``. Do not edit it.',
+            '"""',
+            '',
+            '# (module, class name, manufacturer regex, model regex, regex flags)',
+            'MANIFEST = [',
+        ]
+        for entry in entries:
+            lines.append('    ({!r}, {!r}, {!r}, {!r}, {!r}),'.format(*entry))
+        lines.append(']')
+
+        path = os.path.join('msl', 'equipment', 'resources', '_manifest.py')
+        with open(path, 'w') as fp:
+            fp.write('\n'.join(lines) + '\n')
+        print('wrote {} resource classes to {}'.format(len(entries), path))
+
+
 def read(filename):
     with open(filename) as fp:
         text = fp.read()
@@ -94,6 +157,7 @@ install_requires = [
     'python-dateutil',
     'xlrd',
     'enum34;python_version<"3.4"',
+    'futures;python_version<"3.2"',
 ]
 
 testing = {'test', 'tests', 'pytest'}.intersection(sys.argv)
@@ -129,9 +193,9 @@ setup(
         'Topic :: Scientific/Engineering :: Physics',
     ],
     setup_requires=sphinx + pytest_runner,
-    tests_require=['pytest-cov', 'pytest', 'nidaqmx', 'pyvisa>=1.6', 'pyvisa-py'] + install_requires,
+    tests_require=['pytest-cov', 'pytest', 'nidaqmx', 'openpyxl', 'pyvisa>=1.6', 'pyvisa-py'] + install_requires,
     install_requires=install_requires,
-    cmdclass={'docs': BuildDocs, 'apidocs': ApiDocs},
+    cmdclass={'docs': BuildDocs, 'apidocs': ApiDocs, 'manifest': ResourcesManifest},
     packages=find_packages(include=('msl*',)),
     include_package_data=True,
 )
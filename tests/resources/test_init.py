@@ -1,4 +1,10 @@
+import os
+import sys
+import importlib
+import subprocess
+
 from msl.equipment import resources, Backend, ConnectionRecord
+from msl.equipment.resources._manifest import MANIFEST
 
 
 def test_find_resource_class():
@@ -139,3 +145,108 @@ def test_find_resource_class():
     record = ConnectionRecord(manufacturer='Princeton Instruments', model='does not matter!', backend=Backend.MSL)
     cls = resources.find_resource_class(record)
     assert cls == resources.princeton_instruments.arc_instrument.PrincetonInstruments
+
+
+def test_resources_are_imported_lazily():
+    code = 'import sys\n' \
+           'import msl.equipment.factory\n' \
+           'print(sorted(m for m in sys.modules if m.startswith("msl.equipment.resources.")))'
+    out = subprocess.check_output([sys.executable, '-c', code]).decode()
+    assert 'kinesis' not in out
+    assert 'picoscope' not in out
+
+    code = 'import sys\n' \
+           'from msl.equipment import resources, ConnectionRecord, Backend\n' \
+           'record = ConnectionRecord(manufacturer="Thorlabs", model="FW102C", backend=Backend.MSL)\n' \
+           'assert resources.find_resource_class(record).__name__ == "FilterWheelXX2C"\n' \
+           'print(sorted(m for m in sys.modules if m.startswith("msl.equipment.resources.")))'
+    out = subprocess.check_output([sys.executable, '-c', code]).decode()
+    assert 'msl.equipment.resources.thorlabs.fwxx2c' in out
+    assert 'picoscope' not in out
+
+
+def test_manifest_is_up_to_date(caplog):
+    # import every resource module (which is what happened before the manifest was used)
+    root = os.path.dirname(resources.__file__)
+    for path, dirs, files in os.walk(root):
+        package = resources.__name__ + path[len(root):].replace(os.sep, '.')
+        for filename in files:
+            if filename.endswith('.py') and not filename.startswith('_'):
+                importlib.import_module(package + '.' + filename[:-3])
+
+    # every resource class is in the manifest with the same regex patterns
+    assert 'manifest is out of date' not in caplog.text
+    assert len(resources._registry) == len(MANIFEST)
+    for resource, (module, name, manufacturer, model, flags) in zip(resources._registry, MANIFEST):
+        assert resource.cls is not None
+        assert resource.cls.__module__ == module
+        assert resource.cls.__name__ == name
+
+
+def test_find_resource_class_cache(monkeypatch):
+    monkeypatch.setattr(resources, '_registry', list(resources._registry))
+    resources.cache_clear()
+    assert resources.cache_info() == (0, 0, 0, resources._CACHE_MAXSIZE)
+
+    record = ConnectionRecord(manufacturer='Thorlabs', model='FW212C', backend=Backend.MSL)
+    for i in range(5):
+        assert resources.find_resource_class(record).__name__ == 'FilterWheelXX2C'
+    assert resources.find_resource_class(ConnectionRecord(manufacturer='XXX', model='FW212C')) is None
+    assert resources.find_resource_class(ConnectionRecord(manufacturer='XXX', model='FW212C')) is None
+    info = resources.cache_info()
+    assert info.hits == 5
+    assert info.misses == 2
+    assert info.currsize == 2
+
+    # registering a resource class invalidates the cache
+    @resources.register(manufacturer=r'X{3}', model=r'FW(10|21)2C')
+    class NewFilterWheel(object):
+        pass
+
+    assert resources.cache_info().currsize == 0
+    assert resources.find_resource_class(ConnectionRecord(manufacturer='XXX', model='FW212C')) is NewFilterWheel
+    assert resources.find_resource_class(record).__name__ == 'FilterWheelXX2C'
+
+    # the resource_class_name is part of the key
+    record = ConnectionRecord(manufacturer='Thorlabs', model='FW212C', resource_class_name='NewFilterWheel')
+    assert resources.find_resource_class(record) is NewFilterWheel
+    record = ConnectionRecord(manufacturer='Thorlabs', model='FW212C', resource_class_name='Invalid')
+    assert resources.find_resource_class(record) is None
+
+    resources.cache_clear()
+    assert resources.cache_info() == (0, 0, 0, resources._CACHE_MAXSIZE)
+
+
+def test_find_resource_class_dispatch():
+    # the same resource is found as when every resource in the registry is checked in order
+    resources.cache_clear()
+    manufacturers = ['Thorlabs', 'Pico Technology', 'NKT Photonics', 'Photonics NKT', 'omega', 'OMEGA',
+                     'Sigma Koki', 'Electron Dynamics Ltd', 'CMI', 'Avantes', 'Princeton Instruments', '']
+    models = ['FW102C', '2205A', '2205A MSO', '3204', '3404 MSO', '3204A', '4262', '4824', '5242',
+              '5242A', '6403', 'iTHX-W3', 'ithx-sd', 'TC M', 'tcl', 'KDC101', 'K10CR1', 'PT-104', 'SIA3', '']
+    found = 0
+    for manufacturer in manufacturers:
+        for model in models:
+            expected = None
+            for resource in resources._registry:
+                if resource.manufacturer.search(manufacturer) and resource.model.search(model):
+                    expected = resource
+                    break
+            assert resources._lookup(manufacturer, model, None) is expected
+            found += expected is not None
+    assert found > 20
+    resources.cache_clear()
+
+
+def test_find_resource_class_dispatch_registry_modified():
+    # the dispatch index does not depend on the positions of the items in the registry
+    resources.cache_clear()
+    expected = resources._lookup('Thorlabs', 'FW102C', None)
+    assert expected is not None
+    resource = resources._Resource(r'^Nothing$', r'^Nothing$', 0, module='module', name='Nothing')
+    resources._registry.insert(0, resource)
+    try:
+        assert resources._lookup('Thorlabs', 'FW102C', None) is expected
+    finally:
+        resources._registry.remove(resource)
+    resources.cache_clear()
@@ -0,0 +1,54 @@
+import threading
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend
+
+
+def test_ithx_replies():
+    # the format of the replies are from the iTHX manual
+    replies = {
+        b'*SRTC': b'019.4\r',
+        b'*SRH2': b'057.0\r',
+        b'*SRB': b'019.4\r,057.0\r',
+        b'*SRD': b'010.1\r',
+        b'*SRTF3': b'066.9\r',
+    }
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                self.wfile.write(replies[line.rstrip()])
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever)
+    t.start()
+
+    try:
+        dev = EquipmentRecord(manufacturer='OMEGA', model='iTHX-W3', connection=ConnectionRecord(
+            address='TCP::127.0.0.1::{}'.format(server.server_address[1]),
+            backend=Backend.MSL,
+            properties={'read_termination': '\r', 'write_termination': '\n', 'timeout': 5},
+        )).connect(demo=False)
+
+        t_c = dev.temperature()
+        assert isinstance(t_c, float)
+        assert t_c == 19.4
+        assert dev.humidity(probe=2) == 57.0
+        assert dev.temperature_humidity() == (19.4, 57.0)
+        assert dev.dewpoint() == 10.1
+        assert dev.temperature(probe=3, celsius=False) == 66.9
+
+        # the values are found for any separator
+        for separator in (',', ';', ' '):
+            values = dev.query_ascii_values('*SRB', separator=separator, size=13)
+            assert values.tolist() == [19.4, 57.0]
+
+        dev.disconnect()
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
@@ -1,4 +1,5 @@
 import os
+import time
 
 import pytest
 
@@ -63,3 +64,81 @@ def test_config_constants_reloaded():
     Config.DEMO_MODE = False
     assert Config.PyVISA_LIBRARY == '@ni'
     assert not Config.DEMO_MODE
+
+
+def test_config_compiled_cache(tmpdir, monkeypatch):
+    from msl.equipment import config
+
+    monkeypatch.setattr(Config, 'PATH', [])
+    monkeypatch.setattr(Config, 'DEMO_MODE', False)
+    monkeypatch.setenv('PATH', os.environ['PATH'])
+    monkeypatch.setattr(config, '_compiled', {})
+
+    walked = []
+
+    def walk(top):
+        walked.append(top)
+        for item in original_walk(top):
+            yield item
+
+    original_walk = os.walk
+    monkeypatch.setattr(os, 'walk', walk)
+
+    root = os.path.join(str(tmpdir), 'sdk')
+    os.makedirs(os.path.join(root, 'a', 'b'))
+    os.makedirs(os.path.join(root, 'c'))
+    path = os.path.join(str(tmpdir), 'config.xml')
+    with open(path, 'w') as fp:
+        fp.write('<msl><demo_mode>true</demo_mode><database_cache>cache</database_cache>'
+                 '<path recursive="true">{}</path></msl>'.format(root))
+
+    expected = [root, os.path.join(root, 'a'), os.path.join(root, 'a', 'b'), os.path.join(root, 'c')]
+
+    Config(path)
+    assert Config.DEMO_MODE
+    assert sorted(Config.PATH) == sorted(expected)
+    assert walked == [root]
+
+    # the paths are not appended again
+    Config(path)
+    Config(path)
+    assert sorted(Config.PATH) == sorted(expected)
+    environ = os.environ['PATH'].split(os.pathsep)
+    assert all(environ.count(p) == 1 for p in expected)
+    assert walked == [root]  # from the compiled configurations of this process
+
+    # from the compiled-configuration file
+    config._compiled.clear()
+    Config.DEMO_MODE = False
+    Config(path)
+    assert Config.DEMO_MODE
+    assert walked == [root]
+    assert [f.endswith('.config') for f in os.listdir(os.path.join(str(tmpdir), 'cache'))] == [True]
+
+    # a sub-folder is added to the root directory
+    os.makedirs(os.path.join(root, 'd'))
+    config._compiled.clear()
+    Config(path)
+    assert walked == [root, root]
+    assert os.path.join(root, 'd') in Config.PATH
+
+    # the configuration file is modified
+    time.sleep(0.01)
+    with open(path, 'w') as fp:
+        fp.write('<msl><database_cache>cache</database_cache><path>{}</path></msl>'.format(root))
+    config._compiled.clear()
+    Config(path)
+    assert walked == [root, root]
+
+    # a (non-recursive) path that does not exist is not cached as invalid
+    missing = os.path.join(str(tmpdir), 'missing')
+    with open(path, 'w') as fp:
+        fp.write('<msl><database_cache>cache</database_cache><path>{}</path></msl>'.format(missing))
+    config._compiled.clear()
+    Config(path)
+    assert missing not in Config.PATH
+    os.makedirs(missing)
+    config._compiled.clear()
+    Config(path)
+    assert missing in Config.PATH
+    assert [f for f in os.listdir(os.path.join(str(tmpdir), 'cache')) if not f.endswith('.config')] == []
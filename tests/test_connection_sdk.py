@@ -0,0 +1,94 @@
+import os
+import sys
+import ctypes
+
+import pytest
+
+import msl.loadlib
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend
+from msl.equipment import connection_sdk
+from msl.equipment.connection_sdk import ConnectionSDK
+
+# use a library from the msl-loadlib examples
+path = os.path.join(os.path.dirname(os.path.dirname(msl.loadlib.__file__)), 'examples', 'loadlib',
+                    'cpp_lib{}.so'.format(64 if sys.maxsize > 2**32 else 32))
+
+skipif_no_library = pytest.mark.skipif(not sys.platform.startswith('linux') or not os.path.isfile(path),
+                                       reason='requires the cpp_lib example from msl-loadlib')
+
+FUNCTIONS = [
+    ('add', ctypes.c_int, 'errcheck_positive', [ctypes.c_int, ctypes.c_int]),
+    ('scalar_multiply', ctypes.c_float, None, [ctypes.c_float, ctypes.POINTER(ctypes.c_float)]),
+]
+
+
+class CppLib(ConnectionSDK):
+
+    def __init__(self, record, functions=FUNCTIONS, strict=True):
+        super(CppLib, self).__init__(record, 'cdll')
+        self.funcs = self.set_function_prototypes(iter(functions), strict=strict)
+
+    def errcheck_positive(self, result, func, arguments):
+        self.log_errcheck(result, func, arguments)
+        if result < 0:
+            self.raise_exception('negative result')
+        return result
+
+
+def record(serial):
+    return EquipmentRecord(manufacturer='MSL', model='cpp', serial=serial,
+                           connection=ConnectionRecord(address='SDK::' + path, backend=Backend.MSL))
+
+
+@skipif_no_library
+def test_shared_library(monkeypatch):
+    monkeypatch.setattr(connection_sdk, '_libraries', {})
+    monkeypatch.setattr(connection_sdk, '_prototypes', {})
+
+    loaded = []
+    original = connection_sdk.LoadLibrary
+
+    def load_library(*args):
+        loaded.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(connection_sdk, 'LoadLibrary', load_library)
+
+    c1 = CppLib(record('1'))
+    c2 = CppLib(record('2'))
+
+    # the library is loaded once and the prototypes are created once
+    assert len(loaded) == 1
+    assert c1._lib is c2._lib
+    assert len(connection_sdk._prototypes) == 1
+    assert c1.path == c2.path
+
+    # but each connection has its own functions
+    assert c1.sdk is not c2.sdk
+    assert c1.sdk._handle == c2.sdk._handle
+    assert c1.sdk.add is c1.funcs['add']
+    assert c1.sdk.add is not c2.sdk.add
+    assert c1.sdk.add.__name__ == 'add'
+    assert c1.sdk.add.restype is ctypes.c_int
+    assert c1.sdk.add(1, 2) == 3
+    assert c2.sdk.add(5, 2) == 7
+    assert c1.funcs['scalar_multiply'].restype is ctypes.c_float
+
+    # the errcheck refers to the connection that called the function
+    with pytest.raises(IOError, match=r'\|cpp\|2 at'):
+        c2.sdk.add(1, -5)
+    with pytest.raises(IOError, match=r'\|cpp\|1 at'):
+        c1.sdk.add(1, -5)
+
+
+@skipif_no_library
+def test_set_function_prototypes_missing(monkeypatch):
+    monkeypatch.setattr(connection_sdk, '_prototypes', {})
+    functions = FUNCTIONS + [('does_not_exist', ctypes.c_int, None, [])]
+
+    with pytest.raises(AttributeError):
+        CppLib(record('1'), functions=functions)
+
+    monkeypatch.setattr(connection_sdk, '_prototypes', {})
+    c = CppLib(record('1'), functions=functions, strict=False)
+    assert sorted(c.funcs) == ['add', 'scalar_multiply']
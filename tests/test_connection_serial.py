@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import threading
 
@@ -62,6 +63,10 @@ def test_connection_serial_read():
     dev.write('x'*4096)
     assert dev.read() == 'x'*4096
 
+    # size=0 reads until the termination character(s)
+    dev.write('hello')
+    assert dev.read(size=0) == 'hello'
+
     n = dev.write('123.456')
     with pytest.raises(MSLConnectionError):
         dev.read(n+1)
@@ -78,3 +83,119 @@ def test_connection_serial_read():
     assert dev.read() == ',054.2'  # read until second `term`
 
     dev.write('SHUTDOWN')
+
+
+@pytest.mark.skipif(pty is None or sys.version_info[:2] < (3, 5), reason='requires pty and asyncio')
+def test_connection_serial_async():
+    import asyncio
+
+    term = b'\r\n'
+
+    def echo_server(port):
+        while True:
+            data = bytearray()
+            while not data.endswith(term):
+                data.extend(os.read(port, 1))
+
+            if data.startswith(b'SHUTDOWN'):
+                break
+
+            os.write(port, data)
+
+    master, slave = pty.openpty()
+
+    thread = threading.Thread(target=echo_server, args=(master,))
+    thread.start()
+
+    record = EquipmentRecord(
+        connection=ConnectionRecord(
+            address='ASRL::' + os.ttyname(slave),
+            backend=Backend.MSL,
+            properties={'termination': term, 'timeout': 25},
+        )
+    )
+
+    dev = record.connect(demo=False)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    coros = [dev.query_async('message {}'.format(i)) for i in range(10)]
+    assert loop.run_until_complete(asyncio.gather(*coros)) == ['message {}'.format(i) for i in range(10)]
+    assert loop.run_until_complete(dev.write_async('hello')) == 7
+    assert loop.run_until_complete(dev.read_async()) == 'hello'
+    loop.close()
+    asyncio.set_event_loop(None)
+
+    dev.write('SHUTDOWN')
+    dev.disconnect()
+    thread.join()
+
+
+@pytest.mark.skipif(pty is None, reason='pty is not available')
+def test_connection_serial_read_burst():
+    master, slave = pty.openpty()
+
+    record = EquipmentRecord(
+        connection=ConnectionRecord(
+            address='ASRL::' + os.ttyname(slave),
+            backend=Backend.MSL,
+            properties={'termination': b'\r\n', 'timeout': 5, 'max_read_size': 20},
+        )
+    )
+
+    dev = record.connect(demo=False)
+
+    # many replies in the input buffer of the serial port at the same time
+    os.write(master, b''.join(b'line %d\r\n' % i for i in range(100)))
+    for i in range(100):
+        assert dev.read() == 'line {}'.format(i)
+
+    # the bytes after the termination are kept for the next read
+    os.write(master, b'a\r\nbcdef')
+    assert dev.read() == 'a'
+    assert dev.read(2) == 'bc'
+    os.write(master, b'\r\n')
+    assert dev.read() == 'def'
+
+    os.write(master, b'x' * 30)
+    with pytest.raises(MSLConnectionError, match='max_read_size'):
+        dev.read()
+
+    dev.disconnect()
+    os.close(master)
+    os.close(slave)
+
+
+@pytest.mark.skipif(pty is None, reason='pty is not available')
+def test_connection_serial_binary_block():
+    import numpy as np
+
+    master, slave = pty.openpty()
+
+    record = EquipmentRecord(
+        connection=ConnectionRecord(
+            address='ASRL::' + os.ttyname(slave),
+            backend=Backend.MSL,
+            properties={'termination': b'\n', 'timeout': 5},
+        )
+    )
+
+    dev = record.connect(demo=False)
+
+    values = np.arange(-500, 500, dtype='<i2')
+    os.write(master, b'#42000' + values.tobytes() + b'\n')
+    assert np.array_equal(dev.read_binary_block(dtype='<i2'), values)
+
+    os.write(master, b'#0' + b'\x00\n\x01' + b'\n')
+    with pytest.raises(MSLConnectionError, match='indefinite-length'):
+        dev.read_binary_block()
+    assert dev.read() == '\x00'  # the remaining bytes are not read
+    assert dev.read() == '\x01'
+
+    os.write(master, b'#15ab')
+    with pytest.raises(MSLConnectionError, match='received 2 bytes, requested 5 bytes'):
+        dev.read_binary_block(expect_termination=False)
+
+    dev.disconnect()
+    os.close(master)
+    os.close(slave)
@@ -1,6 +1,12 @@
+import sys
 import time
 import socket
+import logging
 import threading
+try:
+    import socketserver
+except ImportError:
+    socketserver = None
 
 import pytest
 
@@ -242,3 +248,341 @@ def test_wrong_socket_type():
     # use the correct socket type to shutdown the server
     dev = record.connect()
     dev.write('SHUTDOWN')
+
+
+@pytest.mark.skipif(sys.version_info[:2] < (3, 5), reason='requires asyncio with async/await')
+def test_tcp_socket_async():
+    import asyncio
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.startswith(b'SLEEP'):
+                    continue  # do not reply
+                self.wfile.write(line)
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    port = server.server_address[1]
+    t = threading.Thread(target=server.serve_forever)
+    t.start()
+
+    try:
+        devices = [EquipmentRecord(connection=ConnectionRecord(
+            address='TCP::127.0.0.1::{}'.format(port),
+            backend=Backend.MSL,
+            properties={'termination': '\n', 'timeout': 5},
+        )).connect(demo=False) for _ in range(20)]
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        # many devices are driven by the same event loop
+        coros = [dev.query_async('device {}'.format(i)) for i, dev in enumerate(devices)]
+        replies = loop.run_until_complete(asyncio.gather(*coros))
+        assert replies == ['device {}'.format(i) for i in range(20)]
+
+        # concurrent requests to the same device do not interleave
+        dev = devices[0]
+        coros = [dev.query_async('message {}'.format(i)) for i in range(10)]
+        assert loop.run_until_complete(asyncio.gather(*coros)) == ['message {}'.format(i) for i in range(10)]
+
+        assert loop.run_until_complete(dev.write_async('hello')) == 6
+        assert loop.run_until_complete(dev.read_async(3)) == 'hel'
+        assert loop.run_until_complete(dev.read_async()) == 'lo'
+
+        # the blocking methods can still be used
+        assert dev.socket.gettimeout() == 5
+        assert dev.query('blocking') == 'blocking'
+
+        dev.timeout = 0.2
+        with pytest.raises(MSLTimeoutError):
+            loop.run_until_complete(dev.query_async('SLEEP'))
+        assert dev.socket.gettimeout() == 0.2
+        assert loop.run_until_complete(dev.query_async('awake')) == 'awake'
+
+        with pytest.raises(MSLConnectionError, match='max_read_size'):
+            loop.run_until_complete(dev.read_async(dev.max_read_size + 1))
+
+        loop.close()
+        asyncio.set_event_loop(None)
+        for dev in devices:
+            dev.disconnect()
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
+
+
+@pytest.mark.skipif(sys.version_info[:2] < (3, 5), reason='requires asyncio with async/await')
+def test_udp_socket_async():
+    import asyncio
+
+    address = '127.0.0.1'
+    port = get_available_port()
+    term = b'\r\n'
+
+    t = threading.Thread(target=echo_server_udp, args=(address, port, term))
+    t.start()
+
+    time.sleep(0.1)  # allow some time for the echo server to start
+
+    dev = EquipmentRecord(connection=ConnectionRecord(
+        address='UDP::{}::{}'.format(address, port),
+        backend=Backend.MSL,
+        properties=dict(termination=term, timeout=30),
+    )).connect(demo=False)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    assert loop.run_until_complete(dev.query_async('hello')) == 'hello'
+    assert loop.run_until_complete(dev.write_async(b'021.3' + term + b',054.2')) == 15
+    assert loop.run_until_complete(dev.read_async()) == '021.3'
+    assert loop.run_until_complete(dev.read_async()) == ',054.2'
+    loop.close()
+    asyncio.set_event_loop(None)
+
+    dev.write('SHUTDOWN')
+
+
+def test_tcp_socket_read_burst():
+
+    def server(s):
+        conn, _ = s.accept()
+        conn.recv(1024)  # wait for the request
+        # many lines in one burst, a termination that is split
+        # between two sends and a message that is larger than buffer_size
+        conn.sendall(b''.join(b'line %d\r\n' % i for i in range(1000)))
+        conn.sendall(b'split\r')
+        time.sleep(0.1)
+        conn.sendall(b'\nlong' + b'x' * 100 + b'\r\n' + b'tail')
+        conn.recv(1024)
+        conn.close()
+        s.close()
+
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    s.listen(1)
+    t = threading.Thread(target=server, args=(s,))
+    t.start()
+
+    dev = EquipmentRecord(connection=ConnectionRecord(
+        address='TCP::127.0.0.1::{}'.format(s.getsockname()[1]),
+        backend=Backend.MSL,
+        properties={'termination': '\r\n', 'timeout': 10, 'buffer_size': 7},
+    )).connect(demo=False)
+
+    dev.write('START')
+    for i in range(1000):
+        assert dev.read() == 'line {}'.format(i)
+    assert dev.read() == 'split'
+    assert dev.read() == 'long' + 'x' * 100
+    assert dev.read(3) == 'tai'
+    assert dev.byte_buffer == bytearray(b'l')
+    assert len(dev._byte_buffer) < 200  # the buffer is reused
+    del dev.byte_buffer[:]  # a copy is returned
+    assert dev.byte_buffer == bytearray(b'l')
+    dev.clear_byte_buffer()
+    assert len(dev.byte_buffer) == 0
+    dev._buffer_extend(b'l')
+
+    # a complete message in the buffer is read even though the total
+    # number of bytes that have been received is > max_read_size
+    dev.max_read_size = 10
+    dev._buffer_extend(b'1\r\n' * 10)
+    assert dev.read() == 'l1'
+    assert len(dev.byte_buffer) == 27
+    for i in range(9):
+        assert dev.read() == '1'
+    assert len(dev.byte_buffer) == 0
+
+    dev._buffer_extend(b'y' * 11)
+    with pytest.raises(MSLConnectionError, match='max_read_size'):
+        dev.read()
+
+    dev.write('STOP')
+    dev.disconnect()
+    t.join()
+
+
+@pytest.mark.skipif(socketserver is None, reason='requires socketserver')
+def test_tcp_socket_query_many(caplog):
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.rstrip()
+                if line == b'NO_REPLY':
+                    continue
+                # reply to a compound command like an SCPI instrument
+                self.wfile.write(b';'.join(b'<' + m + b'>' for m in line.split(b';')) + b'\n')
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever)
+    t.start()
+
+    try:
+        dev = EquipmentRecord(connection=ConnectionRecord(
+            address='TCP::127.0.0.1::{}'.format(server.server_address[1]),
+            backend=Backend.MSL,
+            properties={'termination': '\n', 'timeout': 5},
+        )).connect(demo=False)
+
+        messages = ['MEAS{}?'.format(i) for i in range(20)]
+        expected = ['<MEAS{}?>'.format(i) for i in range(20)]
+        caplog.set_level(logging.DEBUG)
+        caplog.clear()
+        assert dev.query_many(messages) == expected
+        writes = [r.getMessage() for r in caplog.records if '.write(' in r.getMessage()]
+        assert len(writes) == 1  # the messages are encoded and logged once
+        assert writes[0].endswith('.write({!r})'.format(''.join(m + '\n' for m in messages).encode()))
+        assert dev.query_many(iter(messages), delay=0.01) == expected
+        assert dev.query_many(messages, separator=';') == expected
+        assert dev.query_many([]) == []
+        assert dev.query('single') == '<single>'
+
+        with pytest.raises(MSLConnectionError, match='received 2 responses for 1 messages'):
+            dev.query_many(['a;b'], separator=';')
+
+        dev.timeout = 0.2
+        with pytest.raises(MSLTimeoutError):
+            dev.query_many(['a', 'NO_REPLY', 'b'])
+
+        dev.disconnect()
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
+
+
+@pytest.mark.skipif(socketserver is None, reason='requires socketserver')
+def test_tcp_socket_binary_block():
+    import numpy as np
+
+    values = (np.arange(100000) / 7.).astype('>f4')
+    blocks = {
+        b'WAVE?': b'#6' + str(values.nbytes).zfill(6).encode() + values.tobytes() + b'\n',
+        b'EMPTY?': b'#10\n',
+        b'PREFIX?': b':CURV #15' + b'hello' + b'\r\n',
+        b'INDEF?': b'#0' + b'\x01\n\x03\x04' + b'\n',  # contains the termination character
+        b'NOTERM?': b'#14abcd',
+        b'BAD?': b'#x123\n',
+        b'ODD?': b'#13abc\n',
+        b'TRAILING?': b'#12ab,cd\n',
+        b'HALF?': values[50:100].tobytes(),
+    }
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                block = blocks[line.rstrip()]
+                # send the block in pieces to test that the header and
+                # the data can be split between receives
+                for i in range(0, len(block), 65536):
+                    self.wfile.write(block[i:i+65536])
+                    self.wfile.flush()
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever)
+    t.start()
+
+    try:
+        dev = EquipmentRecord(connection=ConnectionRecord(
+            address='TCP::127.0.0.1::{}'.format(server.server_address[1]),
+            backend=Backend.MSL,
+            properties={'termination': '\n', 'timeout': 5, 'buffer_size': 1000},
+        )).connect(demo=False)
+
+        # the data is larger than max_read_size
+        assert values.nbytes > dev.max_read_size
+        array = dev.query_binary_values('WAVE?', dtype='>f4')
+        assert array.dtype == np.dtype('>f4')
+        assert np.array_equal(array, values)
+
+        # the termination was read, so the next query is not affected
+        assert dev.query_binary_values('EMPTY?').size == 0
+        assert dev.query_binary_values('PREFIX?').tobytes() == b'hello'
+
+        dev.write('NOTERM?')
+        assert dev.read_binary_block(dtype='S1', expect_termination=False).tolist() == [b'a', b'b', b'c', b'd']
+
+        with pytest.raises(MSLConnectionError, match='Invalid binary block header'):
+            dev.query_binary_values('BAD?')
+        assert dev.read() == '123'
+
+        with pytest.raises(MSLConnectionError, match='not a multiple'):
+            dev.query_binary_values('ODD?', dtype='<u2')
+
+        with pytest.raises(MSLConnectionError, match='after the binary block'):
+            dev.query_binary_values('TRAILING?')
+
+        # the bytes that were received before the read are used
+        dev._buffer_extend(b'#3400' + values[:50].tobytes())
+        dev.write('HALF?')
+        array = dev.read_binary_block(dtype='>f4', expect_termination=False)
+        assert np.array_equal(array, values[:100])
+
+        # the end of an indefinite-length block cannot be determined
+        with pytest.raises(MSLConnectionError, match='indefinite-length'):
+            dev.query_binary_values('INDEF?', dtype='<u2')
+
+        dev.disconnect()
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
+
+
+@pytest.mark.skipif(socketserver is None, reason='requires socketserver')
+def test_tcp_socket_query_ascii_values():
+    import numpy as np
+
+    values = np.random.RandomState(0).uniform(-10, 10, size=5000)
+    replies = {
+        b'READ?': ','.join(repr(v) for v in values.tolist()).encode() + b'\n',
+        b'COUNTS?': b'1;2;3;-4\n',
+        b'SPACES?': b' 1.5 , 2.5\r,3.5\r\n',
+        b'EMPTY?': b'\n',
+        b'ERROR?': b'1.0,ERR,3.0\n',
+    }
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                self.wfile.write(replies[line.rstrip()])
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever)
+    t.start()
+
+    try:
+        dev = EquipmentRecord(connection=ConnectionRecord(
+            address='TCP::127.0.0.1::{}'.format(server.server_address[1]),
+            backend=Backend.MSL,
+            properties={'termination': '\n', 'timeout': 5, 'max_read_size': 2**20},
+        )).connect(demo=False)
+
+        array = dev.query_ascii_values('READ?')
+        assert array.dtype == np.float64
+        assert np.array_equal(array, values)
+
+        array = dev.query_ascii_values('COUNTS?', dtype=int, separator=';')
+        assert array.dtype == np.dtype(int)
+        assert array.tolist() == [1, 2, 3, -4]
+
+        assert dev.query_ascii_values('SPACES?').tolist() == [1.5, 2.5, 3.5]
+        assert dev.query_ascii_values('EMPTY?').size == 0
+
+        with pytest.raises(MSLConnectionError, match='Cannot convert'):
+            dev.query_ascii_values('ERROR?')
+        with pytest.raises(MSLConnectionError, match='Cannot convert'):
+            dev.query_ascii_values('COUNTS?')
+
+        dev.disconnect()
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
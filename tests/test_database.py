@@ -1,9 +1,16 @@
 import os
+import re
 import sys
+import time
+import logging
+import datetime
 
 import pytest
+import numpy as np
 
 from msl.equipment.config import Config
+from msl.equipment.record_types import EquipmentRecord
+from msl.equipment.database import convert_to_sqlite, _read_sqlite
 from msl.equipment import constants
 
 
@@ -181,3 +188,667 @@ def test_database_user_defined():
             assert record.user_defined['policies'] == 'MSLE.X.YYY'
         else:
             assert len(record.user_defined) == 0
+
+
+def test_database_indexed_search():
+    dbase = Config(os.path.join(os.path.dirname(__file__), 'db.xml')).database()
+
+    # the indexed search must give the same result as testing every record
+    def brute_force(**kwargs):
+        query = dbase.compile_query(**kwargs)
+        return [r for r in dbase._equipment_records.values() if query._matches(r)]
+
+    for kwargs in [{'manufacturer': '^Ag'}, {'manufacturer': 'Agilent', 'model': '83640L'},
+                   {'manufacturer': r'H.*P|^Ag'}, {'location': '^RF Lab$'}, {'team': 'P&R'},
+                   {'manufacturer': '^Ag', 'connection': True}, {'category': '^DMM$', 'location': 'General'},
+                   {'manufacturer': 'gil'}, {'model': '0'}, {'serial': 'A0'}, {'location': 'Lab'},
+                   {'manufacturer': 'Company B'}, {'model': 'nothing matches'}]:
+        assert dbase.records(**kwargs) == brute_force(**kwargs)
+        assert dbase.records(**kwargs) == brute_force(**kwargs)  # the result is now cached
+
+    assert len(dbase.records(manufacturer='^Agilent$')) == 10
+    assert len(dbase.records(manufacturer='^agilent$')) == 0
+    assert len(dbase.records(manufacturer='^agilent$', flags=re.IGNORECASE)) == 10
+    assert len(dbase.records(serial='^A00024$')) == 1
+
+    # an indexed and a non-indexed field evaluate a '^text$' pattern in the same way
+    record = dbase.records(serial='^A00024$')[0]
+    record.alias = record.serial + '\n'
+    assert dbase.records(alias='^A00024$') == []
+    assert dbase.records(alias='^A00024') == [record]
+    record.alias = ''
+
+    # the results of a query of an attribute that can be modified are not cached
+    assert dbase.records(alias='^zzz$') == []
+    record.alias = 'zzz'
+    assert dbase.records(alias='^zzz$') == [record]
+    record.alias = ''
+    assert dbase.records(alias='^zzz$') == []
+    connection = record.connection
+    n = len(dbase.records(connection=True))
+    record.connection = None
+    assert len(dbase.records(connection=True)) == n - 1
+    record.connection = connection
+    assert len(dbase.records(connection=True)) == n
+    c = dbase.connections()[0]
+    assert c not in dbase.connections(properties={'zzz': 1})
+    c.properties['zzz'] = 1
+    assert dbase.connections(properties={'zzz': 1}) == [c]
+    del c.properties['zzz']
+
+    # date_calibrated can be a (start, end) tuple
+    start, end = datetime.date(2010, 1, 1), datetime.date(2010, 12, 31)
+    assert len(dbase.records(date_calibrated=(start, end))) == 3
+    assert dbase.records(date_calibrated=(start, end)) == dbase.records(date_calibrated=lambda d: start <= d <= end)
+    assert len(dbase.records(date_calibrated=(None, None))) == len(dbase.records())
+    assert dbase.records(date_calibrated=(start, None)) == dbase.records(date_calibrated=lambda d: d >= start)
+    with pytest.raises(TypeError):
+        dbase.records(date_calibrated=start)
+
+    assert dbase.connections(manufacturer='^Ag', backend='MSL') == \
+        [c for c in dbase.connections(manufacturer='^Ag') if c.backend == constants.Backend.MSL]
+    assert len(dbase.connections(serial='^A10008$')) == 1
+
+
+def test_database_snapshot(tmpdir, caplog):
+    root = os.path.dirname(__file__)
+    with open(os.path.join(root, 'db.xml')) as fp:
+        text = fp.read().replace('db_files/', os.path.join(root, 'db_files', ''))
+    text = text.replace('<msl>', '<msl>\n<database_cache>cache</database_cache>')
+    path = os.path.join(str(tmpdir), 'db.xml')
+    with open(path, 'w') as fp:
+        fp.write(text)
+
+    db1 = Config(path).database()
+    snapshots = [f for f in os.listdir(os.path.join(str(tmpdir), 'cache')) if f.endswith('.snapshot')]
+    assert len(snapshots) == 1
+
+    caplog.set_level(logging.DEBUG, 'msl.equipment.database')
+    caplog.clear()
+    db2 = Config(path).database()
+    assert 'Loaded the records from the snapshot' in caplog.text
+    assert len(db2.records()) == len(db1.records()) == 7 + 18
+    assert len(db2.connections()) == len(db1.connections()) == 10
+    for r1, r2 in zip(db1.records(), db2.records()):
+        assert repr(r1) == repr(r2)
+    assert db2.records(serial='37871232')[0].connection is db2.connections(serial='37871232')[0]
+    assert sorted(db2.equipment) == sorted(db1.equipment)
+
+    # changing the attributes of a <register> element makes the snapshot out of date
+    with open(path, 'w') as fp:
+        fp.write(text.replace('team="Any"', 'team="Other"'))
+    caplog.clear()
+    db3 = Config(path).database()
+    assert 'is out of date' in caplog.text
+    assert len(db3.records(team='Other')) == 18
+    caplog.clear()
+    assert len(Config(path).database().records(team='Other')) == 18
+    assert 'Loaded the records from the snapshot' in caplog.text
+
+    # a corrupt snapshot is ignored
+    with open(os.path.join(str(tmpdir), 'cache', snapshots[0]), 'wb') as fp:
+        fp.write(b'corrupt')
+    caplog.clear()
+    assert len(Config(path).database().records(team='Other')) == 18
+    assert 'Cannot load the snapshot' in caplog.text
+
+
+def test_database_parallel_load(tmpdir):
+    root = os.path.dirname(__file__)
+    with open(os.path.join(root, 'db.xml')) as fp:
+        text = fp.read().replace('db_files/', os.path.join(root, 'db_files', ''))
+
+    serial = Config(os.path.join(root, 'db.xml')).database()
+
+    for mode in ('thread', 'process'):
+        path = os.path.join(str(tmpdir), mode + '.xml')
+        with open(path, 'w') as fp:
+            fp.write(text.replace('<msl>', '<msl>\n<parallel_load max_workers="2">{}</parallel_load>'.format(mode)))
+        db = Config(path).database()
+        assert [repr(r) for r in db.records()] == [repr(r) for r in serial.records()]
+        assert [repr(r) for r in db.connections()] == [repr(r) for r in serial.connections()]
+        assert sorted(db.equipment) == sorted(serial.equipment)
+        assert not db._prefetched
+
+    path = os.path.join(str(tmpdir), 'invalid.xml')
+    with open(path, 'w') as fp:
+        fp.write(text.replace('<msl>', '<msl>\n<parallel_load>invalid</parallel_load>'))
+    with pytest.raises(IOError) as err:
+        Config(path).database()
+    assert 'parallel_load' in str(err.value)
+
+    # the same errors are raised
+    path = os.path.join(str(tmpdir), 'err3.xml')
+    with open(os.path.join(root, 'db_err3.xml')) as fp:
+        text = fp.read().replace('<registers>', '<registers><register><path>db_files/db.csv</path></register>')
+        text = text.replace('db_files/', os.path.join(root, 'db_files', ''))
+    with open(path, 'w') as fp:
+        fp.write(text.replace('<msl>', '<msl>\n<parallel_load>thread</parallel_load>'))
+    with pytest.raises(IOError) as err:
+        Config(path).database()
+    assert 'Sheet' in str(err.value)
+
+
+def test_database_excel_readers(tmpdir, monkeypatch):
+    from msl.equipment import database
+
+    root = os.path.dirname(__file__)
+    with open(os.path.join(root, 'db.xml')) as fp:
+        text = fp.read().replace('db_files/', os.path.join(root, 'db_files', ''))
+
+    xlrd = Config(os.path.join(root, 'db.xml')).database()
+
+    # the rows in a Sheet are converted in chunks
+    monkeypatch.setattr(database, '_EXCEL_CHUNK_SIZE', 2)
+    db = Config(os.path.join(root, 'db.xml')).database()
+    assert [repr(r) for r in db.records()] == [repr(r) for r in xlrd.records()]
+    assert [repr(r) for r in db.connections()] == [repr(r) for r in xlrd.connections()]
+    monkeypatch.undo()
+
+    path = os.path.join(str(tmpdir), 'openpyxl.xml')
+    with open(path, 'w') as fp:
+        fp.write(text.replace('<register team="Any">', '<register team="Any" reader="openpyxl">')
+                 .replace('<connection>', '<connection reader="openpyxl">'))
+    db = Config(path).database()
+    assert [repr(r) for r in db.records()] == [repr(r) for r in xlrd.records()]
+    assert [repr(r) for r in db.connections()] == [repr(r) for r in xlrd.connections()]
+
+    path = os.path.join(str(tmpdir), 'invalid.xml')
+    with open(path, 'w') as fp:
+        fp.write(text.replace('<connection>', '<connection reader="invalid">'))
+    with pytest.raises(IOError) as err:
+        Config(path).database()
+    assert 'Invalid Excel reader' in str(err.value)
+
+    path = os.path.join(str(tmpdir), 'sheet.xml')
+    with open(path, 'w') as fp:
+        fp.write(text.replace('<connection>', '<connection reader="openpyxl">')
+                 .replace('<sheet>Connections</sheet>', '<sheet>Invalid</sheet>'))
+    with pytest.raises(IOError) as err:
+        Config(path).database()
+    assert "There is no Sheet named 'Invalid'" in str(err.value)
+
+
+def test_database_text_based_quoted(tmpdir):
+    path = os.path.join(str(tmpdir), 'register.csv')
+    with open(path, 'w') as fp:
+        fp.write('Manufacturer,Model,Serial,Description,Date Calibrated,Calibration Cycle\n')
+        fp.write('Company A,"Model, 1",1,"A ""quoted"" description, with commas",2018-03-31,2\n')
+        fp.write('Company A,Model 2,2,Another description,2018-03-31,2\n')
+        fp.write('\n')
+        fp.write('Company B,Model 1,3,"Multi-line\ndescription",invalid,N/A\n')
+
+    config = os.path.join(str(tmpdir), 'config.xml')
+    with open(config, 'w') as fp:
+        fp.write('<msl><registers><register date_format="%Y-%m-%d">'
+                 '<path>{}</path></register></registers></msl>'.format(path))
+
+    records = Config(config).database().records()
+    assert len(records) == 3
+    assert records[0].model == 'Model, 1'
+    assert records[0].description == 'A "quoted" description, with commas'
+    assert records[0].date_calibrated == datetime.date(2018, 3, 31)
+    assert records[0].calibration_cycle == 2.0
+    assert records[1].date_calibrated == datetime.date(2018, 3, 31)
+    assert records[1].calibration_cycle == 2.0
+    assert records[2].description == 'Multi-line\ndescription'
+    assert records[2].date_calibrated == datetime.date(datetime.MINYEAR, 1, 1)
+    assert records[2].calibration_cycle == 0.0
+
+
+def test_database_sqlite(tmpdir):
+    root = os.path.dirname(__file__)
+    path = os.path.join(str(tmpdir), 'registers.sqlite3')
+    assert convert_to_sqlite(os.path.join(root, 'db_files', 'db.csv'), path) == 'db'
+    for sheet in ('Equipment', 'Connections'):
+        assert convert_to_sqlite(os.path.join(root, 'db_files', 'db.xlsx'), path, sheet=sheet) == sheet
+
+    with open(os.path.join(root, 'db.xml')) as fp:
+        text = fp.read()
+    text = text.replace('<path>db_files/db.csv</path>', '<path>{}</path><sheet>db</sheet>'.format(path))
+    text = text.replace('db_files/db.xlsx', path)
+    config = os.path.join(str(tmpdir), 'sqlite.xml')
+    with open(config, 'w') as fp:
+        fp.write(text)
+
+    expected = Config(os.path.join(root, 'db.xml')).database()
+    db = Config(config).database()
+    assert [repr(r) for r in db.records()] == [repr(r) for r in expected.records()]
+    assert [repr(r) for r in db.connections()] == [repr(r) for r in expected.connections()]
+    assert sorted(db.equipment) == sorted(expected.equipment)
+
+    for kwargs in [{'manufacturer': '^Agilent$'}, {'manufacturer': '^Ag'}, {'manufacturer': '^$'},
+                   {'model': 'A$', 'location': 'RF'}, {'manufacturer': 'agilent', 'flags': re.IGNORECASE},
+                   {'serial': '^A0', 'date_calibrated': lambda date: date.year > 2010}, {'description': 'Digital'}]:
+        found = [(str(r), r.team, r.date_calibrated) for r in db.iter_records(**kwargs)]
+        assert found == [(str(r), r.team, r.date_calibrated) for r in expected.records(**kwargs)]
+
+    with pytest.raises(IOError) as err:
+        _read_sqlite(path, None, None)
+    assert 'More than one Sheet' in str(err.value)
+    with pytest.raises(IOError):
+        _read_sqlite(os.path.join(str(tmpdir), 'does-not-exist.sqlite3'), 'db', None)
+
+
+def test_database_sqlite_query(tmpdir):
+    import sqlite3
+
+    path = os.path.join(str(tmpdir), 'registers.sqlite3')
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('CREATE TABLE a (Manufacturer TEXT, Model TEXT, Serial INTEGER, Location REAL)')
+        connection.executemany('INSERT INTO a VALUES (?, ?, ?, ?)', [
+            ('Company', 'X', 1, 1.0),
+            ('Company', 'Y', 2, 2.5),
+            ('Company', 'Y', 2, 3.0),  # duplicate
+            ('Company', 'Z', 30, 4.0),
+        ])
+        connection.execute('CREATE TABLE b (Manufacturer TEXT, Model TEXT, Serial INTEGER, Location REAL)')
+        connection.executemany('INSERT INTO b VALUES (?, ?, ?, ?)', [
+            ('Company', 'X', 1, 5.0),  # duplicate of a record in table "a"
+            ('Company', 'W', 4, 6.0),
+        ])
+    connection.close()
+
+    config = os.path.join(str(tmpdir), 'sqlite.xml')
+    with open(config, 'w') as fp:
+        fp.write('<msl><registers>'
+                 '<register team="A"><path>registers.sqlite3</path><sheet>a</sheet></register>'
+                 '<register team="B"><path>registers.sqlite3</path><sheet>b</sheet></register>'
+                 '</registers></msl>')
+
+    db = Config(config).database()
+    assert [r.location for r in db.records()] == ['1', '2.5', '4', '6']
+    for kwargs in [{'location': '^3$'}, {'location': '^5$'}, {'location': '^1$'}, {'location': r'^2\.5$'},
+                   {'model': '^Y$', 'location': '3'}, {'model': '^X'}, {'model': '^W$', 'location': '^6'},
+                   {'serial': '^3'}, {'serial': '^[12]$'}, {'model': 'x', 'flags': re.IGNORECASE}]:
+        assert [repr(r) for r in db.iter_records(**kwargs)] == [repr(r) for r in db.records(**kwargs)]
+
+
+def test_database_iter_records(tmpdir):
+    dbase = Config(os.path.join(os.path.dirname(__file__), 'db.xml')).database()
+
+    for kwargs in [{}, {'manufacturer': '^Ag'}, {'manufacturer': '^Ag', 'connection': True}, {'location': 'RF Lab'},
+                   {'date_calibrated': lambda date: date.year == 2010}]:
+        expected = [(str(r), r.team, r.date_calibrated, r.connection) for r in dbase.records(**kwargs)]
+        assert [(str(r), r.team, r.date_calibrated, r.connection) for r in dbase.iter_records(**kwargs)] == expected
+
+    # the records are matched lazily and the databases are not read again
+    iterator = dbase.iter_records(manufacturer='^Ag')
+    first = next(iterator)
+    assert first.manufacturer == 'Agilent'
+    assert first is dbase.records(manufacturer='^Ag')[0]
+    iterator.close()
+
+    # the alias that is defined in the Properties field of the Connections database
+    root = os.path.dirname(__file__)
+    with open(os.path.join(root, 'db_err6.xml')) as fp:
+        text = fp.read().replace('db_files/', os.path.join(root, 'db_files', ''))
+    path = os.path.join(str(tmpdir), 'alias.xml')
+    with open(path, 'w') as fp:
+        fp.write(re.sub(r'<equipment.*/>', '', text))
+    db = Config(path).database()
+    expected = [r.alias for r in db.records()]
+    assert any(expected)
+    assert [r.alias for r in db.iter_records()] == expected
+
+    with pytest.raises(NameError):
+        dbase.iter_records(unknown_name=None)
+
+
+def test_database_reload(tmpdir):
+    register = os.path.join(str(tmpdir), 'register.csv')
+    connections = os.path.join(str(tmpdir), 'connections.csv')
+    path = os.path.join(str(tmpdir), 'config.xml')
+
+    def write(filename, lines):
+        with open(filename, 'w') as fp:
+            fp.write('\n'.join(lines))
+        # make sure that the modification time changes
+        stat = os.stat(filename)
+        os.utime(filename, (stat.st_atime, stat.st_mtime + len(lines)))
+
+    with open(path, 'w') as fp:
+        fp.write('<msl><registers><register team="A" date_format="%Y-%m-%d"><path>register.csv</path>'
+                 '</register></registers><connections><connection><path>connections.csv</path>'
+                 '</connection></connections></msl>')
+    write(register, ['Manufacturer,Model,Serial,Date calibrated,Description',
+                     'Company,A,1,2010-01-01,first',
+                     'Company,B,2,2011-01-01,second',
+                     'Company,C,3,2012-01-01,third'])
+    write(connections, ['Manufacturer,Model,Serial,Backend,Address,Properties',
+                        'Company,A,1,MSL,COM1,baud_rate=9600'])
+
+    db = Config(path).database()
+    a, b, c = db.records()
+    assert a.connection.properties['baud_rate'] == 9600
+    b.alias = 'my alias'
+
+    # nothing changed
+    assert db.reload() == {'added': [], 'removed': [], 'modified': []}
+
+    # touching the file but not changing the contents
+    stat = os.stat(register)
+    os.utime(register, (stat.st_atime, stat.st_mtime + 100))
+    assert db.reload() == {'added': [], 'removed': [], 'modified': []}
+
+    write(register, ['Manufacturer,Model,Serial,Date calibrated,Description',
+                     'Company,A,1,2010-01-01,first',
+                     'Company,B,2,2011-01-01,second (updated)',
+                     'Company,D,4,2013-01-01,fourth'])
+    diff = db.reload()
+    assert diff['modified'] == [b]
+    assert diff['removed'] == [c]
+    assert [str(r) for r in diff['added']] == ['EquipmentRecord<Company|D|4>']
+    assert db.records()[:2] == [a, b]
+    assert b.description == 'second (updated)'
+    assert b.alias == 'my alias'
+    assert len(db.records(description='updated')) == 1
+    assert len(db.records(model='C')) == 0
+    assert len(db.records(model='D')) == 1
+
+    # the ConnectionRecord's changed
+    write(connections, ['Manufacturer,Model,Serial,Backend,Address,Properties',
+                        'Company,A,1,MSL,COM1,baud_rate=19200',
+                        'Company,B,2,MSL,COM2,'])
+    connection = a.connection
+    diff = db.reload()
+    assert diff['added'] == [] and diff['removed'] == []
+    assert diff['modified'] == [b]
+    assert a.connection is connection
+    assert a.connection.properties['baud_rate'] == 19200
+    assert b.connection.address == 'COM2'
+    assert len(db.connections()) == 2
+
+    # watch for changes in a background thread
+    changes = []
+    db.watch(interval=0.01, callback=changes.append)
+    try:
+        write(register, ['Manufacturer,Model,Serial,Date calibrated,Description',
+                         'Company,A,1,2010-01-01,first'])
+        t0 = time.time()
+        while not changes and time.time() - t0 < 10:
+            time.sleep(0.01)
+    finally:
+        db.stop_watching()
+    assert len(changes) == 1
+    assert len(changes[0]['removed']) == 2
+    assert db.records() == [a]
+
+
+def test_database_reload_error(tmpdir, monkeypatch):
+    from msl.equipment import database
+
+    register = os.path.join(str(tmpdir), 'register.csv')
+    connections = os.path.join(str(tmpdir), 'connections.csv')
+    path = os.path.join(str(tmpdir), 'config.xml')
+
+    def write(filename, lines):
+        with open(filename, 'w') as fp:
+            fp.write('\n'.join(lines))
+        stat = os.stat(filename)
+        os.utime(filename, (stat.st_atime, stat.st_mtime + len(lines)))
+
+    with open(path, 'w') as fp:
+        fp.write('<msl><registers><register team="A"><path>register.csv</path>'
+                 '</register></registers><connections><connection><path>connections.csv</path>'
+                 '</connection></connections></msl>')
+    write(register, ['Manufacturer,Model,Serial,Description',
+                     'Company,A,1,first',
+                     'Company,B,2,second'])
+    write(connections, ['Manufacturer,Model,Serial,Backend,Address,Properties',
+                        'Company,A,1,MSL,COM1,',
+                        'Company,B,2,MSL,COM2,'])
+
+    db = Config(path).database()
+    a, b = db.records()
+    connection_a = a.connection
+
+    write(register, ['Manufacturer,Model,Serial,Description',
+                     'Company,A,1,first (updated)',
+                     'Company,B,2,second'])
+    write(connections, ['Manufacturer,Model,Serial,Backend,Address,Properties',
+                        'Company,A,1,MSL,COM3,'])
+
+    read_file = database._read_file
+
+    def raise_for_register(filename, *args, **kwargs):
+        if filename == register:
+            raise IOError('cannot read the register')
+        return read_file(filename, *args, **kwargs)
+
+    # none of the records change if a database cannot be read
+    monkeypatch.setattr(database, '_read_file', raise_for_register)
+    with pytest.raises(IOError, match='cannot read the register'):
+        db.reload()
+    assert db.records() == [a, b]
+    assert a.description == 'first'
+    assert a.connection is connection_a
+    assert a.connection.address == 'COM1'
+    assert b.connection.address == 'COM2'
+    assert len(db.connections()) == 2
+
+    # the databases that changed are read again
+    monkeypatch.setattr(database, '_read_file', read_file)
+    diff = db.reload()
+    assert diff['added'] == [] and diff['removed'] == []
+    assert diff['modified'] == [a, b]
+    assert db.records() == [a, b]
+    assert a.description == 'first (updated)'
+    assert a.connection is connection_a
+    assert a.connection.address == 'COM3'
+    assert b.connection is None
+    assert len(db.connections()) == 1
+    assert db.reload() == {'added': [], 'removed': [], 'modified': []}
+
+
+def test_database_to_columns():
+    dbase = Config(os.path.join(os.path.dirname(__file__), 'db.xml')).database()
+    records = dbase.records()
+    n = len(records)
+
+    columns = dbase.to_columns()
+    assert sorted(columns) == sorted(n for n in EquipmentRecord._NAMES if n != 'user_defined')
+    for name in ('category', 'location', 'manufacturer', 'model', 'team'):
+        codes, categories = columns[name]
+        assert codes.dtype == np.int32
+        assert list(categories[codes]) == [getattr(r, name) for r in records]
+    for name in ('alias', 'description', 'latest_report_number', 'serial'):
+        assert list(columns[name]) == [getattr(r, name) for r in records]
+    assert columns['calibration_cycle'].dtype == np.float64
+    assert columns['date_calibrated'].dtype == np.dtype('datetime64[D]')
+    assert np.count_nonzero(columns['date_calibrated'].astype('datetime64[Y]') == np.datetime64('2010', 'Y')) == 3
+    assert np.count_nonzero(np.isnat(columns['date_calibrated'])) == len(dbase.records(date_calibrated=lambda d: d.year == 1))
+    assert np.count_nonzero(columns['connection']) == len(dbase.records(connection=True))
+
+    codes, categories = columns['manufacturer']
+    agilent = codes == list(categories).index('Agilent')
+    assert np.count_nonzero(agilent) == 10
+    assert np.count_nonzero(agilent & columns['connection']) == 3
+
+    # search criteria
+    columns = dbase.to_columns(manufacturer='^Ag')
+    assert len(columns['serial']) == 10
+    assert len(dbase.to_columns(manufacturer='NOPE!')['serial']) == 0
+
+    array = dbase.to_structured_array()
+    assert array.shape == (n,)
+    assert list(array['manufacturer']) == [r.manufacturer for r in records]
+    assert array['date_calibrated'].dtype == np.dtype('datetime64[D]')
+    assert dbase.to_structured_array(manufacturer='NOPE!').shape == (0,)
+
+
+def test_database_calibration_due():
+    dbase = Config(os.path.join(os.path.dirname(__file__), 'db.xml')).database()
+    records = dbase.records()
+
+    months = [0, 1, 3, 6, 120, 1200]
+    due = dbase.calibration_due(months=months, group_by=None)
+    assert sorted(due) == months
+    for m in months:
+        assert due[m] == [r for r in records if r.is_calibration_due(m)]
+
+    for group_by in ('team', 'location'):
+        due = dbase.calibration_due(months=months, group_by=group_by)
+        for m in months:
+            expected = {}
+            for r in records:
+                if r.is_calibration_due(m):
+                    expected.setdefault(getattr(r, group_by), []).append(r)
+            assert due[m] == expected
+
+    assert dbase.calibration_due(months=1200, manufacturer='NOPE!') == {1200: {}}
+    assert list(dbase.calibration_due()) == [0]
+
+    with pytest.raises(NameError):
+        dbase.calibration_due(group_by='unknown')
+    with pytest.raises(NameError):
+        dbase.calibration_due(unknown='value')
+
+    # the day is clipped to the end of the month, the same as relativedelta
+    from dateutil.relativedelta import relativedelta
+    from msl.equipment.database import _add_months
+    dates = [datetime.date(2019, 1, 31), datetime.date(2020, 1, 31), datetime.date(2019, 8, 31),
+             datetime.date(2019, 12, 15), datetime.date(2016, 2, 29), datetime.date(2019, 3, 1)]
+    for n in (0, 1, 6, 13, 30, 48, 61):
+        result = _add_months(np.array(dates, dtype='datetime64[D]'), np.full(len(dates), n, dtype=np.int64))
+        assert result.tolist() == [d + relativedelta(months=n) for d in dates]
+
+
+def test_database_compile_query(tmpdir):
+    dbase = Config(os.path.join(os.path.dirname(__file__), 'db.xml')).database()
+
+    # a compiled query must give the same result as records() and connections()
+    for kwargs in [{}, {'manufacturer': '^Ag'}, {'manufacturer': 'Agilent', 'model': '83640L'},
+                   {'manufacturer': r'H.*P|^Ag'}, {'location': '^RF Lab$'}, {'team': 'P&R'},
+                   {'manufacturer': 'agilent', 'flags': re.IGNORECASE}, {'description': 'Multimeter'},
+                   {'connection': True}, {'connection': False}, {'calibration_cycle': 5.0},
+                   {'date_calibrated': (datetime.date(2010, 1, 1), None)},
+                   {'date_calibrated': lambda date: date.year == 2009}]:
+        query = dbase.compile_query(**kwargs)
+        assert query() == dbase.records(**kwargs)
+        assert query() == dbase.records(**kwargs)  # from the cache
+
+    for kwargs in [{}, {'backend': 'MSL|PyVISA'}, {'backend': constants.Backend.PyVISA},
+                   {'interface': 'SERIAL'}, {'interface': constants.MSLInterface.SOCKET},
+                   {'address': '^COM'}, {'manufacturer': 'Agilent', 'backend': 'PyVISA'},
+                   {'properties': {'baud_rate': 119200}}]:
+        query = dbase.compile_connection_query(**kwargs)
+        assert query() == dbase.connections(**kwargs)
+        assert query() == dbase.connections(**kwargs)
+
+    with pytest.raises(NameError):
+        dbase.compile_query(unknown='value')
+    with pytest.raises(NameError):
+        dbase.compile_connection_query(team='value')
+    with pytest.raises(TypeError):
+        dbase.compile_query(date_calibrated=2010)
+    with pytest.raises(TypeError):
+        dbase.compile_connection_query(properties='baud_rate=9600')
+
+    assert repr(dbase.compile_query(model='A$', manufacturer='^Ag', flags=2)) == \
+        "Query<EquipmentRecord|manufacturer='^Ag', model='A$', flags=2>"
+
+    # the results are cached (least-recently used) and a callable is never cached
+    dbase._results.clear()
+    query = dbase.compile_query(manufacturer='Agilent')
+    result = query()
+    assert len(dbase._results) == 1
+    assert query() is not result
+    dbase.compile_query(date_calibrated=lambda date: True)()
+    assert len(dbase._results) == 1
+    for i in range(dbase._RESULTS_MAXSIZE + 10):
+        dbase.compile_query(serial='^{}'.format(i))()
+    assert len(dbase._results) == dbase._RESULTS_MAXSIZE
+    assert query._key not in dbase._results
+
+    # the cache is cleared when the database is reloaded
+    root = os.path.dirname(__file__)
+    register = os.path.join(str(tmpdir), 'register.csv')
+    with open(register, 'w') as fp:
+        fp.write('Manufacturer,Model,Serial\nCompany A,Model 1,1\n')
+    config = os.path.join(str(tmpdir), 'config.xml')
+    with open(config, 'w') as fp:
+        fp.write('<msl><registers><register><path>{}</path></register></registers></msl>'.format(register))
+    db = Config(config).database()
+    query = db.compile_query(manufacturer='^Company')
+    assert [r.serial for r in query()] == ['1']
+    time.sleep(0.01)
+    with open(register, 'a') as fp:
+        fp.write('Company B,Model 2,2\n')
+    db.reload()
+    assert [r.serial for r in query()] == ['1', '2']
+
+
+def test_database_equipment_aliases(tmpdir):
+    register = os.path.join(str(tmpdir), 'register.csv')
+    with open(register, 'w') as fp:
+        fp.write('Manufacturer,Model,Serial\n')
+        for i in range(6):
+            fp.write('Company,DMM,{}\n'.format(i))
+        fp.write('Company,DMMX,6\n')
+
+    config = os.path.join(str(tmpdir), 'config.xml')
+    with open(config, 'w') as fp:
+        fp.write('<msl><registers><register><path>{}</path></register></registers>'.format(register))
+        fp.write('<equipment serial="^0$"/>')
+        fp.write('<equipment serial="^6$"/>')
+        fp.write('<equipment serial="^1$" alias="DMM(2)"/>')
+        fp.write('<equipment serial="^2$"/>')
+        fp.write('<equipment serial="^3$"/>')
+        fp.write('<equipment serial="^4$" alias="DMM"/>')
+        fp.write('</msl>')
+
+    db = Config(config).database()
+    aliases = dict((alias, record.serial) for alias, record in db.equipment.items())
+    assert aliases == {'DMM': '0', 'DMMX': '6', 'DMM(2)': '1', 'DMM(4)': '2', 'DMM(5)': '3', 'DMM(6)': '4'}
+
+
+def test_database_snapshot_signatures(tmpdir, caplog, monkeypatch):
+    from msl.equipment import database
+
+    register = os.path.join(str(tmpdir), 'register.csv')
+    path = os.path.join(str(tmpdir), 'config.xml')
+    with open(path, 'w') as fp:
+        fp.write('<msl><database_cache>cache</database_cache><registers><register>'
+                 '<path>register.csv</path></register></registers></msl>')
+    with open(register, 'w') as fp:
+        fp.write('Manufacturer,Model,Serial\nCompany,A,1')
+
+    original = database._read_file
+
+    def read_file(*args):
+        # the register is modified after it was read but before the snapshot is saved
+        header, rows = original(*args)
+        rows = list(rows)
+        with open(register, 'a') as fp:
+            fp.write('\nCompany,B,2')
+        return header, iter(rows)
+
+    monkeypatch.setattr(database, '_read_file', read_file)
+    assert len(Config(path).database().records()) == 1
+    monkeypatch.setattr(database, '_read_file', original)
+
+    # the snapshot was saved with the signature of the file before it was modified
+    caplog.set_level(logging.DEBUG, 'msl.equipment.database')
+    caplog.clear()
+    assert len(Config(path).database().records()) == 2
+    assert 'is out of date' in caplog.text
+
+    caplog.clear()
+    assert len(Config(path).database().records()) == 2
+    assert 'Loaded the records from the snapshot' in caplog.text
+
+    # the snapshot was replaced (not written in place) and no temporary files remain
+    files = [f for f in os.listdir(os.path.join(str(tmpdir), 'cache')) if not f.endswith('.config')]
+    assert len(files) == 1 and files[0].endswith('.snapshot')
+
+    if hasattr(os, 'getuid'):
+        # a snapshot that other users can modify is not trusted
+        snapshot = os.path.join(str(tmpdir), 'cache', files[0])
+        assert not os.stat(snapshot).st_mode & 0o022
+        os.chmod(snapshot, 0o666)
+        caplog.clear()
+        assert len(Config(path).database().records()) == 2
+        assert 'Cannot load the snapshot' in caplog.text
+        assert 'other users can modify it' in caplog.text
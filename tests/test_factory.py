@@ -1,8 +1,11 @@
 import os
+import time
 
 import pytest
 
-from msl.equipment.factory import connect
+from msl.equipment import factory, ConnectionPool
+from msl.equipment.factory import connect, connect_all, Connections
+from msl.equipment.exceptions import ConnectAllError
 from msl.equipment.config import Config
 from msl.equipment.constants import Backend
 from msl.equipment.record_types import EquipmentRecord, ConnectionRecord
@@ -88,3 +91,71 @@ def test_list_or_dict():
 
     c = connect({'eq': record}, True)
     assert isinstance(c, ConnectionDemo)
+
+
+def test_connect_all():
+    records = [EquipmentRecord(alias='dev{}'.format(i), connection=ConnectionRecord(
+        address='COM{}'.format(i), backend=Backend.MSL)) for i in range(5)]
+
+    connections = connect_all(records, demo=True)
+    assert isinstance(connections, Connections)
+    assert sorted(connections) == ['dev0', 'dev1', 'dev2', 'dev3', 'dev4']
+    assert all(isinstance(c, ConnectionDemo) for c in connections.values())
+    assert connections['dev3'].equipment_record is records[3]
+    assert sorted(connections.elapsed) == sorted(connections)
+    assert connections.errors == {}
+
+    # the keys of a dict are used as the aliases
+    connections = connect_all({'a': records[0], 'b': records[1]}, demo=True)
+    assert sorted(connections) == ['a', 'b']
+
+    assert connect_all([]) == {}
+
+    with pytest.raises(ValueError, match='dev1'):
+        connect_all([records[1], records[1]], demo=True)
+
+
+def test_connect_all_errors():
+    pool = ConnectionPool()
+    records = {
+        'a': EquipmentRecord(connection=ConnectionRecord(address='COM1', backend=Backend.MSL)),
+        'b': EquipmentRecord(connection=ConnectionRecord()),  # no address has been set
+        'c': EquipmentRecord(connection=ConnectionRecord(address='COM3', backend=Backend.MSL)),
+    }
+
+    with pytest.raises(ConnectAllError) as err:
+        connect_all(records, demo=True, pool=pool)
+    assert list(err.value.errors) == ['b']
+    assert isinstance(err.value.errors['b'], ValueError)
+    assert 'connection address' in str(err.value)
+    assert 'b' in err.value.elapsed
+
+    # the connections that were established were released back to the pool
+    n = len(pool)
+    assert 0 < n <= 2
+    assert pool.evict() == n  # none of the connections are in use
+
+    connections = connect_all(records, demo=True, strict=False)
+    assert sorted(connections) == ['a', 'c']
+    assert list(connections.errors) == ['b']
+    assert sorted(connections.elapsed) == ['a', 'b', 'c']
+
+
+def test_connect_all_concurrent(monkeypatch):
+
+    def slow_connect(record, demo=None, pool=None):
+        time.sleep(0.2)
+        return record.alias
+
+    monkeypatch.setattr(factory, 'connect', slow_connect)
+
+    records = [EquipmentRecord(alias=str(i)) for i in range(10)]
+    t0 = time.time()
+    connections = connect_all(records)
+    assert time.time() - t0 < 1.0
+    assert connections == dict((str(i), str(i)) for i in range(10))
+    assert all(0.15 < t < 1.0 for t in connections.elapsed.values())
+
+    t0 = time.time()
+    connect_all(records, max_workers=5)
+    assert 0.35 < time.time() - t0 < 1.0
@@ -0,0 +1,182 @@
+import time
+import socket
+import threading
+
+import pytest
+
+from msl.loadlib.utils import get_available_port
+
+from msl.equipment import EquipmentRecord, ConnectionRecord, Backend, ConnectionPool
+from msl.equipment.pool import is_alive
+from msl.equipment.connection_demo import ConnectionDemo
+
+
+def same(c1, c2):
+    # whether two connections from a pool share the same connection to the equipment
+    return c1._connection is c2._connection
+
+
+def demo_record(serial='abc', address='COM1'):
+    return EquipmentRecord(manufacturer='Manu', model='Model', serial=serial,
+                           connection=ConnectionRecord(address=address, backend=Backend.MSL))
+
+
+def test_pool_reuse():
+    pool = ConnectionPool()
+    assert len(pool) == 0
+
+    record = demo_record()
+    c1 = record.connect(demo=True, pool=pool)
+    c2 = record.connect(demo=True, pool=pool)
+    assert isinstance(c1, ConnectionDemo)
+    assert c1 is not c2
+    assert same(c1, c2)
+    assert len(pool) == 1
+    assert pool.count(c1) == 2
+
+    # an equivalent record (e.g., from reloading the database) uses the same connection
+    c3 = demo_record().connect(demo=True, pool=pool)
+    assert same(c3, c1)
+    assert pool.count(c1) == 3
+
+    # a different serial number, address or demo mode is a different connection
+    assert not same(demo_record(serial='xyz').connect(demo=True, pool=pool), c1)
+    assert not same(demo_record(address='COM2').connect(demo=True, pool=pool), c1)
+    assert len(pool) == 3
+
+    pool.release(c1)
+    with pytest.raises(ValueError, match='already been released'):
+        pool.release(c1)
+    c2.disconnect()  # releases the connection
+    c2.disconnect()  # already released, does nothing
+    with c3:
+        assert pool.count(c3) == 1
+    assert pool.count(c1) == 0
+    with pytest.raises(ValueError, match='already been released'):
+        pool.release(c3)
+
+    # the idle connection is still in the pool
+    assert len(pool) == 3
+    assert same(record.connect(demo=True, pool=pool), c1)
+
+    with pytest.raises(ValueError, match='not in the pool'):
+        pool.release(demo_record().connect(demo=True))
+    with pytest.raises(ValueError, match='not in the pool'):
+        ConnectionPool().release(c1)
+
+    pool.close()
+    assert len(pool) == 0
+    assert pool.count(c1) == 0
+    assert not same(record.connect(demo=True, pool=pool), c1)
+
+
+def test_pool_shared():
+    # one user cannot disconnect a shared connection for the other users
+    pool = ConnectionPool()
+    record = demo_record()
+    c1 = record.connect(demo=True, pool=pool)
+    c2 = record.connect(demo=True, pool=pool)
+    c1.disconnect()
+    assert pool.count(c2) == 1
+    assert c2.is_alive()
+    c2.timeout = 10  # attributes are set on the connection
+    assert c1.timeout == 10
+    assert repr(c1) == repr(c2._connection)
+    c2.disconnect()
+    assert pool.count(c2) == 0
+    assert len(pool) == 1
+
+
+def test_pool_evict():
+    pool = ConnectionPool(max_idle=None)
+    c1 = demo_record('1').connect(demo=True, pool=pool)
+    c2 = demo_record('2').connect(demo=True, pool=pool)
+    pool.release(c1)
+    assert pool.evict(idle=60) == 0
+    assert pool.evict() == 1  # c2 is still in use
+    assert len(pool) == 1
+    assert pool.count(c2) == 1
+
+    pool = ConnectionPool(max_idle=0.05)
+    c1 = demo_record('1').connect(demo=True, pool=pool)
+    c2 = demo_record('2').connect(demo=True, pool=pool)
+    pool.release(c1)
+    assert len(pool) == 2
+    time.sleep(0.1)
+    assert same(demo_record('2').connect(demo=True, pool=pool), c2)
+    assert len(pool) == 1
+    assert not same(demo_record('1').connect(demo=True, pool=pool), c1)
+
+    # an expired connection is also evicted when a connection is released
+    pool = ConnectionPool(max_idle=0.05)
+    c1 = demo_record('1').connect(demo=True, pool=pool)
+    c2 = demo_record('2').connect(demo=True, pool=pool)
+    c1.disconnect()
+    time.sleep(0.1)
+    c2.disconnect()
+    assert len(pool) == 1
+
+    with ConnectionPool() as pool:
+        demo_record().connect(demo=True, pool=pool)
+        assert len(pool) == 1
+    assert len(pool) == 0
+
+
+def test_pool_health_check():
+    checked = []
+
+    def health_check(connection):
+        checked.append(connection)
+        return len(checked) < 2
+
+    pool = ConnectionPool(health_check=health_check)
+    record = demo_record()
+    c1 = record.connect(demo=True, pool=pool)
+    assert same(record.connect(demo=True, pool=pool), c1)
+    c2 = record.connect(demo=True, pool=pool)
+    assert not same(c2, c1)
+    assert checked == [c1._connection, c1._connection]
+    assert len(pool) == 1
+    with pytest.raises(ValueError):
+        pool.release(c1)
+
+
+def test_pool_socket():
+
+    def server(s):
+        conn, _ = s.accept()
+        data = bytearray()
+        while not data.endswith(b'\r\n'):
+            data.extend(conn.recv(4096))
+        conn.sendall(data)
+        conn.close()
+        s.close()
+
+    port = get_available_port()
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', port))
+    s.listen(1)
+    t = threading.Thread(target=server, args=(s,))
+    t.start()
+
+    record = EquipmentRecord(connection=ConnectionRecord(
+        address='TCP::127.0.0.1::{}'.format(port), backend=Backend.MSL))
+
+    pool = ConnectionPool()
+    dev = record.connect(demo=False, pool=pool)
+    assert is_alive(dev)
+    dev2 = record.connect(demo=False, pool=pool)
+    assert dev2.query('hello').rstrip() == 'hello'
+    pool.release(dev)
+    pool.release(dev2)
+    assert is_alive(dev)
+
+    # disconnect() releases the connection, the socket is only closed by the pool
+    other = record.connect(demo=False, pool=pool)
+    other.disconnect()
+    assert is_alive(dev)
+    assert pool.count(dev) == 0
+    pool.close()
+    assert not is_alive(dev)
+    assert not dev.is_alive()
+    t.join()
@@ -1,6 +1,7 @@
 # -*- coding: utf8 -*-
 import os
 import sys
+import pickle
 import datetime
 import tempfile
 from xml.etree.ElementTree import ElementTree
@@ -292,10 +293,12 @@ def test_equipment_record():
     # Check setting the ConnectionRecord
     #
 
-    for item in [None, 1, 6j, 'hello', True, object, 7.7, b'\x00']:
+    for item in [1, 6j, 'hello', True, object, 7.7, b'\x00']:
         with pytest.raises(TypeError):
             EquipmentRecord(connection=item)
 
+    assert EquipmentRecord(connection=None).connection is None
+
     record = EquipmentRecord(manufacturer='ABC def', model='ZZZ', serial='DY135/055')
 
     # check that the manufacturer, model and serial values all match
@@ -312,6 +315,10 @@ def test_equipment_record():
         record.connection = ConnectionRecord(manufacturer='ABC def', model='ZZZ', serial='AAA')
     assert '.serial' in str(err.value)
 
+    # the connection can be removed
+    record.connection = None
+    assert record.connection is None
+
     # check that the manufacturer, model and serial values for the ConnectionRecord get updated
     record = EquipmentRecord(manufacturer='Company', model='ABC', serial='XYZ', connection=ConnectionRecord())
     assert record.connection.manufacturer == 'Company'
@@ -755,3 +762,40 @@ def test_calibration_check_methods():
     assert d.year == 2000
     assert d.month == 11
     assert d.day == 14
+
+
+def test_compact_records():
+    kwargs = {'manufacturer': ''.join(['Company', ' XYZ']), 'model': ''.join(['AB', 'C']), 'serial': '1',
+              'category': ''.join(['D', 'MM']), 'location': ''.join(['Lab ', '1'])}
+    record1 = EquipmentRecord(**kwargs)
+    record2 = EquipmentRecord(**dict((k, ''.join(list(v))) for k, v in kwargs.items()))
+    connection = ConnectionRecord(**kwargs)
+
+    # no __dict__ per instance
+    for obj in (record1, connection):
+        assert not hasattr(obj, '__dict__')
+        with pytest.raises(AttributeError):
+            obj.unknown_attribute = 1
+
+    # the text that is shared by many records is interned
+    if not PY2:
+        for name in ('manufacturer', 'model', 'category', 'location'):
+            assert getattr(record1, name) is getattr(record2, name)
+
+    # the user_defined and properties dictionaries are created when needed
+    record = EquipmentRecord(manufacturer='A')
+    assert record._user_defined is None
+    assert record.user_defined == {}
+    record.user_defined['a'] = 1
+    assert record.to_dict()['user_defined'] == {'a': 1}
+    c = ConnectionRecord(properties={})
+    assert c._properties is None
+    assert c.properties == {}
+    assert str(record) == 'EquipmentRecord<A||>'
+
+    # records can be pickled (e.g., for a Database snapshot)
+    record1.connection = connection
+    record1.user_defined['x'] = [1, 2]
+    for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+        r = pickle.loads(pickle.dumps(record1, protocol))
+        assert repr(r) == repr(record1)